@@ -0,0 +1,35 @@
+"""add composite indexes to TRANSACOES
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0014'
+down_revision = '0013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Listagem paginada (OFFSET e keyset) por usuario e periodo
+    op.create_index('ix_TRANSACOES_usuario_data_id', 'TRANSACOES', ['usuario_id', 'data_transacao', 'id'])
+    # Total e transacoes da fatura: cobre compute_invoice_total sem ler a tabela
+    op.create_index('ix_TRANSACOES_cartao_data', 'TRANSACOES', ['cartao_credito_id', 'data_transacao', 'valor'])
+    # Agregados do dashboard (resumo, despesas por categoria, fluxo diario)
+    op.create_index(
+        'ix_TRANSACOES_usuario_tipo_data',
+        'TRANSACOES',
+        ['usuario_id', 'tipo', 'data_transacao', 'categoria_id', 'valor'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_TRANSACOES_usuario_tipo_data', 'TRANSACOES')
+    op.drop_index('ix_TRANSACOES_cartao_data', 'TRANSACOES')
+    op.drop_index('ix_TRANSACOES_usuario_data_id', 'TRANSACOES')
@@ -0,0 +1,25 @@
+"""add due-date index to GASTOS_FIXOS
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0015'
+down_revision = '0014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Execucao diaria em lote: gastos ativos que vencem no dia, paginados por id
+    op.create_index('ix_GASTOS_FIXOS_status_dia', 'GASTOS_FIXOS', ['status', 'dia_vencimento', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_GASTOS_FIXOS_status_dia', 'GASTOS_FIXOS')
@@ -0,0 +1,32 @@
+"""add scheduler leases table
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0016'
+down_revision = '0015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Leases do agendador: um worker por particao executa os jobs
+    op.create_table(
+        'SCHEDULER_LEASES',
+        sa.Column('nome', sa.String(length=100), nullable=False),
+        sa.Column('dono', sa.String(length=255), nullable=False),
+        sa.Column('expira_em', sa.DateTime(), nullable=False),
+        sa.Column('heartbeat_em', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('nome'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('SCHEDULER_LEASES')
@@ -0,0 +1,48 @@
+"""add unique fixed expense occurrence key to TRANSACOES
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0017'
+down_revision = '0016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Lancamentos duplicados (execucoes concorrentes antigas) continuam como transacoes
+    # comuns: so perdem o vinculo com o gasto fixo, preservando saldos
+    op.execute(
+        """
+        UPDATE TRANSACOES t
+        JOIN (
+            SELECT gasto_fixo_id, data_transacao, MIN(id) AS manter_id
+            FROM TRANSACOES
+            WHERE gasto_fixo_id IS NOT NULL
+            GROUP BY gasto_fixo_id, data_transacao
+            HAVING COUNT(*) > 1
+        ) d ON d.gasto_fixo_id = t.gasto_fixo_id AND d.data_transacao = t.data_transacao
+        SET t.gasto_fixo_id = NULL
+        WHERE t.id <> d.manter_id
+        """
+    )
+    op.create_unique_constraint(
+        'uq_transacao_gasto_fixo_data', 'TRANSACOES', ['gasto_fixo_id', 'data_transacao']
+    )
+
+    # A execucao com recuperacao nao filtra mais por dia: percorre os gastos ativos por id
+    op.drop_index('ix_GASTOS_FIXOS_status_dia', 'GASTOS_FIXOS')
+    op.create_index('ix_GASTOS_FIXOS_status_id', 'GASTOS_FIXOS', ['status', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_GASTOS_FIXOS_status_id', 'GASTOS_FIXOS')
+    op.create_index('ix_GASTOS_FIXOS_status_dia', 'GASTOS_FIXOS', ['status', 'dia_vencimento', 'id'])
+    op.drop_constraint('uq_transacao_gasto_fixo_data', 'TRANSACOES', type_='unique')
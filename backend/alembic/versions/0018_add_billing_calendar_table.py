@@ -0,0 +1,42 @@
+"""add billing calendar table
+
+Revision ID: 0018
+Revises: 0017
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0018'
+down_revision = '0017'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Periodos de faturamento pre-calculados por cartao (janela movel).
+    # Cartoes existentes sao preenchidos pelo job mensal do agendador ou sob demanda.
+    op.create_table(
+        'CALENDARIO_FATURAS',
+        sa.Column('cartao_credito_id', sa.Integer(), nullable=False),
+        sa.Column('ano_referencia', sa.Integer(), nullable=False),
+        sa.Column('mes_referencia', sa.Integer(), nullable=False),
+        sa.Column('data_inicio', sa.Date(), nullable=False),
+        sa.Column('data_fim', sa.Date(), nullable=False),
+        sa.Column('data_vencimento', sa.Date(), nullable=False),
+        sa.PrimaryKeyConstraint('cartao_credito_id', 'ano_referencia', 'mes_referencia'),
+        sa.ForeignKeyConstraint(['cartao_credito_id'], ['CARTOES_CREDITO.id'], ondelete='CASCADE'),
+    )
+    op.create_index(
+        'ix_CALENDARIO_FATURAS_cartao_periodo',
+        'CALENDARIO_FATURAS',
+        ['cartao_credito_id', 'data_inicio', 'data_fim'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_CALENDARIO_FATURAS_cartao_periodo', 'CALENDARIO_FATURAS')
+    op.drop_table('CALENDARIO_FATURAS')
@@ -0,0 +1,72 @@
+"""add installment purchase tables
+
+Revision ID: 0019
+Revises: 0018
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0019'
+down_revision = '0018'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Compras parceladas no cartao
+    op.create_table(
+        'COMPRAS_PARCELADAS',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('usuario_id', sa.Integer(), nullable=False),
+        sa.Column('cartao_credito_id', sa.Integer(), nullable=False),
+        sa.Column('categoria_id', sa.Integer(), nullable=True),
+        sa.Column('descricao', sa.String(length=255), nullable=True),
+        sa.Column('valor_total', sa.Numeric(10, 2), nullable=False),
+        sa.Column('numero_parcelas', sa.Integer(), nullable=False),
+        sa.Column('data_compra', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('data_criacao', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['cartao_credito_id'], ['CARTOES_CREDITO.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['categoria_id'], ['CATEGORIAS.id'], ondelete='SET NULL'),
+    )
+    op.create_index('ix_COMPRAS_PARCELADAS_id', 'COMPRAS_PARCELADAS', ['id'])
+    op.create_index('ix_COMPRAS_PARCELADAS_usuario_id', 'COMPRAS_PARCELADAS', ['usuario_id'])
+    op.create_index('ix_COMPRAS_PARCELADAS_cartao_credito_id', 'COMPRAS_PARCELADAS', ['cartao_credito_id'])
+
+    # Parcelas ja alocadas a fatura (cartao, mes, ano) em que caem
+    op.create_table(
+        'PARCELAS_FATURA',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('compra_id', sa.Integer(), nullable=False),
+        sa.Column('cartao_credito_id', sa.Integer(), nullable=False),
+        sa.Column('numero_parcela', sa.Integer(), nullable=False),
+        sa.Column('mes_referencia', sa.Integer(), nullable=False),
+        sa.Column('ano_referencia', sa.Integer(), nullable=False),
+        sa.Column('valor', sa.Numeric(10, 2), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['compra_id'], ['COMPRAS_PARCELADAS.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['cartao_credito_id'], ['CARTOES_CREDITO.id'], ondelete='CASCADE'),
+        sa.UniqueConstraint('compra_id', 'numero_parcela', name='uq_parcela_compra_numero'),
+    )
+    op.create_index('ix_PARCELAS_FATURA_id', 'PARCELAS_FATURA', ['id'])
+    # Cobre a soma por fatura sem ler a tabela
+    op.create_index(
+        'ix_PARCELAS_FATURA_cartao_periodo',
+        'PARCELAS_FATURA',
+        ['cartao_credito_id', 'ano_referencia', 'mes_referencia', 'valor'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_PARCELAS_FATURA_cartao_periodo', 'PARCELAS_FATURA')
+    op.drop_index('ix_PARCELAS_FATURA_id', 'PARCELAS_FATURA')
+    op.drop_table('PARCELAS_FATURA')
+    op.drop_index('ix_COMPRAS_PARCELADAS_cartao_credito_id', 'COMPRAS_PARCELADAS')
+    op.drop_index('ix_COMPRAS_PARCELADAS_usuario_id', 'COMPRAS_PARCELADAS')
+    op.drop_index('ix_COMPRAS_PARCELADAS_id', 'COMPRAS_PARCELADAS')
+    op.drop_table('COMPRAS_PARCELADAS')
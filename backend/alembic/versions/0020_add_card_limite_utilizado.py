@@ -0,0 +1,39 @@
+"""add limite_utilizado to credit cards
+
+Revision ID: 0020
+Revises: 0019
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0020'
+down_revision = '0019'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'CARTOES_CREDITO',
+        sa.Column('limite_utilizado', sa.Numeric(precision=10, scale=2), nullable=False, server_default='0.00'),
+    )
+    # Backfill: compras e parcelas do cartao menos o que ja foi pago em faturas
+    op.execute(
+        """
+        UPDATE CARTOES_CREDITO c SET limite_utilizado =
+            COALESCE((SELECT SUM(t.valor) FROM TRANSACOES t WHERE t.cartao_credito_id = c.id), 0)
+            + COALESCE((SELECT SUM(p.valor) FROM PARCELAS_FATURA p WHERE p.cartao_credito_id = c.id), 0)
+            - COALESCE((
+                SELECT SUM(f.valor_total) FROM FATURAS_CARTAO f
+                WHERE f.cartao_credito_id = c.id AND f.status = 'paga'
+            ), 0)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('CARTOES_CREDITO', 'limite_utilizado')
@@ -0,0 +1,51 @@
+"""add daily summary rollup table
+
+Revision ID: 0021
+Revises: 0020
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0021'
+down_revision = '0020'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Totais diarios por usuario/tipo/categoria/conta/cartao (0 = sem conta/cartao)
+    op.create_table(
+        'RESUMO_DIARIO',
+        sa.Column('usuario_id', sa.Integer(), nullable=False),
+        sa.Column('dia', sa.Date(), nullable=False),
+        sa.Column('tipo', sa.String(length=20), nullable=False),
+        sa.Column('categoria_id', sa.Integer(), nullable=False),
+        sa.Column('conta_bancaria_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('cartao_credito_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total', sa.Numeric(precision=14, scale=2), nullable=False, server_default='0.00'),
+        sa.Column('quantidade', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint(
+            'usuario_id', 'dia', 'tipo', 'categoria_id', 'conta_bancaria_id', 'cartao_credito_id'
+        ),
+        sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ondelete='CASCADE'),
+    )
+    # Backfill a partir das transacoes existentes (mesmo que rebuild_rollups.py)
+    op.execute(
+        """
+        INSERT INTO RESUMO_DIARIO
+            (usuario_id, dia, tipo, categoria_id, conta_bancaria_id, cartao_credito_id, total, quantidade)
+        SELECT usuario_id, DATE(data_transacao), tipo, categoria_id,
+               COALESCE(conta_bancaria_id, 0), COALESCE(cartao_credito_id, 0), SUM(valor), COUNT(*)
+        FROM TRANSACOES
+        GROUP BY usuario_id, DATE(data_transacao), tipo, categoria_id,
+                 COALESCE(conta_bancaria_id, 0), COALESCE(cartao_credito_id, 0)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('RESUMO_DIARIO')
@@ -0,0 +1,28 @@
+"""add upcoming lookup index to fixed expenses
+
+Revision ID: 0022
+Revises: 0021
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0022'
+down_revision = '0021'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Proximos vencimentos: filtra por usuario, ativos com lembrete e dia do mes
+    op.create_index(
+        'ix_GASTOS_FIXOS_usuario_lembrete',
+        'GASTOS_FIXOS',
+        ['usuario_id', 'status', 'lembrete_ativado', 'dia_vencimento'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_GASTOS_FIXOS_usuario_lembrete', 'GASTOS_FIXOS')
@@ -0,0 +1,46 @@
+"""add report jobs table
+
+Revision ID: 0023
+Revises: 0022
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0023'
+down_revision = '0022'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Jobs de relatorio gerados fora da request (arquivo gravado em disco)
+    op.create_table(
+        'RELATORIOS',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('usuario_id', sa.Integer(), nullable=False),
+        sa.Column('formato', sa.String(length=10), nullable=False, server_default='pdf'),
+        sa.Column('data_inicio', sa.Date(), nullable=True),
+        sa.Column('data_fim', sa.Date(), nullable=True),
+        sa.Column('chave', sa.String(length=64), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='pendente'),
+        sa.Column('caminho_arquivo', sa.String(length=500), nullable=True),
+        sa.Column('tamanho', sa.Integer(), nullable=True),
+        sa.Column('linhas', sa.Integer(), nullable=True),
+        sa.Column('erro', sa.Text(), nullable=True),
+        sa.Column('data_criacao', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('data_conclusao', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ondelete='CASCADE'),
+    )
+    op.create_index('ix_RELATORIOS_id', 'RELATORIOS', ['id'])
+    op.create_index('ix_RELATORIOS_usuario_chave', 'RELATORIOS', ['usuario_id', 'chave'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_RELATORIOS_usuario_chave', 'RELATORIOS')
+    op.drop_index('ix_RELATORIOS_id', 'RELATORIOS')
+    op.drop_table('RELATORIOS')
@@ -0,0 +1,29 @@
+"""add lease column to report jobs
+
+Revision ID: 0024
+Revises: 0023
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0024'
+down_revision = '0023'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Ultimo sinal de vida do job; sem renovacao dentro do prazo ele deixa de ser reaproveitado
+    op.add_column('RELATORIOS', sa.Column('atualizado_em', sa.DateTime(timezone=True), nullable=True))
+    op.execute(
+        "UPDATE RELATORIOS SET status = 'erro', erro = 'Geracao interrompida' "
+        "WHERE status IN ('pendente', 'processando')"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('RELATORIOS', 'atualizado_em')
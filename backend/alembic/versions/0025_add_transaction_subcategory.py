@@ -0,0 +1,30 @@
+"""add subcategoria_id to transactions
+
+Revision ID: 0025
+Revises: 0024
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0025'
+down_revision = '0024'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('TRANSACOES', sa.Column('subcategoria_id', sa.Integer(), nullable=True))
+    op.create_index('ix_TRANSACOES_subcategoria_id', 'TRANSACOES', ['subcategoria_id'])
+    op.create_foreign_key(
+        'fk_TRANSACOES_subcategoria', 'TRANSACOES', 'SUBCATEGORIAS', ['subcategoria_id'], ['id'], ondelete='SET NULL'
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_TRANSACOES_subcategoria', 'TRANSACOES', type_='foreignkey')
+    op.drop_index('ix_TRANSACOES_subcategoria_id', 'TRANSACOES')
+    op.drop_column('TRANSACOES', 'subcategoria_id')
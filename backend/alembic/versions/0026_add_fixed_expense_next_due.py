@@ -0,0 +1,26 @@
+"""add proximo_vencimento to fixed expenses
+
+Revision ID: 0026
+Revises: 0025
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0026'
+down_revision = '0025'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Proxima ocorrencia ainda nao lancada. NULL = recalcular na proxima execucao
+    # (a primeira execucao apos a migracao preenche todas as linhas)
+    op.add_column('GASTOS_FIXOS', sa.Column('proximo_vencimento', sa.Date(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('GASTOS_FIXOS', 'proximo_vencimento')
@@ -0,0 +1,71 @@
+"""add compra_parcelada_id to transactions
+
+Revision ID: 0027
+Revises: 0026
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0027'
+down_revision = '0026'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('TRANSACOES', sa.Column('compra_parcelada_id', sa.Integer(), nullable=True))
+    op.create_index('ix_TRANSACOES_compra_parcelada_id', 'TRANSACOES', ['compra_parcelada_id'])
+    op.create_foreign_key(
+        'fk_TRANSACOES_compra_parcelada', 'TRANSACOES', 'COMPRAS_PARCELADAS',
+        ['compra_parcelada_id'], ['id'], ondelete='SET NULL',
+    )
+    # Backfill: uma transacao (valor total, data da compra) por compra parcelada com categoria
+    op.execute(
+        """
+        INSERT INTO TRANSACOES
+            (usuario_id, categoria_id, cartao_credito_id, tipo, valor, descricao,
+             data_transacao, eh_gasto_fixo, compra_parcelada_id)
+        SELECT usuario_id, categoria_id, cartao_credito_id, 'Despesa', valor_total, descricao,
+               data_compra, 0, id
+        FROM COMPRAS_PARCELADAS
+        WHERE categoria_id IS NOT NULL
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO RESUMO_DIARIO
+            (usuario_id, dia, tipo, categoria_id, conta_bancaria_id, cartao_credito_id, total, quantidade)
+        SELECT usuario_id, DATE(data_transacao), tipo, categoria_id, 0, COALESCE(cartao_credito_id, 0),
+               SUM(valor), COUNT(*)
+        FROM TRANSACOES
+        WHERE compra_parcelada_id IS NOT NULL
+        GROUP BY usuario_id, DATE(data_transacao), tipo, categoria_id, COALESCE(cartao_credito_id, 0)
+        ON DUPLICATE KEY UPDATE total = total + VALUES(total), quantidade = quantidade + VALUES(quantidade)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        UPDATE RESUMO_DIARIO r
+        JOIN (
+            SELECT usuario_id, DATE(data_transacao) AS dia, tipo, categoria_id,
+                   COALESCE(cartao_credito_id, 0) AS cartao_credito_id, SUM(valor) AS total, COUNT(*) AS quantidade
+            FROM TRANSACOES
+            WHERE compra_parcelada_id IS NOT NULL
+            GROUP BY usuario_id, DATE(data_transacao), tipo, categoria_id, COALESCE(cartao_credito_id, 0)
+        ) p ON p.usuario_id = r.usuario_id AND p.dia = r.dia AND p.tipo = r.tipo
+           AND p.categoria_id = r.categoria_id AND r.conta_bancaria_id = 0
+           AND p.cartao_credito_id = r.cartao_credito_id
+        SET r.total = r.total - p.total, r.quantidade = r.quantidade - p.quantidade
+        """
+    )
+    op.execute("DELETE FROM TRANSACOES WHERE compra_parcelada_id IS NOT NULL")
+    op.drop_constraint('fk_TRANSACOES_compra_parcelada', 'TRANSACOES', type_='foreignkey')
+    op.drop_index('ix_TRANSACOES_compra_parcelada_id', 'TRANSACOES')
+    op.drop_column('TRANSACOES', 'compra_parcelada_id')
@@ -1,109 +1,93 @@
 from datetime import date
-from decimal import Decimal
+from typing import Literal
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import func, select, case
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user, get_db
+from app.crud import dashboard as dashboard_crud
+from app.crud.category import list_categories
 from app.crud.invoice import get_current_invoices_summary
-from app.models.account import BankAccount
-from app.models.category import Category, TipoCategoria
-from app.models.transaction import TipoTransacao, Transaction
+from app.models.transaction import TipoTransacao
 from app.models.user import User
+from app.schemas.category import CategoryPublic
 from app.schemas.invoice import InvoiceSummary
+from app.services.cache import cached
 
 
 router = APIRouter()
 
 
-@router.get("/dashboard/summary")
-def get_summary(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    # Soma receitas e despesas do mês atual
-    today = date.today()
-    first_day = today.replace(day=1)
-    stmt = (
-        select(
-            Transaction.tipo,
-            func.coalesce(func.sum(Transaction.valor), 0),
-        )
-        .where(
-            (Transaction.usuario_id == current_user.id)
-            & (Transaction.data_transacao >= first_day)
-            & (Transaction.data_transacao <= today)
+def _period_params(
+    start_date: date | None = Query(default=None, description="Inicio do periodo (padrao: dia 1 do mes)"),
+    end_date: date | None = Query(default=None, description="Fim do periodo, inclusive (padrao: hoje)"),
+    granularity: Literal["day", "week", "month"] = Query(default="day", description="Agrupamento das series"),
+) -> tuple[date, date, str]:
+    default_start, default_end = dashboard_crud.month_window()
+    end = end_date or default_end
+    start = start_date or (end.replace(day=1) if end_date else default_start)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start_date deve ser anterior ou igual a end_date")
+    if (end - start).days > dashboard_crud.MAX_SPAN_DAYS[granularity]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Periodo maximo para granularity={granularity}: {dashboard_crud.MAX_SPAN_DAYS[granularity]} dias",
         )
-        .group_by(Transaction.tipo)
+    return start, end, granularity
+
+
+def _aggregate(db: Session, usuario_id: int, start, end, tipo: str | None = None):
+    # Linhas agregadas do periodo, cacheadas ate a proxima escrita do usuario
+    return cached(
+        usuario_id,
+        f"dashboard:agregado:{tipo or 'todos'}",
+        f"{start.isoformat()}:{end.isoformat()}",
+        lambda: dashboard_crud.aggregate_period(db, usuario_id, start, end, tipo=tipo),
     )
-    rows = db.execute(stmt).all()
-    receita = Decimal("0")
-    despesa = Decimal("0")
-    for tipo, total in rows:
-        if tipo == TipoTransacao.RECEITA:
-            receita = Decimal(total or 0)
-        elif tipo == TipoTransacao.DESPESA:
-            despesa = Decimal(total or 0)
-    saldo_mes = receita - despesa
-    return {"receita_mes": str(receita), "despesa_mes": str(despesa), "saldo_mes": str(saldo_mes)}
+
+
+@router.get("/dashboard/summary")
+def get_summary(
+    period: tuple = Depends(_period_params),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    # Soma receitas e despesas do período (padrão: mês atual)
+    start, end, _ = period
+    return dashboard_crud.summarize(_aggregate(db, current_user.id, start, end))
 
 
 @router.get("/dashboard/balances-by-account")
 def balances_by_account(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    rows = db.execute(
-        select(BankAccount.id, BankAccount.nome_banco, BankAccount.saldo_atual).where(BankAccount.usuario_id == current_user.id)
-    ).all()
-    return [
-        {"id": r[0], "nome_banco": r[1], "saldo_atual": str(r[2] or 0)}
-        for r in rows
-    ]
+    return dashboard_crud.balances_by_account(db, current_user.id)
 
 
 @router.get("/dashboard/expenses-by-category")
-def expenses_by_category(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    today = date.today()
-    first_day = today.replace(day=1)
-    stmt = (
-        select(Category.nome, func.coalesce(func.sum(Transaction.valor), 0))
-        .join(Category, Category.id == Transaction.categoria_id, isouter=True)
-        .where(
-            (Transaction.usuario_id == current_user.id)
-            & (Transaction.tipo == TipoTransacao.DESPESA)
-            & (Transaction.data_transacao >= first_day)
-            & (Transaction.data_transacao <= today)
-        )
-        .group_by(Category.nome)
-        .order_by(func.coalesce(func.sum(Transaction.valor), 0).desc())
-    )
-    rows = db.execute(stmt).all()
-    return [{"categoria": r[0] or "Sem categoria", "total": str(r[1] or 0)} for r in rows]
+def expenses_by_category(
+    period: tuple = Depends(_period_params),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    start, end, _ = period
+    rows = _aggregate(db, current_user.id, start, end, tipo=TipoTransacao.DESPESA)
+    names = dashboard_crud.category_names(db, {r[2] for r in rows})
+    return dashboard_crud.expenses_by_category(rows, names)
 
 
 @router.get("/dashboard/daily-flow")
-def daily_flow(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    today = date.today()
-    first_day = today.replace(day=1)
-    stmt = (
-        select(
-            Transaction.data_transacao,
-            func.sum(case((Transaction.tipo == TipoTransacao.RECEITA, Transaction.valor), else_=0)).label("receitas"),
-            func.sum(case((Transaction.tipo == TipoTransacao.DESPESA, Transaction.valor), else_=0)).label("despesas"),
-        )
-        .where(
-            (Transaction.usuario_id == current_user.id)
-            & (Transaction.data_transacao >= first_day)
-            & (Transaction.data_transacao <= today)
-        )
-        .group_by(Transaction.data_transacao)
-        .order_by(Transaction.data_transacao)
-    )
-    rows = db.execute(stmt).all()
-    return [
-        {
-            "data": r[0].isoformat(),
-            "receitas": str(r[1] or 0),
-            "despesas": str(r[2] or 0),
-        }
-        for r in rows
-    ]
+def daily_flow(
+    period: tuple = Depends(_period_params),
+    formato: Literal["rows", "columnar"] = Query(default="rows", alias="format"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Serie densa de receitas/despesas (e acumulados) por dia, semana ou mes.
+
+    `format=columnar` devolve listas paralelas por campo (payload menor).
+    """
+    start, end, granularity = period
+    rows = _aggregate(db, current_user.id, start, end)
+    return dashboard_crud.daily_flow(rows, start, end, granularity, columnar=formato == "columnar")
 
 
 @router.get("/dashboard/credit-cards-summary", response_model=list[InvoiceSummary])
@@ -113,3 +97,54 @@ def credit_cards_summary(current_user: User = Depends(get_current_user), db: Ses
     return [InvoiceSummary.model_validate(s) for s in summaries]
 
 
+@router.get("/dashboard/overview")
+def overview(
+    widgets: str | None = Query(default=None, description="Widgets separados por virgula (padrao: todos)"),
+    period: tuple = Depends(_period_params),
+    formato: Literal["rows", "columnar"] = Query(default="rows", alias="format"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Todos os widgets do dashboard em uma resposta, com a mesma sessao e periodo.
+
+    Resumo, despesas por categoria e fluxo diario saem de uma unica varredura
+    de TRANSACOES agrupada por (dia, tipo, categoria).
+    """
+    selected = [w.strip() for w in widgets.split(",") if w.strip()] if widgets else list(dashboard_crud.WIDGETS)
+    unknown = [w for w in selected if w not in dashboard_crud.WIDGETS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Widgets invalidos: {', '.join(unknown)}")
+
+    start, end, granularity = period
+    result: dict = {
+        "periodo": {"inicio": start.isoformat(), "fim": end.isoformat(), "granularidade": granularity}
+    }
+
+    categories = None
+    if "categories" in selected:
+        categories = list_categories(db, current_user.id, include_subcategories=True)
+        result["categories"] = [CategoryPublic.model_validate(c).model_dump(mode="json") for c in categories]
+
+    if {"summary", "expenses_by_category", "daily_flow"} & set(selected):
+        rows = _aggregate(db, current_user.id, start, end)
+        if "summary" in selected:
+            result["summary"] = dashboard_crud.summarize(rows)
+        if "expenses_by_category" in selected:
+            if categories is not None:
+                names = {c.id: c.nome for c in categories}
+            else:
+                names = dashboard_crud.category_names(db, {r[2] for r in rows})
+            result["expenses_by_category"] = dashboard_crud.expenses_by_category(rows, names)
+        if "daily_flow" in selected:
+            result["daily_flow"] = dashboard_crud.daily_flow(
+                rows, start, end, granularity, columnar=formato == "columnar"
+            )
+
+    if "balances_by_account" in selected:
+        result["balances_by_account"] = dashboard_crud.balances_by_account(db, current_user.id)
+    if "credit_cards_summary" in selected:
+        result["credit_cards_summary"] = [
+            InvoiceSummary.model_validate(s).model_dump(mode="json")
+            for s in get_current_invoices_summary(db, current_user.id)
+        ]
+    return result
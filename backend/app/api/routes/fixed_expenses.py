@@ -6,11 +6,13 @@ from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user, get_db
 from app.crud.fixed_expense import (
+    UPCOMING_MAX_DAYS,
     create_fixed_expense,
     delete_fixed_expense,
     list_fixed_expenses,
     run_fixed_expenses_for_date,
     update_fixed_expense,
+    upcoming_fixed_expenses,
 )
 from app.models.fixed_expense import FixedExpense
 from app.models.user import User
@@ -19,47 +21,26 @@ from app.models.user import User
 router = APIRouter()
 @router.get("/fixed-expenses/upcoming")
 def get_upcoming_due(
-    days: int = Query(default=7, ge=1, le=60),
+    days: int = Query(default=7, ge=1, le=UPCOMING_MAX_DAYS),
+    start_date: date | None = Query(default=None, description="Inicio da janela (padrao: hoje)"),
+    end_date: date | None = Query(default=None, description="Fim da janela, inclusive (padrao: inicio + days)"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    # Lista gastos com vencimento nos próximos N dias (considerando dia do mês)
-    today = date.today()
-    end = today + timedelta(days=days)
-    items = list_fixed_expenses(db, current_user.id)
-    upcoming: list[dict] = []
-    for i in items:
-        if i.status != "Ativo" or not i.lembrete_ativado:
-            continue
-        # próximo vencimento calculado por dia_vencimento no mês corrente ou próximo
-        due_month = today.month
-        due_year = today.year
-        if today.day > i.dia_vencimento:
-            # próximo mês
-            if due_month == 12:
-                due_month = 1
-                due_year += 1
-            else:
-                due_month += 1
-        try:
-            due_date = date(due_year, due_month, i.dia_vencimento)
-        except ValueError:
-            # ajuste para meses curtos
-            from calendar import monthrange
-
-            last_day = monthrange(due_year, due_month)[1]
-            due_date = date(due_year, due_month, min(i.dia_vencimento, last_day))
-        if today <= due_date <= end:
-            upcoming.append(
-                {
-                    "id": i.id,
-                    "descricao": i.descricao,
-                    "valor": str(i.valor),
-                    "vencimento": due_date.isoformat(),
-                }
-            )
-    return {"items": upcoming}
-
+    # Todos os vencimentos da janela (pode cobrir varios meses), em ordem de data
+    start = start_date or date.today()
+    # Janela padrao limitada a date.max
+    end = end_date or min(start, date.max - timedelta(days=days)) + timedelta(days=days)
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start_date deve ser anterior ou igual a end_date")
+    if (end - start).days > UPCOMING_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A janela deve ter no máximo {UPCOMING_MAX_DAYS} dias",
+        )
+    items = upcoming_fixed_expenses(db, current_user.id, start, end)
+    total = items[-1]["acumulado"] if items else "0"
+    return {"inicio": start.isoformat(), "fim": end.isoformat(), "items": items, "total": total}
 
 
 @router.get("/fixed-expenses")
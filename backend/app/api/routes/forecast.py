@@ -0,0 +1,28 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user, get_db
+from app.models.user import User
+from app.services.cache import cached
+from app.services.forecast import forecast
+
+
+router = APIRouter()
+
+
+@router.get("/forecast")
+def get_forecast(
+    months: int = Query(default=6, ge=1, le=24, description="Meses projetados a partir de hoje"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Saldo diario projetado por conta: gastos fixos, faturas de cartao e receitas recorrentes."""
+    today = date.today()
+    return cached(
+        current_user.id,
+        "forecast",
+        f"{today.isoformat()}:{months}",
+        lambda: forecast(db, current_user.id, months, today=today),
+    )
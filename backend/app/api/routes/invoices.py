@@ -1,20 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user, get_db
+from app.crud.billing_calendar import HISTORY_MAX_MONTHS, invoice_history
 from app.crud.card import get_card
+from app.crud.category import get_category
+from app.crud.installment import (
+    create_installment_purchase,
+    delete_installment_purchase,
+    get_installment_purchase,
+    get_invoice_installments,
+    list_installment_purchases,
+)
 from app.crud.invoice import (
     get_invoice,
     get_invoice_transactions,
     get_or_create_invoice,
     list_invoices,
     pay_invoice,
-    recalculate_invoice,
     _billing_period,
 )
 from app.models.card import CreditCard
 from app.models.user import User
-from app.schemas.invoice import InvoicePayment, InvoicePublic, InvoiceWithTransactions
+from app.schemas.invoice import (
+    InstallmentPurchaseCreate,
+    InstallmentPurchasePublic,
+    InvoiceHistoryItem,
+    InvoiceInstallment,
+    InvoicePayment,
+    InvoicePublic,
+    InvoiceWithTransactions,
+)
 from app.schemas.transaction import TransactionPublic
 
 router = APIRouter()
@@ -39,6 +55,18 @@ def get_card_invoices(
     return [InvoicePublic.model_validate(inv) for inv in invoices]
 
 
+@router.get("/cards/{card_id}/invoices/history", response_model=list[InvoiceHistoryItem])
+def get_card_invoice_history(
+    card_id: int,
+    months: int = Query(default=12, ge=1, le=HISTORY_MAX_MONTHS),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Totais mensais das ultimas N faturas do cartao (inclusive as ainda nao criadas)."""
+    card = _verify_card_ownership(db, card_id, current_user.id)
+    return [InvoiceHistoryItem.model_validate(item) for item in invoice_history(db, card, months)]
+
+
 @router.get("/cards/{card_id}/invoices/current", response_model=InvoiceWithTransactions)
 def get_current_invoice(
     card_id: int,
@@ -50,18 +78,19 @@ def get_current_invoice(
 
     from datetime import date
     today = date.today()
+    # O total e mantido incrementalmente pelas escritas de transacoes: leitura direta
     invoice = get_or_create_invoice(db, card_id, today.month, today.year, current_user.id)
 
-    # Recalcular se estiver aberta
-    if invoice.status == "aberta":
-        invoice = recalculate_invoice(db, invoice)
-
     # Buscar transacoes do periodo
     start, end = _billing_period(card.dia_fechamento_fatura, today.month, today.year)
     transactions = get_invoice_transactions(db, card_id, start, end)
 
     result = InvoiceWithTransactions.model_validate(invoice)
     result.transacoes = [TransactionPublic.model_validate(tx) for tx in transactions]
+    result.parcelas = [
+        InvoiceInstallment.model_validate(p)
+        for p in get_invoice_installments(db, card_id, invoice.mes_referencia, invoice.ano_referencia)
+    ]
     return result
 
 
@@ -85,9 +114,70 @@ def get_invoice_by_month(
 
     result = InvoiceWithTransactions.model_validate(invoice)
     result.transacoes = [TransactionPublic.model_validate(tx) for tx in transactions]
+    result.parcelas = [
+        InvoiceInstallment.model_validate(p)
+        for p in get_invoice_installments(db, card_id, invoice.mes_referencia, invoice.ano_referencia)
+    ]
     return result
 
 
+@router.get("/cards/{card_id}/installments", response_model=list[InstallmentPurchasePublic])
+def get_card_installments(
+    card_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Lista as compras parceladas do cartao com as parcelas alocadas."""
+    _verify_card_ownership(db, card_id, current_user.id)
+    purchases = list_installment_purchases(db, card_id, current_user.id)
+    return [InstallmentPurchasePublic.model_validate(p) for p in purchases]
+
+
+@router.post(
+    "/cards/{card_id}/installments",
+    response_model=InstallmentPurchasePublic,
+    status_code=status.HTTP_201_CREATED,
+)
+def create_card_installment(
+    card_id: int,
+    payload: InstallmentPurchaseCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Registra uma compra parcelada e distribui as parcelas pelas faturas."""
+    card = _verify_card_ownership(db, card_id, current_user.id)
+    category = get_category(db, payload.categoria_id)
+    if not category or category.usuario_id not in (None, current_user.id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Categoria invalida")
+    try:
+        purchase = create_installment_purchase(
+            db,
+            usuario_id=current_user.id,
+            card=card,
+            valor_total=payload.valor_total,
+            numero_parcelas=payload.numero_parcelas,
+            data_compra=payload.data_compra,
+            descricao=payload.descricao,
+            categoria_id=payload.categoria_id,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return InstallmentPurchasePublic.model_validate(purchase)
+
+
+@router.delete("/installments/{compra_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_installment(
+    compra_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    purchase = get_installment_purchase(db, compra_id)
+    if not purchase or purchase.usuario_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Compra parcelada nao encontrada")
+    delete_installment_purchase(db, purchase)
+    return None
+
+
 @router.post("/invoices/{invoice_id}/pay", response_model=InvoicePublic)
 def pay_invoice_endpoint(
     invoice_id: int,
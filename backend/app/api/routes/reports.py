@@ -1,17 +1,71 @@
 from datetime import date
-from io import BytesIO, StringIO
+from io import StringIO
 import csv
-from fastapi import APIRouter, Depends, Response
+import os
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user, get_db
 from app.crud.share import get_effective_user_ids
-from app.crud.transaction import list_transactions
+from app.crud.transaction import iter_transaction_rows
+from app.db.session import SessionLocal
+from app.models.transaction import Transaction
 from app.models.user import User
+from app.schemas.report import ReportJobPublic
+from app.services.exports import FORMATS, export_transactions, require_writer
+from app.services.reports import STATUS_CONCLUIDO, get_report_job, submit_pdf_report
 
 
 router = APIRouter()
 
+CSV_CHUNK_ROWS = 1000
+
+_CSV_COLUMNS = (
+    Transaction.id,
+    Transaction.tipo,
+    Transaction.valor,
+    Transaction.data_transacao,
+    Transaction.descricao,
+    Transaction.categoria_id,
+    Transaction.conta_bancaria_id,
+    Transaction.cartao_credito_id,
+)
+
+
+def _csv_chunks(user_ids: list[int], start_date: date | None, end_date: date | None):
+    # A sessao da request e fechada antes do streaming terminar, entao o gerador usa a sua
+    output = StringIO()
+    writer = csv.writer(output)
+    output.write("\ufeff")
+    writer.writerow(["id", "tipo", "valor", "data", "descricao", "categoria_id", "conta_bancaria_id", "cartao_credito_id"])
+    yield output.getvalue().encode("utf-8")
+    output.seek(0)
+    output.truncate(0)
+
+    db = SessionLocal()
+    try:
+        rows = iter_transaction_rows(db, user_ids, _CSV_COLUMNS, start_date=start_date, end_date=end_date)
+        for count, t in enumerate(rows, start=1):
+            writer.writerow([
+                t.id,
+                t.tipo,
+                f"{t.valor:.2f}",
+                t.data_transacao.isoformat(),
+                (t.descricao or "").replace("\n", " ").replace("\r", " "),
+                t.categoria_id,
+                t.conta_bancaria_id or "",
+                t.cartao_credito_id or "",
+            ])
+            if count % CSV_CHUNK_ROWS == 0:
+                yield output.getvalue().encode("utf-8")
+                output.seek(0)
+                output.truncate(0)
+        yield output.getvalue().encode("utf-8")
+    finally:
+        db.close()
+
 
 @router.get("/reports/transactions.csv")
 def export_transactions_csv(
@@ -21,58 +75,85 @@ def export_transactions_csv(
     end_date: date | None = None,
 ):
     user_ids = get_effective_user_ids(db, current_user.id)
-    txs = list_transactions(db, user_ids, start_date=start_date, end_date=end_date, page=1, page_size=100000)
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["id", "tipo", "valor", "data", "descricao", "categoria_id", "conta_bancaria_id", "cartao_credito_id"])
-    for t in txs:
-        writer.writerow([
-            t.id,
-            t.tipo,
-            f"{t.valor:.2f}",
-            t.data_transacao.isoformat(),
-            (t.descricao or "").replace("\n", " ").replace("\r", " "),
-            t.categoria_id,
-            t.conta_bancaria_id or "",
-            t.cartao_credito_id or "",
-        ])
-    csv_bytes = output.getvalue().encode("utf-8-sig")
     headers = {"Content-Disposition": "attachment; filename=transacoes.csv"}
-    return Response(content=csv_bytes, media_type="text/csv", headers=headers)
+    return StreamingResponse(_csv_chunks(user_ids, start_date, end_date), media_type="text/csv", headers=headers)
 
 
 @router.get("/reports/transactions.pdf")
 def export_transactions_pdf(
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     start_date: date | None = None,
     end_date: date | None = None,
 ):
-    from reportlab.lib.pagesizes import A4
-    from reportlab.pdfgen import canvas
+    """Compatibilidade com clientes antigos: o PDF agora e gerado em job.
 
+    Devolve o arquivo se o job identico ja terminou; caso contrario 202 com o
+    job e o Location para consultar o status. Registrada antes da rota
+    generica, que nao aceita pdf.
+    """
     user_ids = get_effective_user_ids(db, current_user.id)
-    txs = list_transactions(db, user_ids, start_date=start_date, end_date=end_date, page=1, page_size=5000)
-
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-    y = height - 50
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(50, y, "Relatório de Transações")
-    y -= 30
-    c.setFont("Helvetica", 10)
-    for t in txs:
-        line = f"{t.data_transacao.isoformat()} - {t.tipo} - R$ {t.valor:.2f} - {t.descricao or ''}"
-        c.drawString(50, y, line)
-        y -= 14
-        if y < 50:
-            c.showPage()
-            y = height - 50
-            c.setFont("Helvetica", 10)
-    c.save()
-    pdf_bytes = buffer.getvalue()
-    headers = {"Content-Disposition": "attachment; filename=transacoes.pdf"}
-    return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
+    job = submit_pdf_report(db, current_user.id, user_ids, start_date, end_date)
+    if job.status == STATUS_CONCLUIDO and job.caminho_arquivo and os.path.exists(job.caminho_arquivo):
+        return FileResponse(job.caminho_arquivo, media_type="application/pdf", filename="transacoes.pdf")
+    return JSONResponse(
+        ReportJobPublic.model_validate(job).model_dump(mode="json"),
+        status_code=status.HTTP_202_ACCEPTED,
+        headers={"Location": str(request.url_for("get_pdf_report_job", job_id=job.id))},
+    )
+
+
+@router.get("/reports/transactions.{formato}")
+def export_transactions_columnar(
+    formato: Literal["parquet", "arrow", "xlsx"],
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    start_date: date | None = None,
+    end_date: date | None = None,
+):
+    """Exporta as transacoes com nomes de categoria, conta e cartao (Parquet, Arrow IPC ou XLSX)."""
+    try:
+        require_writer(formato)
+    except ImportError:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=f"Exportação {formato} indisponível no servidor")
+    user_ids = get_effective_user_ids(db, current_user.id)
+    headers = {"Content-Disposition": f"attachment; filename=transacoes.{formato}"}
+    return StreamingResponse(
+        export_transactions(formato, user_ids, start_date, end_date), media_type=FORMATS[formato], headers=headers
+    )
+
+
+def _own_job(db: Session, job_id: int, usuario_id: int):
+    job = get_report_job(db, job_id)
+    if not job or job.usuario_id != usuario_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Relatório não encontrado")
+    return job
+
+
+@router.post("/reports/jobs", response_model=ReportJobPublic, status_code=status.HTTP_202_ACCEPTED)
+def create_pdf_report_job(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    start_date: date | None = None,
+    end_date: date | None = None,
+):
+    """Enfileira o PDF das transacoes; o cliente consulta o status e baixa quando concluido."""
+    user_ids = get_effective_user_ids(db, current_user.id)
+    return submit_pdf_report(db, current_user.id, user_ids, start_date, end_date)
+
+
+@router.get("/reports/jobs/{job_id}", response_model=ReportJobPublic)
+def get_pdf_report_job(job_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    return _own_job(db, job_id, current_user.id)
 
 
+@router.get("/reports/jobs/{job_id}/download")
+def download_pdf_report(job_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    # FileResponse atende cabecalhos Range (download parcial/retomado)
+    job = _own_job(db, job_id, current_user.id)
+    if job.status != STATUS_CONCLUIDO:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Relatório ainda não disponível ({job.status})")
+    if not job.caminho_arquivo or not os.path.exists(job.caminho_arquivo):
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Arquivo do relatório não existe mais")
+    return FileResponse(job.caminho_arquivo, media_type="application/pdf", filename="transacoes.pdf")
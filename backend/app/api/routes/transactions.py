@@ -1,15 +1,24 @@
 from datetime import date
 from decimal import Decimal
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user, get_db
-from app.crud.transaction import count_transactions, create_transaction, delete_transaction, list_transactions
+from app.crud.account import get_account
+from app.crud.card import get_card
+from app.crud.subcategory import get_subcategory
+from app.crud.transaction import (
+    create_transaction,
+    delete_transaction,
+    encode_cursor,
+    list_transactions_with_total,
+)
 from app.models.transaction import Transaction
 from app.models.user import User
-from app.schemas.transaction import TransactionCreate, TransactionPublic
+from app.schemas.transaction import TransactionCreate, TransactionImportResult, TransactionPublic
+from app.services.transaction_import import import_transactions
 
 
 router = APIRouter()
@@ -25,45 +34,59 @@ def get_my_transactions(
     cartao_ids: Annotated[list[int] | None, Query()] = None,
     start_date: date | None = Query(default=None),
     end_date: date | None = Query(default=None),
-    order_by: str = Query(default="data_transacao"),
-    order_dir: str = Query(default="desc"),
+    order_by: Literal["data_transacao", "valor", "id"] = Query(default="data_transacao"),
+    order_dir: Literal["asc", "desc"] = Query(default="desc"),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=200),
+    after: str | None = Query(default=None, description="Cursor opaco (next_cursor) para paginacao keyset"),
+    include_total: bool = Query(default=True, description="Calcular o total de itens do filtro"),
 ):
-    txs = list_transactions(
-        db,
-        [current_user.id],
-        tipo=tipo,
-        categoria_ids=categoria_ids,
-        conta_ids=conta_ids,
-        cartao_ids=cartao_ids,
-        start_date=start_date,
-        end_date=end_date,
-        order_by=order_by,
-        order_dir=order_dir,
-        page=page,
-        page_size=page_size,
-    )
-    total = count_transactions(
-        db,
-        [current_user.id],
-        tipo=tipo,
-        categoria_ids=categoria_ids,
-        conta_ids=conta_ids,
-        cartao_ids=cartao_ids,
-        start_date=start_date,
-        end_date=end_date,
-    )
+    try:
+        txs, total = list_transactions_with_total(
+            db,
+            [current_user.id],
+            tipo=tipo,
+            categoria_ids=categoria_ids,
+            conta_ids=conta_ids,
+            cartao_ids=cartao_ids,
+            start_date=start_date,
+            end_date=end_date,
+            order_by=order_by,
+            order_dir=order_dir,
+            page=page,
+            page_size=page_size,
+            after=after,
+            include_total=include_total,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     return {
         "items": [TransactionPublic.model_validate(t) for t in txs],
         "page": page,
         "page_size": page_size,
         "total": total,
+        "next_cursor": encode_cursor(txs[-1], order_by, order_dir) if len(txs) == page_size else None,
     }
 
 
 @router.post("/transactions", response_model=TransactionPublic, status_code=status.HTTP_201_CREATED)
 def create_my_transaction(payload: TransactionCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    if payload.conta_bancaria_id is not None:
+        account = get_account(db, payload.conta_bancaria_id)
+        if not account or account.usuario_id != current_user.id:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Conta bancária inválida")
+    if payload.cartao_credito_id is not None:
+        card = get_card(db, payload.cartao_credito_id)
+        if not card or card.usuario_id != current_user.id:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cartão de crédito inválido")
+    if payload.subcategoria_id is not None:
+        sub = get_subcategory(db, payload.subcategoria_id)
+        if (
+            not sub
+            or sub.categoria_id != payload.categoria_id
+            or sub.usuario_id not in (None, current_user.id)
+        ):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Subcategoria inválida para a categoria")
     tx = create_transaction(
         db,
         usuario_id=current_user.id,
@@ -72,17 +95,52 @@ def create_my_transaction(payload: TransactionCreate, current_user: User = Depen
         data_transacao=payload.data_transacao,
         descricao=payload.descricao,
         categoria_id=payload.categoria_id,
+        subcategoria_id=payload.subcategoria_id,
         conta_bancaria_id=payload.conta_bancaria_id,
         cartao_credito_id=payload.cartao_credito_id,
     )
     return TransactionPublic.model_validate(tx)
 
 
+@router.post("/transactions/import", response_model=TransactionImportResult)
+def import_my_transactions(
+    file: UploadFile = File(...),
+    formato: str | None = Form(default=None, description="csv ou ofx (padrao: pela extensao do arquivo)"),
+    categoria_id: int | None = Form(default=None),
+    conta_bancaria_id: int | None = Form(default=None),
+    cartao_credito_id: int | None = Form(default=None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Importa transacoes em lote (CSV ou OFX) e retorna os erros por linha."""
+    if not formato:
+        formato = "ofx" if (file.filename or "").lower().endswith((".ofx", ".qfx")) else "csv"
+    formato = formato.lower()
+    if formato not in ("csv", "ofx"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Formato deve ser csv ou ofx")
+    result = import_transactions(
+        db,
+        current_user.id,
+        file.file,
+        formato,
+        categoria_id=categoria_id,
+        conta_bancaria_id=conta_bancaria_id,
+        cartao_credito_id=cartao_credito_id,
+    )
+    return TransactionImportResult.model_validate(result)
+
+
 @router.delete("/transactions/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_my_transaction(transaction_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     tx = db.get(Transaction, transaction_id)
     if not tx or tx.usuario_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transação não encontrada")
+    if tx.compra_parcelada_id is not None:
+        # As parcelas ja estao nas faturas: a exclusao e feita pela compra parcelada
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Transação de compra parcelada: exclua a compra parcelada",
+        )
     delete_transaction(db, tx)
     return None
 
@@ -198,6 +198,62 @@ class Settings(BaseSettings):
         validation_alias=AliasChoices("EMAIL_VERIFICATION_EXPIRY_MINUTES", "email_verification_expiry_minutes"),
     )
 
+    # Configurações do Agendador
+    scheduler_partitions: int = Field(
+        default=1,
+        description="Numero de particoes (usuario_id % N) dos jobs agendados",
+        validation_alias=AliasChoices("SCHEDULER_PARTITIONS", "scheduler_partitions"),
+    )
+    scheduler_max_partitions_per_worker: int = Field(
+        default=0,
+        description="Maximo de particoes por worker (0 = sem limite)",
+        validation_alias=AliasChoices("SCHEDULER_MAX_PARTITIONS_PER_WORKER", "scheduler_max_partitions_per_worker"),
+    )
+    scheduler_lease_ttl_seconds: int = Field(
+        default=90,
+        description="Validade da lease do agendador em segundos (renovada a cada ttl/3)",
+        validation_alias=AliasChoices("SCHEDULER_LEASE_TTL_SECONDS", "scheduler_lease_ttl_seconds"),
+    )
+
+    # Cache de agregados (dashboard)
+    cache_enabled: bool = Field(
+        default=True,
+        description="Liga o cache de agregados por usuario (so com CACHE_REDIS_URL)",
+        validation_alias=AliasChoices("CACHE_ENABLED", "cache_enabled"),
+    )
+    cache_max_entries: int = Field(
+        default=2048,
+        description="Maximo de entradas do LRU em memoria (por processo)",
+        validation_alias=AliasChoices("CACHE_MAX_ENTRIES", "cache_max_entries"),
+    )
+    cache_ttl_seconds: int = Field(
+        default=300,
+        description="Validade de cada entrada do cache em segundos",
+        validation_alias=AliasChoices("CACHE_TTL_SECONDS", "cache_ttl_seconds"),
+    )
+    cache_redis_url: str = Field(
+        default="",
+        description="URL do Redis compartilhado entre workers (vazio = cache desligado)",
+        validation_alias=AliasChoices("CACHE_REDIS_URL", "cache_redis_url"),
+    )
+
+    # Relatorios gerados em segundo plano
+    reports_dir: str = Field(
+        default="storage/reports",
+        description="Diretorio onde os PDFs gerados sao gravados",
+        validation_alias=AliasChoices("REPORTS_DIR", "reports_dir"),
+    )
+    report_workers: int = Field(
+        default=2,
+        description="Processos do pool que renderizam relatorios",
+        validation_alias=AliasChoices("REPORT_WORKERS", "report_workers"),
+    )
+    report_retention_days: int = Field(
+        default=7,
+        description="Dias que os PDFs gerados e seus jobs ficam guardados (0 = sem limpeza)",
+        validation_alias=AliasChoices("REPORT_RETENTION_DAYS", "report_retention_days"),
+    )
+
     model_config = SettingsConfigDict(env_file=".env", env_ignore_empty=True, extra="ignore")
 
     @staticmethod
@@ -1,6 +1,6 @@
 from decimal import Decimal
 
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
 from app.models.account import BankAccount
@@ -56,11 +56,21 @@ def delete_account(db: Session, account: BankAccount) -> None:
     db.commit()
 
 
-def apply_balance_delta(db: Session, account: BankAccount, delta: Decimal) -> BankAccount:
-    account.saldo_atual = (account.saldo_atual or Decimal("0.00")) + Decimal(delta)
-    db.add(account)
-    db.commit()
-    db.refresh(account)
-    return account
-
-
+def apply_balance_delta(
+    db: Session, conta_bancaria_id: int, delta: Decimal, usuario_id: int | None = None
+) -> int:
+    """Soma `delta` ao saldo da conta direto no banco (saldo_atual = saldo_atual + :delta).
+
+    Nao faz commit nem refresh: o UPDATE roda na mesma transacao da operacao que
+    gerou o delta, e a atualizacao atomica evita perda de updates concorrentes.
+    Com `usuario_id`, so altera contas desse usuario. Retorna as linhas afetadas.
+    """
+    stmt = (
+        update(BankAccount)
+        .where(BankAccount.id == conta_bancaria_id)
+        .values(saldo_atual=BankAccount.saldo_atual + Decimal(delta))
+        .execution_options(synchronize_session=False)
+    )
+    if usuario_id is not None:
+        stmt = stmt.where(BankAccount.usuario_id == usuario_id)
+    return db.execute(stmt).rowcount
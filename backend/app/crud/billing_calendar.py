@@ -0,0 +1,404 @@
+import logging
+from datetime import date
+from decimal import Decimal
+from functools import lru_cache
+
+from sqlalchemy import Date, and_, case, delete, exists, func, insert, literal, select, tuple_, update
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm import Session
+
+from app.crud.invoice import _billing_period, _due_date, invoice_reference
+from app.models.billing_calendar import BillingCalendar
+from app.models.card import CreditCard
+from app.models.installment import InstallmentAllocation
+from app.models.invoice import CreditCardInvoice
+from app.models.transaction import Transaction
+from app.services.cache import bump_data_version
+
+
+logger = logging.getLogger(__name__)
+
+
+# Maximo de meses do historico de faturas (GET /cards/{id}/invoices/history)
+HISTORY_MAX_MONTHS = 120
+
+# Janela mantida por cartao, relativa ao mes atual (cobre todo o historico)
+CALENDAR_MONTHS_BACK = HISTORY_MAX_MONTHS
+CALENDAR_MONTHS_AHEAD = 24
+
+SYNC_CHUNK_SIZE = 500
+
+
+def shift_month(mes: int, ano: int, months: int) -> tuple[int, int]:
+    """Soma `months` (pode ser negativo) a um mes/ano de referencia."""
+    index = ano * 12 + (mes - 1) + months
+    return index % 12 + 1, index // 12
+
+
+@lru_cache(maxsize=1024)
+def calendar_window(
+    dia_fechamento: int, dia_vencimento: int, mes: int, ano: int, months: int
+) -> tuple[tuple[int, int, date, date, date], ...]:
+    """Periodos (mes, ano, inicio, fim, vencimento) de `months` faturas a partir de mes/ano.
+
+    Depende so dos dias de fechamento/vencimento, entao cartoes com os mesmos
+    dias compartilham a entrada do LRU.
+    """
+    rows = []
+    for offset in range(months):
+        m, a = shift_month(mes, ano, offset)
+        start, end = _billing_period(dia_fechamento, m, a)
+        rows.append((m, a, start, end, _due_date(dia_vencimento, m, a)))
+    return tuple(rows)
+
+
+class _next_day(FunctionElement):
+    """Dia seguinte a uma coluna de data (fim exclusivo do periodo)."""
+
+    type = Date()
+    name = "next_day"
+    inherit_cache = True
+
+
+@compiles(_next_day)
+def _next_day_mysql(element, compiler, **kw):
+    return f"DATE_ADD({compiler.process(element.clauses, **kw)}, INTERVAL 1 DAY)"
+
+
+@compiles(_next_day, "sqlite")
+def _next_day_sqlite(element, compiler, **kw):
+    return f"date({compiler.process(element.clauses, **kw)}, '+1 day')"
+
+
+def _in_period(cal):
+    # Transacoes do cartao dentro do periodo (data_fim inclusiva, comparada como datetime);
+    # compras parceladas entram pelas parcelas alocadas (_allocated)
+    return and_(
+        Transaction.cartao_credito_id == cal.cartao_credito_id,
+        Transaction.data_transacao >= cal.data_inicio,
+        Transaction.data_transacao < _next_day(cal.data_fim),
+        Transaction.compra_parcelada_id.is_(None),
+    )
+
+
+def _allocated(cartao_col, mes_col, ano_col):
+    # Soma (subconsulta correlacionada) das parcelas alocadas a fatura cartao/mes/ano
+    return (
+        select(func.coalesce(func.sum(InstallmentAllocation.valor), 0))
+        .where(
+            and_(
+                InstallmentAllocation.cartao_credito_id == cartao_col,
+                InstallmentAllocation.ano_referencia == ano_col,
+                InstallmentAllocation.mes_referencia == mes_col,
+            )
+        )
+        .scalar_subquery()
+    )
+
+
+def calendar_reference(db: Session, card: CreditCard, when) -> tuple[int, int]:
+    """Fatura (mes, ano) cujo periodo no calendario do cartao contem `when`.
+
+    Fora da janela do calendario cai no calculo pelo dia de fechamento.
+    """
+    day = when.date() if hasattr(when, "date") else when
+    row = db.execute(
+        select(BillingCalendar.mes_referencia, BillingCalendar.ano_referencia).where(
+            and_(
+                BillingCalendar.cartao_credito_id == card.id,
+                BillingCalendar.data_inicio <= day,
+                BillingCalendar.data_fim >= day,
+            )
+        )
+    ).first()
+    if row is None:
+        return invoice_reference(card.dia_fechamento_fatura, day)
+    return row[0], row[1]
+
+
+def _window_start(months_back: int) -> tuple[int, int]:
+    today = date.today()
+    return shift_month(today.month, today.year, -months_back)
+
+
+def _insert_rows(db: Session, card: CreditCard, mes: int, ano: int, months: int) -> None:
+    window = calendar_window(card.dia_fechamento_fatura, card.dia_vencimento_fatura, mes, ano, months)
+    db.execute(
+        insert(BillingCalendar),
+        [
+            {
+                "cartao_credito_id": card.id,
+                "mes_referencia": m,
+                "ano_referencia": a,
+                "data_inicio": start,
+                "data_fim": end,
+                "data_vencimento": due,
+            }
+            for m, a, start, end, due in window
+        ],
+    )
+
+
+def sync_card_calendar(
+    db: Session,
+    card: CreditCard,
+    months_back: int = CALENDAR_MONTHS_BACK,
+    months_ahead: int = CALENDAR_MONTHS_AHEAD,
+) -> None:
+    """Regera, sem commit, a janela de calendario do cartao (ex.: apos mudar o fechamento)."""
+    db.execute(delete(BillingCalendar).where(BillingCalendar.cartao_credito_id == card.id))
+    mes, ano = _window_start(months_back)
+    _insert_rows(db, card, mes, ano, months_back + months_ahead + 1)
+
+
+def sync_all_calendars(db: Session) -> int:
+    """Avanca a janela de todos os cartoes (job mensal). Commit a cada bloco."""
+    count = 0
+    last_id = 0
+    while True:
+        cards = list(db.execute(
+            select(CreditCard).where(CreditCard.id > last_id).order_by(CreditCard.id).limit(SYNC_CHUNK_SIZE)
+        ).scalars())
+        if not cards:
+            break
+        last_id = cards[-1].id
+        for card in cards:
+            sync_card_calendar(db, card)
+        db.commit()
+        count += len(cards)
+    return count
+
+
+def sync_missing_calendars(db: Session) -> int:
+    """Gera o calendario dos cartoes cuja janela atual esta incompleta. Commit a cada bloco.
+
+    Cobre cartoes anteriores a tabela ou ao aumento da janela, para que as
+    leituras (historico, fechamento) nunca precisem escrever.
+    """
+    first_mes, first_ano = _window_start(CALENDAR_MONTHS_BACK)
+    last_mes, last_ano = shift_month(first_mes, first_ano, CALENDAR_MONTHS_BACK + CALENDAR_MONTHS_AHEAD)
+    rows = (
+        select(func.count())
+        .where(
+            and_(
+                BillingCalendar.cartao_credito_id == CreditCard.id,
+                tuple_(BillingCalendar.ano_referencia, BillingCalendar.mes_referencia) >= tuple_(first_ano, first_mes),
+                tuple_(BillingCalendar.ano_referencia, BillingCalendar.mes_referencia) <= tuple_(last_ano, last_mes),
+            )
+        )
+        .scalar_subquery()
+    )
+    stmt = select(CreditCard).where(rows < CALENDAR_MONTHS_BACK + CALENDAR_MONTHS_AHEAD + 1)
+    count = 0
+    last_id = 0
+    while True:
+        cards = list(db.execute(
+            stmt.where(CreditCard.id > last_id).order_by(CreditCard.id).limit(SYNC_CHUNK_SIZE)
+        ).scalars())
+        if not cards:
+            break
+        last_id = cards[-1].id
+        for card in cards:
+            sync_card_calendar(db, card)
+        db.commit()
+        count += len(cards)
+    return count
+
+
+def invoice_history(db: Session, card: CreditCard, months: int) -> list[dict]:
+    """Totais das ultimas `months` faturas do cartao (ate a atual) em uma unica consulta.
+
+    As transacoes sao agrupadas por periodo via join com CALENDARIO_FATURAS
+    (mais as parcelas alocadas), sem carregar linhas nem escrever nada: o
+    calendario e gerado na criacao/edicao do cartao e pelos jobs. Faturas ja existentes usam o
+    valor_total gravado (mantido incrementalmente ou congelado no fechamento).
+    """
+    today = date.today()
+    cur_mes, cur_ano = invoice_reference(card.dia_fechamento_fatura, today)
+    mes, ano = shift_month(cur_mes, cur_ano, -(months - 1))
+
+    cal = BillingCalendar
+    key = tuple_(cal.ano_referencia, cal.mes_referencia)
+    stmt = (
+        select(
+            cal.mes_referencia,
+            cal.ano_referencia,
+            cal.data_inicio,
+            cal.data_fim,
+            cal.data_vencimento,
+            CreditCardInvoice.id,
+            CreditCardInvoice.status,
+            CreditCardInvoice.valor_total,
+            func.coalesce(func.sum(Transaction.valor), 0)
+            + _allocated(cal.cartao_credito_id, cal.mes_referencia, cal.ano_referencia),
+        )
+        .select_from(cal)
+        .join(Transaction, _in_period(cal), isouter=True)
+        .join(
+            CreditCardInvoice,
+            and_(
+                CreditCardInvoice.cartao_credito_id == cal.cartao_credito_id,
+                CreditCardInvoice.mes_referencia == cal.mes_referencia,
+                CreditCardInvoice.ano_referencia == cal.ano_referencia,
+            ),
+            isouter=True,
+        )
+        .where(
+            and_(
+                cal.cartao_credito_id == card.id,
+                key >= tuple_(ano, mes),
+                key <= tuple_(cur_ano, cur_mes),
+            )
+        )
+        .group_by(
+            cal.ano_referencia,
+            cal.mes_referencia,
+            cal.data_inicio,
+            cal.data_fim,
+            cal.data_vencimento,
+            cal.cartao_credito_id,
+            CreditCardInvoice.id,
+            CreditCardInvoice.status,
+            CreditCardInvoice.valor_total,
+        )
+        .order_by(cal.ano_referencia.desc(), cal.mes_referencia.desc())
+    )
+    history = []
+    for m, a, inicio, fim, vencimento, fatura_id, status, stored, total in db.execute(stmt).all():
+        history.append({
+            "mes_referencia": m,
+            "ano_referencia": a,
+            "data_inicio": inicio,
+            "data_fim": fim,
+            "data_vencimento": vencimento,
+            "valor_total": stored if fatura_id else Decimal(str(total)),
+            "status": status if fatura_id else ("aberta" if fim >= today else "fechada"),
+            "fatura_id": fatura_id,
+        })
+    return history
+
+
+def close_due_invoices(db: Session, today: date | None = None) -> dict:
+    """Fecha em lote as faturas vencidas e cria as do periodo corrente (job diario).
+
+    1. Um UPDATE...JOIN sobre todos os cartoes: faturas abertas com
+       data_fechamento < hoje recebem o total somado das transacoes do periodo
+       (via CALENDARIO_FATURAS) mais as parcelas alocadas e passam a "fechada". Faturas fora da janela
+       do calendario mantem o total ja gravado.
+    2. Um INSERT...SELECT cria a fatura do periodo que contem hoje para todo
+       cartao que ainda nao a tem.
+
+    Faturas fechadas nao recebem mais deltas nem sao recalculadas nas leituras.
+    Como os comandos nao passam pelo flush do ORM, os usuarios afetados tem o
+    cache invalidado aqui.
+    """
+    today = today or date.today()
+    cal = BillingCalendar
+    due = aliased(CreditCardInvoice)
+
+    totals = (
+        select(
+            due.id.label("fatura_id"),
+            case(
+                (cal.cartao_credito_id.is_(None), due.valor_total),
+                else_=func.coalesce(func.sum(Transaction.valor), 0)
+                + _allocated(due.cartao_credito_id, due.mes_referencia, due.ano_referencia),
+            ).label("total"),
+        )
+        .select_from(due)
+        .join(
+            cal,
+            and_(
+                cal.cartao_credito_id == due.cartao_credito_id,
+                cal.mes_referencia == due.mes_referencia,
+                cal.ano_referencia == due.ano_referencia,
+            ),
+            isouter=True,
+        )
+        .join(Transaction, _in_period(cal), isouter=True)
+        .where(and_(due.status == "aberta", due.data_fechamento < today))
+        .group_by(
+            due.id,
+            due.valor_total,
+            due.cartao_credito_id,
+            due.mes_referencia,
+            due.ano_referencia,
+            cal.cartao_credito_id,
+        )
+        .subquery()
+    )
+    afetados = set(db.execute(
+        select(CreditCardInvoice.usuario_id)
+        .where(and_(CreditCardInvoice.status == "aberta", CreditCardInvoice.data_fechamento < today))
+        .distinct()
+    ).scalars())
+    fechadas = db.execute(
+        update(CreditCardInvoice)
+        .where(CreditCardInvoice.id == totals.c.fatura_id)
+        .values(valor_total=totals.c.total, status="fechada")
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    existing = exists().where(
+        and_(
+            CreditCardInvoice.cartao_credito_id == cal.cartao_credito_id,
+            CreditCardInvoice.mes_referencia == cal.mes_referencia,
+            CreditCardInvoice.ano_referencia == cal.ano_referencia,
+        )
+    )
+    current = (
+        select(
+            CreditCard.usuario_id,
+            cal.cartao_credito_id,
+            cal.mes_referencia,
+            cal.ano_referencia,
+            func.coalesce(func.sum(Transaction.valor), 0)
+            + _allocated(cal.cartao_credito_id, cal.mes_referencia, cal.ano_referencia),
+            literal("aberta"),
+            cal.data_fim,
+            cal.data_vencimento,
+        )
+        .select_from(cal)
+        .join(CreditCard, CreditCard.id == cal.cartao_credito_id)
+        .join(Transaction, _in_period(cal), isouter=True)
+        .where(and_(cal.data_inicio <= today, cal.data_fim >= today, ~existing))
+        .group_by(
+            CreditCard.usuario_id,
+            cal.cartao_credito_id,
+            cal.mes_referencia,
+            cal.ano_referencia,
+            cal.data_fim,
+            cal.data_vencimento,
+        )
+    )
+    afetados.update(db.execute(
+        select(CreditCard.usuario_id)
+        .select_from(cal)
+        .join(CreditCard, CreditCard.id == cal.cartao_credito_id)
+        .where(and_(cal.data_inicio <= today, cal.data_fim >= today, ~existing))
+        .distinct()
+    ).scalars())
+    criadas = db.execute(
+        insert(CreditCardInvoice)
+        .from_select(
+            [
+                "usuario_id",
+                "cartao_credito_id",
+                "mes_referencia",
+                "ano_referencia",
+                "valor_total",
+                "status",
+                "data_fechamento",
+                "data_vencimento",
+            ],
+            current,
+        )
+        # Outra execucao pode ter criado a mesma fatura (chave unica cartao/mes/ano)
+        .prefix_with("IGNORE", dialect="mysql")
+    ).rowcount
+    db.commit()
+    bump_data_version(*afetados)
+    logger.info("Fechamento de faturas: %s fechadas, %s criadas", fechadas, criadas)
+    return {"fechadas": fechadas, "criadas": criadas}
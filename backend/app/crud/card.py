@@ -1,9 +1,11 @@
 from decimal import Decimal
 
-from sqlalchemy import select
+from sqlalchemy import and_, exists, select, update
 from sqlalchemy.orm import Session
 
+from app.crud.billing_calendar import sync_card_calendar
 from app.models.card import CreditCard
+from app.models.invoice import CreditCardInvoice
 
 
 def create_card(
@@ -28,6 +30,8 @@ def create_card(
         cor=cor,
     )
     db.add(card)
+    db.flush()
+    sync_card_calendar(db, card)
     db.commit()
     db.refresh(card)
     return card
@@ -53,6 +57,9 @@ def update_card(
     ultimos_4_digitos: str | None = None,
     cor: str | None = None,
 ) -> CreditCard:
+    calendar_changed = (
+        dia_fechamento_fatura is not None and dia_fechamento_fatura != card.dia_fechamento_fatura
+    ) or (dia_vencimento_fatura is not None and dia_vencimento_fatura != card.dia_vencimento_fatura)
     if nome_cartao is not None:
         card.nome_cartao = nome_cartao
     if bandeira is not None:
@@ -68,6 +75,8 @@ def update_card(
     if cor is not None:
         card.cor = cor
     db.add(card)
+    if calendar_changed:
+        sync_card_calendar(db, card)
     db.commit()
     db.refresh(card)
     return card
@@ -78,3 +87,33 @@ def delete_card(db: Session, card: CreditCard) -> None:
     db.commit()
 
 
+
+
+def apply_limit_delta(
+    db: Session, cartao_credito_id: int, delta: Decimal, mes: int | None = None, ano: int | None = None
+) -> int:
+    """Soma `delta` ao limite_utilizado do cartao direto no banco, sem commit.
+
+    Com mes/ano segue a mesma regra de apply_invoice_delta: se a fatura do
+    periodo existe e nao esta aberta (fechada ou paga), o delta e ignorado,
+    pois o pagamento libera exatamente o valor_total congelado dela.
+    Retorna as linhas afetadas.
+    """
+    stmt = (
+        update(CreditCard)
+        .where(CreditCard.id == cartao_credito_id)
+        .values(limite_utilizado=CreditCard.limite_utilizado + Decimal(delta))
+        .execution_options(synchronize_session=False)
+    )
+    if mes is not None and ano is not None:
+        stmt = stmt.where(
+            ~exists().where(
+                and_(
+                    CreditCardInvoice.cartao_credito_id == cartao_credito_id,
+                    CreditCardInvoice.mes_referencia == mes,
+                    CreditCardInvoice.ano_referencia == ano,
+                    CreditCardInvoice.status != "aberta",
+                )
+            )
+        )
+    return db.execute(stmt).rowcount
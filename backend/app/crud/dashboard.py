@@ -0,0 +1,149 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.crud.daily_summary import rollup_period
+from app.models.account import BankAccount
+from app.models.category import Category
+from app.models.transaction import TipoTransacao
+
+
+# Widgets disponiveis em /dashboard/overview
+WIDGETS = (
+    "summary",
+    "balances_by_account",
+    "expenses_by_category",
+    "daily_flow",
+    "credit_cards_summary",
+    "categories",
+)
+
+
+GRANULARITIES = ("day", "week", "month")
+
+# Maior periodo (em dias) aceito por granularidade: limita o numero de baldes da serie
+MAX_SPAN_DAYS = {"day": 366, "week": 366 * 5, "month": 366 * 20}
+
+
+def month_window(today: date | None = None) -> tuple[date, date]:
+    """Janela padrao do dashboard: do dia 1 do mes atual ate hoje."""
+    today = today or date.today()
+    return today.replace(day=1), today
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    """Inicio do balde do dia: o proprio dia, a segunda-feira da semana ou o dia 1 do mes."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def bucket_range(start: date, end: date, granularity: str) -> list[date]:
+    """Todos os baldes entre start e end, para preencher a serie com zeros."""
+    buckets = []
+    current = bucket_start(start, granularity)
+    while current <= end:
+        buckets.append(current)
+        try:
+            if granularity == "week":
+                current += timedelta(days=7)
+            elif granularity == "month":
+                current = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+            else:
+                current += timedelta(days=1)
+        except (OverflowError, ValueError):
+            # Ultimo balde antes de date.max
+            break
+    return buckets
+
+
+def aggregate_period(
+    db: Session, usuario_id: int, start: date, end: date, tipo: str | None = None
+) -> list[tuple[date, str, int | None, Decimal]]:
+    """Totais do periodo agrupados por (dia, tipo, categoria), lidos do RESUMO_DIARIO.
+
+    Todos os widgets do dashboard (resumo, despesas por categoria, fluxo diario)
+    sao derivados dessas linhas, sem nova consulta e sem ler TRANSACOES.
+    """
+    return rollup_period(db, usuario_id, start, end, tipo=tipo)
+
+
+def summarize(rows) -> dict:
+    receita = Decimal("0")
+    despesa = Decimal("0")
+    for _, tipo, _, total in rows:
+        if tipo == TipoTransacao.RECEITA:
+            receita += total
+        elif tipo == TipoTransacao.DESPESA:
+            despesa += total
+    return {"receita_mes": str(receita), "despesa_mes": str(despesa), "saldo_mes": str(receita - despesa)}
+
+
+def category_names(db: Session, categoria_ids) -> dict[int, str]:
+    ids = {i for i in categoria_ids if i is not None}
+    if not ids:
+        return {}
+    return dict(db.execute(select(Category.id, Category.nome).where(Category.id.in_(ids))).tuples().all())
+
+
+def expenses_by_category(rows, names: dict[int, str]) -> list[dict]:
+    totals: dict[str, Decimal] = defaultdict(Decimal)
+    for _, tipo, categoria_id, total in rows:
+        if tipo == TipoTransacao.DESPESA:
+            totals[names.get(categoria_id) or "Sem categoria"] += total
+    ordered = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    return [{"categoria": nome, "total": str(total)} for nome, total in ordered]
+
+
+def daily_flow(
+    rows, start: date, end: date, granularity: str = "day", columnar: bool = False
+) -> list[dict] | dict[str, list]:
+    """Receitas e despesas por balde (dia, semana ou mes), com zeros nos baldes vazios.
+
+    `data` e o inicio do balde; as linhas diarias do resumo sao somadas em memoria.
+    Os acumulados (receitas, despesas e saldo) sao calculados na mesma passada.
+    Com `columnar`, devolve listas paralelas por campo em vez de uma lista de objetos.
+    """
+    buckets: dict[date, list[Decimal]] = {
+        b: [Decimal("0"), Decimal("0")] for b in bucket_range(start, end, granularity)
+    }
+    for day, tipo, _, total in rows:
+        bucket = buckets.get(bucket_start(day, granularity))
+        if bucket is None:
+            continue
+        if tipo == TipoTransacao.RECEITA:
+            bucket[0] += total
+        elif tipo == TipoTransacao.DESPESA:
+            bucket[1] += total
+    fields = (
+        "data",
+        "receitas",
+        "despesas",
+        "receitas_acumuladas",
+        "despesas_acumuladas",
+        "saldo_acumulado",
+    )
+    series: dict[str, list] = {field: [] for field in fields}
+    receitas_acc = Decimal("0")
+    despesas_acc = Decimal("0")
+    for day, (receitas, despesas) in buckets.items():
+        receitas_acc += receitas
+        despesas_acc += despesas
+        values = (day, receitas, despesas, receitas_acc, despesas_acc, receitas_acc - despesas_acc)
+        for field, value in zip(fields, values):
+            series[field].append(value.isoformat() if field == "data" else str(value))
+    if columnar:
+        return series
+    return [dict(zip(fields, values)) for values in zip(*series.values())]
+
+
+def balances_by_account(db: Session, usuario_id: int) -> list[dict]:
+    rows = db.execute(
+        select(BankAccount.id, BankAccount.nome_banco, BankAccount.saldo_atual).where(BankAccount.usuario_id == usuario_id)
+    ).all()
+    return [{"id": r[0], "nome_banco": r[1], "saldo_atual": str(r[2] or 0)} for r in rows]
@@ -1,10 +1,30 @@
-from datetime import date
+import calendar
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
 
-from sqlalchemy import and_, select
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.crud.transaction import create_transaction
+from app.crud.account import apply_balance_delta
+from app.crud.card import apply_limit_delta
+from app.crud.invoice import apply_invoice_delta, invoice_reference
+from app.crud.transaction import bulk_insert_transactions
+from app.models.card import CreditCard
 from app.models.fixed_expense import FixedExpense
+from app.models.transaction import TipoTransacao, Transaction
+from app.services.cache import bump_data_version
+
+
+logger = logging.getLogger(__name__)
+
+RUN_CHUNK_SIZE = 1000
+# Tentativas de um bloco que conflitou com lancamentos de outro processo
+RUN_CONFLICT_RETRIES = 3
+# Maior janela (em dias) de GET /fixed-expenses/upcoming
+UPCOMING_MAX_DAYS = 366
 
 
 def list_fixed_expenses(db: Session, usuario_id: int) -> list[FixedExpense]:
@@ -42,10 +62,16 @@ def create_fixed_expense(
     return fx
 
 
+# Campos que mudam as datas de vencimento: a proxima ocorrencia e recalculada pelo job
+_SCHEDULE_FIELDS = {"dia_vencimento", "data_inicio", "data_fim", "status"}
+
+
 def update_fixed_expense(db: Session, fx: FixedExpense, **fields) -> FixedExpense:
     for k, v in fields.items():
         if hasattr(fx, k) and v is not None:
             setattr(fx, k, v)
+            if k in _SCHEDULE_FIELDS:
+                fx.proximo_vencimento = None
     db.add(fx)
     db.commit()
     db.refresh(fx)
@@ -57,38 +83,256 @@ def delete_fixed_expense(db: Session, fx: FixedExpense) -> None:
     db.commit()
 
 
-def run_fixed_expenses_for_date(db: Session, usuario_id: int, run_date: date) -> int:
-    # Lança transações para todos os gastos fixos ativos no dia informado
-    stmt = select(FixedExpense).where(
-        (FixedExpense.usuario_id == usuario_id)
-        & (FixedExpense.status == "Ativo")
-        & (FixedExpense.dia_vencimento == run_date.day)
+def fixed_expense_occurrences(dia_vencimento: int, start: date, end: date) -> list[date]:
+    """Datas de vencimento mensais entre `start` e `end` (inclusive).
+
+    Em meses sem o dia (29, 30, 31) o vencimento cai no ultimo dia do mes.
+    """
+    occurrences = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        day = min(dia_vencimento, calendar.monthrange(year, month)[1])
+        due = date(year, month, day)
+        if start <= due <= end:
+            occurrences.append(due)
+        if month == 12:
+            year, month = year + 1, 1
+        else:
+            month += 1
+    return occurrences
+
+
+def due_days_in_window(start: date, end: date) -> list[int] | None:
+    """Valores de dia_vencimento com ao menos um vencimento entre start e end.
+
+    None quando a janela cobre todos os dias (1 a 31), para nao filtrar.
+    """
+    days = [d for d in range(1, 32) if fixed_expense_occurrences(d, start, end)]
+    return None if len(days) == 31 else days
+
+
+def upcoming_fixed_expenses(db: Session, usuario_id: int, start: date, end: date) -> list[dict]:
+    """Todos os vencimentos de gastos ativos com lembrete entre start e end (inclusive).
+
+    O filtro (usuario, status, lembrete, vigencia e dias do mes possiveis na
+    janela) roda no banco; cada gasto gera uma linha por ocorrencia, respeitando
+    data_inicio/data_fim. Ordenado por vencimento, com total acumulado.
+    """
+    conditions = [
+        FixedExpense.usuario_id == usuario_id,
+        FixedExpense.status == "Ativo",
+        FixedExpense.lembrete_ativado.is_(True),
+        FixedExpense.data_inicio <= end,
+        or_(FixedExpense.data_fim.is_(None), FixedExpense.data_fim >= start),
+    ]
+    days = due_days_in_window(start, end)
+    if days is not None:
+        conditions.append(FixedExpense.dia_vencimento.in_(days))
+    rows = db.execute(
+        select(
+            FixedExpense.id,
+            FixedExpense.descricao,
+            FixedExpense.valor,
+            FixedExpense.dia_vencimento,
+            FixedExpense.data_inicio,
+            FixedExpense.data_fim,
+        ).where(and_(*conditions))
+    ).all()
+
+    occurrences = []
+    for fx_id, descricao, valor, dia, data_inicio, data_fim in rows:
+        window_end = min(end, data_fim) if data_fim else end
+        for due in fixed_expense_occurrences(dia, max(start, data_inicio), window_end):
+            occurrences.append((due, fx_id, descricao, valor))
+    occurrences.sort(key=lambda o: (o[0], o[1]))
+
+    items = []
+    acumulado = Decimal("0")
+    for due, fx_id, descricao, valor in occurrences:
+        acumulado += valor
+        items.append({
+            "id": fx_id,
+            "descricao": descricao,
+            "valor": str(valor),
+            "vencimento": due.isoformat(),
+            "acumulado": str(acumulado),
+        })
+    return items
+
+
+def next_occurrence(dia_vencimento: int, after: date) -> date:
+    """Primeiro vencimento estritamente posterior a `after`."""
+    return fixed_expense_occurrences(dia_vencimento, after + timedelta(days=1), after + timedelta(days=62))[0]
+
+
+def _launched_occurrences(db: Session, pending: dict[int, list[date]]) -> set[tuple[int, date]]:
+    # Ocorrencias ja lancadas (execucao repetida ou concorrente)
+    existing = db.execute(
+        select(Transaction.gasto_fixo_id, Transaction.data_transacao).where(
+            Transaction.gasto_fixo_id.in_(pending.keys())
+            & (Transaction.data_transacao >= datetime.combine(min(min(o) for o in pending.values()), time.min))
+        )
+    ).tuples()
+    return {(gasto_id, value.date() if isinstance(value, datetime) else value) for gasto_id, value in existing}
+
+
+def run_due_fixed_expenses(
+    db: Session,
+    run_date: date,
+    usuario_id: int | None = None,
+    partition: tuple[int, int] | None = None,
+    chunk_size: int = RUN_CHUNK_SIZE,
+) -> int:
+    """Lanca em lote todas as ocorrencias pendentes de gastos fixos ate `run_date`.
+
+    Para cada gasto calcula os vencimentos entre `ultimo_lancamento` e
+    `run_date`, entao dias sem execucao (servidor parado) e meses curtos sao
+    recuperados. Sem `ultimo_lancamento` a recuperacao comeca no mes de
+    `run_date` (ou em `data_inicio`, se posterior). So entram gastos com
+    `proximo_vencimento` ate `run_date` (ou NULL, apos mudar o agendamento);
+    o job grava a proxima ocorrencia de cada gasto processado. Uma unica
+    consulta (paginada por id) busca os gastos de todos os usuarios; cada
+    bloco vira um INSERT em lote, um UPDATE de saldo por conta, um por fatura
+    afetada e um commit. A chave unica (gasto_fixo_id, data_transacao) torna a
+    execucao idempotente: em conflito o bloco e refeito sem as ocorrencias
+    que outro processo ja lancou.
+    Com `partition=(k, n)` processa so usuarios com usuario_id % n == k.
+    Retorna o numero de transacoes lancadas.
+    """
+    stmt = select(
+        FixedExpense.id,
+        FixedExpense.usuario_id,
+        FixedExpense.descricao,
+        FixedExpense.valor,
+        FixedExpense.categoria_id,
+        FixedExpense.conta_bancaria_id,
+        FixedExpense.cartao_credito_id,
+        FixedExpense.dia_vencimento,
+        FixedExpense.data_inicio,
+        FixedExpense.data_fim,
+        FixedExpense.ultimo_lancamento,
+    ).where(
+        (FixedExpense.status == "Ativo")
         & (FixedExpense.data_inicio <= run_date)
-        & ((FixedExpense.data_fim.is_(None)) | (FixedExpense.data_fim >= run_date))
+        & (FixedExpense.proximo_vencimento.is_(None) | (FixedExpense.proximo_vencimento <= run_date))
+        & (
+            FixedExpense.data_fim.is_(None)
+            | FixedExpense.proximo_vencimento.is_(None)
+            | (FixedExpense.data_fim >= FixedExpense.proximo_vencimento)
+        )
     )
-    gastos = list(db.execute(stmt).scalars().all())
+    if usuario_id is not None:
+        stmt = stmt.where(FixedExpense.usuario_id == usuario_id)
+    if partition is not None:
+        index, total = partition
+        if total > 1:
+            stmt = stmt.where(FixedExpense.usuario_id % total == index)
+
     count = 0
-    for g in gastos:
-        # Evita duplicar no mesmo dia
-        if getattr(g, "ultimo_lancamento", None) == run_date:
+    last_id = 0
+    while True:
+        gastos = db.execute(stmt.where(FixedExpense.id > last_id).order_by(FixedExpense.id).limit(chunk_size)).all()
+        if not gastos:
+            break
+        last_id = gastos[-1].id
+
+        pending: dict[int, list[date]] = {}
+        upcoming: dict[date, list[int]] = defaultdict(list)
+        for g in gastos:
+            start = g.data_inicio
+            if g.ultimo_lancamento is None:
+                # Sem marcador (gastos anteriores a recuperacao): so o mes corrente,
+                # para nao lancar de uma vez todos os meses desde data_inicio
+                start = max(start, run_date.replace(day=1))
+            elif g.ultimo_lancamento >= start:
+                start = g.ultimo_lancamento + timedelta(days=1)
+            end = min(run_date, g.data_fim) if g.data_fim else run_date
+            occurrences = fixed_expense_occurrences(g.dia_vencimento, start, end) if start <= end else []
+            if occurrences:
+                pending[g.id] = occurrences
+            upcoming[next_occurrence(g.dia_vencimento, max(run_date, start - timedelta(days=1)))].append(g.id)
+
+        rows: list[dict] = []
+        for _ in range(RUN_CONFLICT_RETRIES):
+            existing = _launched_occurrences(db, pending) if pending else set()
+            balance_deltas: dict[tuple[int, int], Decimal] = defaultdict(Decimal)
+            card_deltas: dict[tuple[int, int, date], Decimal] = defaultdict(Decimal)
+            launched: dict[date, list[int]] = defaultdict(list)
+            rows = []
+            for g in gastos:
+                occurrences = pending.get(g.id)
+                if not occurrences:
+                    continue
+                for due in occurrences:
+                    if (g.id, due) in existing:
+                        continue
+                    rows.append({
+                        "usuario_id": g.usuario_id,
+                        "tipo": TipoTransacao.DESPESA,
+                        "valor": g.valor,
+                        "data_transacao": datetime.combine(due, time.min),
+                        "descricao": g.descricao,
+                        "categoria_id": g.categoria_id,
+                        "conta_bancaria_id": g.conta_bancaria_id,
+                        "cartao_credito_id": g.cartao_credito_id,
+                        "eh_gasto_fixo": True,
+                        "gasto_fixo_id": g.id,
+                    })
+                    if g.conta_bancaria_id:
+                        balance_deltas[(g.usuario_id, g.conta_bancaria_id)] -= g.valor
+                    if g.cartao_credito_id:
+                        card_deltas[(g.usuario_id, g.cartao_credito_id, due)] += g.valor
+                launched[occurrences[-1]].append(g.id)
+            try:
+                bulk_insert_transactions(db, rows)
+                break
+            except IntegrityError:
+                # Outro processo lancou parte das ocorrencias: rele as existentes e refaz o bloco
+                db.rollback()
+        else:
+            logger.warning("Conflito ao lancar gastos fixos (ids %s-%s); bloco ignorado", gastos[0].id, last_id)
             continue
-        create_transaction(
-            db,
-            usuario_id=g.usuario_id,
-            tipo="Despesa",
-            valor=g.valor,
-            data_transacao=run_date,
-            descricao=g.descricao,
-            categoria_id=g.categoria_id,
-            conta_bancaria_id=g.conta_bancaria_id,
-            cartao_credito_id=g.cartao_credito_id,
-        )
-        # Atualiza marcador de último lançamento para evitar duplicações
-        if hasattr(g, "ultimo_lancamento"):
-            g.ultimo_lancamento = run_date
-        db.add(g)
+
+        for (owner_id, conta_id), delta in balance_deltas.items():
+            apply_balance_delta(db, conta_id, delta, usuario_id=owner_id)
+        if card_deltas:
+            # Cartao de outro usuario (id invalido no gasto) nao recebe delta
+            fechamento = {
+                (owner_id, card_id): dia
+                for card_id, owner_id, dia in db.execute(
+                    select(CreditCard.id, CreditCard.usuario_id, CreditCard.dia_fechamento_fatura)
+                    .where(CreditCard.id.in_({card_id for _, card_id, _ in card_deltas}))
+                ).tuples().all()
+            }
+            invoice_deltas: dict[tuple[int, int, int], Decimal] = defaultdict(Decimal)
+            for (owner_id, card_id, due), delta in card_deltas.items():
+                if (owner_id, card_id) in fechamento:
+                    invoice_deltas[(card_id, *invoice_reference(fechamento[(owner_id, card_id)], due))] += delta
+            for (card_id, mes, ano), delta in invoice_deltas.items():
+                apply_invoice_delta(db, card_id, mes, ano, delta)
+                apply_limit_delta(db, card_id, delta, mes, ano)
+        # Atualiza marcadores (um UPDATE por data distinta)
+        for last_due, ids in launched.items():
+            db.execute(
+                update(FixedExpense)
+                .where(FixedExpense.id.in_(ids))
+                .values(ultimo_lancamento=last_due)
+                .execution_options(synchronize_session=False)
+            )
+        for next_due, ids in upcoming.items():
+            db.execute(
+                update(FixedExpense)
+                .where(FixedExpense.id.in_(ids))
+                .values(proximo_vencimento=next_due)
+                .execution_options(synchronize_session=False)
+            )
         db.commit()
-        count += 1
+        if rows:
+            bump_data_version(*(row["usuario_id"] for row in rows))
+        count += len(rows)
     return count
 
 
+def run_fixed_expenses_for_date(db: Session, usuario_id: int, run_date: date) -> int:
+    # Lança (e recupera) as ocorrências pendentes dos gastos fixos do usuário até o dia informado
+    return run_due_fixed_expenses(db, run_date, usuario_id=usuario_id)
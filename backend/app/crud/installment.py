@@ -0,0 +1,176 @@
+from collections import defaultdict
+from datetime import datetime
+from decimal import ROUND_DOWN, Decimal
+
+from sqlalchemy import and_, insert, select
+from sqlalchemy.orm import Session, selectinload
+
+from app.crud.billing_calendar import calendar_reference, shift_month
+from app.crud.card import apply_limit_delta
+from app.crud.daily_summary import apply_rollup_deltas, rollup_deltas
+from app.crud.invoice import apply_invoice_delta
+from app.models.card import CreditCard
+from app.models.installment import InstallmentAllocation, InstallmentPurchase
+from app.models.transaction import Transaction, TipoTransacao
+
+
+MIN_INSTALLMENT = Decimal("0.01")
+
+
+def installment_schedule(
+    valor_total: Decimal, numero_parcelas: int, mes: int, ano: int
+) -> list[tuple[int, int, int, Decimal]]:
+    """Parcelas (numero, mes, ano, valor) de uma compra cuja primeira parcela cai em mes/ano.
+
+    As seguintes caem nos meses subsequentes. Os centavos que sobram da
+    divisao vao para a primeira parcela; parcelas abaixo de R$ 0,01 geram ValueError.
+    """
+    valor_total = Decimal(valor_total)
+    parcela = (valor_total / numero_parcelas).quantize(Decimal("0.01"), rounding=ROUND_DOWN)
+    if parcela < MIN_INSTALLMENT:
+        raise ValueError("Valor total insuficiente para o numero de parcelas")
+    primeira = valor_total - parcela * (numero_parcelas - 1)
+    schedule = []
+    for numero in range(1, numero_parcelas + 1):
+        m, a = shift_month(mes, ano, numero - 1)
+        schedule.append((numero, m, a, primeira if numero == 1 else parcela))
+    return schedule
+
+
+def create_installment_purchase(
+    db: Session,
+    usuario_id: int,
+    card: CreditCard,
+    valor_total: Decimal,
+    numero_parcelas: int,
+    data_compra: datetime,
+    descricao: str | None = None,
+    categoria_id: int | None = None,
+) -> InstallmentPurchase:
+    """Registra a compra e aloca todas as parcelas as faturas em um INSERT em lote.
+
+    A primeira parcela cai na fatura cujo periodo no calendario contem a data
+    da compra. Faturas abertas ja existentes recebem o valor da parcela como
+    delta; as demais somam as parcelas quando forem criadas. O limite utilizado
+    do cartao cresce pelo valor total (parcelas futuras comprometem limite).
+    A compra tambem entra em TRANSACOES/RESUMO_DIARIO pelo valor total na data
+    da compra (vinculada via compra_parcelada_id, fora da soma da fatura).
+    """
+    mes, ano = calendar_reference(db, card, data_compra)
+    schedule = installment_schedule(valor_total, numero_parcelas, mes, ano)
+    purchase = InstallmentPurchase(
+        usuario_id=usuario_id,
+        cartao_credito_id=card.id,
+        categoria_id=categoria_id,
+        descricao=descricao,
+        valor_total=valor_total,
+        numero_parcelas=numero_parcelas,
+        data_compra=data_compra,
+    )
+    db.add(purchase)
+    db.flush()
+
+    tx = Transaction(
+        usuario_id=usuario_id,
+        tipo=TipoTransacao.DESPESA,
+        valor=valor_total,
+        descricao=descricao,
+        data_transacao=data_compra,
+        categoria_id=categoria_id,
+        cartao_credito_id=card.id,
+        compra_parcelada_id=purchase.id,
+    )
+    db.add(tx)
+    apply_rollup_deltas(db, rollup_deltas([tx]))
+    db.execute(
+        insert(InstallmentAllocation),
+        [
+            {
+                "compra_id": purchase.id,
+                "cartao_credito_id": card.id,
+                "numero_parcela": numero,
+                "mes_referencia": mes,
+                "ano_referencia": ano,
+                "valor": valor,
+            }
+            for numero, mes, ano, valor in schedule
+        ],
+    )
+    for _, mes, ano, valor in schedule:
+        apply_invoice_delta(db, card.id, mes, ano, valor)
+        apply_limit_delta(db, card.id, valor, mes, ano)
+    db.commit()
+    db.refresh(purchase)
+    return purchase
+
+
+def list_installment_purchases(db: Session, cartao_credito_id: int, usuario_id: int) -> list[InstallmentPurchase]:
+    stmt = (
+        select(InstallmentPurchase)
+        .where(
+            and_(
+                InstallmentPurchase.cartao_credito_id == cartao_credito_id,
+                InstallmentPurchase.usuario_id == usuario_id,
+            )
+        )
+        .options(selectinload(InstallmentPurchase.parcelas))
+        .order_by(InstallmentPurchase.data_compra.desc(), InstallmentPurchase.id.desc())
+    )
+    return list(db.execute(stmt).scalars().all())
+
+
+def get_installment_purchase(db: Session, compra_id: int) -> InstallmentPurchase | None:
+    return db.get(InstallmentPurchase, compra_id)
+
+
+def delete_installment_purchase(db: Session, purchase: InstallmentPurchase) -> None:
+    """Remove a compra e estorna as parcelas das faturas ainda abertas e do limite nao pago.
+
+    A transacao vinculada sai de TRANSACOES e do RESUMO_DIARIO.
+    """
+    linked = list(
+        db.execute(select(Transaction).where(Transaction.compra_parcelada_id == purchase.id)).scalars().all()
+    )
+    apply_rollup_deltas(db, rollup_deltas(linked, sign=-1))
+    for tx in linked:
+        db.delete(tx)
+    deltas: dict[tuple[int, int], Decimal] = defaultdict(Decimal)
+    for parcela in purchase.parcelas:
+        deltas[(parcela.mes_referencia, parcela.ano_referencia)] -= parcela.valor
+    for (mes, ano), delta in deltas.items():
+        apply_invoice_delta(db, purchase.cartao_credito_id, mes, ano, delta)
+        apply_limit_delta(db, purchase.cartao_credito_id, delta, mes, ano)
+    db.delete(purchase)
+    db.commit()
+
+
+def get_invoice_installments(db: Session, cartao_credito_id: int, mes: int, ano: int) -> list[dict]:
+    """Parcelas que compoem a fatura mes/ano do cartao."""
+    stmt = (
+        select(
+            InstallmentAllocation.compra_id,
+            InstallmentPurchase.descricao,
+            InstallmentAllocation.numero_parcela,
+            InstallmentPurchase.numero_parcelas,
+            InstallmentAllocation.valor,
+        )
+        .join(InstallmentPurchase, InstallmentPurchase.id == InstallmentAllocation.compra_id)
+        .where(
+            and_(
+                InstallmentAllocation.cartao_credito_id == cartao_credito_id,
+                InstallmentAllocation.ano_referencia == ano,
+                InstallmentAllocation.mes_referencia == mes,
+            )
+        )
+        .order_by(InstallmentAllocation.compra_id)
+    )
+    return [
+        {
+            "compra_id": compra_id,
+            "descricao": descricao,
+            "numero_parcela": numero,
+            "numero_parcelas": total,
+            "valor": valor,
+        }
+        for compra_id, descricao, numero, total, valor in db.execute(stmt).all()
+    ]
@@ -1,16 +1,25 @@
 import calendar
+import logging
 from datetime import date, datetime
 from decimal import Decimal
+from functools import lru_cache
 
-from sqlalchemy import and_, func, select
+from sqlalchemy import and_, case, func, or_, select, tuple_, update
 from sqlalchemy.orm import Session
 
-from app.crud.account import apply_balance_delta, get_account
+from app.crud.account import apply_balance_delta
 from app.models.card import CreditCard
+from app.models.installment import InstallmentAllocation
 from app.models.invoice import CreditCardInvoice
 from app.models.transaction import Transaction
 
 
+logger = logging.getLogger(__name__)
+
+VERIFY_CHUNK_SIZE = 500
+
+
+@lru_cache(maxsize=4096)
 def _billing_period(dia_fechamento: int, mes: int, ano: int) -> tuple[date, date]:
     """Calcula o periodo de faturamento para um mes/ano de referencia.
 
@@ -42,6 +51,7 @@ def _billing_period(dia_fechamento: int, mes: int, ano: int) -> tuple[date, date
     return start_date, end_date
 
 
+@lru_cache(maxsize=4096)
 def _due_date(dia_vencimento: int, mes: int, ano: int) -> date:
     """Calcula a data de vencimento da fatura.
 
@@ -59,19 +69,100 @@ def _due_date(dia_vencimento: int, mes: int, ano: int) -> date:
     return date(next_year, next_month, dia)
 
 
+def invoice_reference(dia_fechamento: int, when) -> tuple[int, int]:
+    """Mes/ano de referencia da fatura em que cai uma compra feita em `when`."""
+    d = when.date() if isinstance(when, datetime) else when
+    last_day = calendar.monthrange(d.year, d.month)[1]
+    if d.day <= min(dia_fechamento, last_day):
+        return d.month, d.year
+    if d.month == 12:
+        return 1, d.year + 1
+    return d.month + 1, d.year
+
+
 def compute_invoice_total(
     db: Session, cartao_credito_id: int, start_date: date, end_date: date
 ) -> Decimal:
-    """Soma transacoes vinculadas ao cartao no periodo de faturamento."""
+    """Soma transacoes vinculadas ao cartao no periodo de faturamento e as parcelas alocadas a ele.
+
+    O fim do periodo cai sempre no mes de referencia da fatura.
+    """
     stmt = select(func.coalesce(func.sum(Transaction.valor), 0)).where(
         and_(
             Transaction.cartao_credito_id == cartao_credito_id,
             Transaction.data_transacao >= datetime.combine(start_date, datetime.min.time()),
             Transaction.data_transacao <= datetime.combine(end_date, datetime.max.time()),
+            Transaction.compra_parcelada_id.is_(None),
         )
     )
     total = db.execute(stmt).scalar_one()
-    return Decimal(str(total))
+    parcelas = installment_totals(db, [cartao_credito_id], end_date.month, end_date.year)
+    return Decimal(str(total)) + parcelas.get(cartao_credito_id, Decimal("0.00"))
+
+
+def installment_totals(db: Session, card_ids: list[int], mes: int, ano: int) -> dict[int, Decimal]:
+    """Soma das parcelas alocadas a fatura mes/ano de cada cartao (indice cartao/ano/mes)."""
+    if not card_ids:
+        return {}
+    stmt = (
+        select(InstallmentAllocation.cartao_credito_id, func.sum(InstallmentAllocation.valor))
+        .where(
+            and_(
+                InstallmentAllocation.cartao_credito_id.in_(card_ids),
+                InstallmentAllocation.ano_referencia == ano,
+                InstallmentAllocation.mes_referencia == mes,
+            )
+        )
+        .group_by(InstallmentAllocation.cartao_credito_id)
+    )
+    return {card_id: Decimal(str(total)) for card_id, total in db.execute(stmt).all()}
+
+
+def future_installment_totals(db: Session, card_ids: list[int], mes: int, ano: int) -> dict[int, Decimal]:
+    """Limite comprometido: parcelas alocadas a faturas posteriores a mes/ano, por cartao."""
+    if not card_ids:
+        return {}
+    stmt = (
+        select(InstallmentAllocation.cartao_credito_id, func.sum(InstallmentAllocation.valor))
+        .where(
+            and_(
+                InstallmentAllocation.cartao_credito_id.in_(card_ids),
+                tuple_(InstallmentAllocation.ano_referencia, InstallmentAllocation.mes_referencia) > tuple_(ano, mes),
+            )
+        )
+        .group_by(InstallmentAllocation.cartao_credito_id)
+    )
+    return {card_id: Decimal(str(total)) for card_id, total in db.execute(stmt).all()}
+
+
+def period_totals(db: Session, cards: list[CreditCard], mes: int, ano: int) -> dict[int, Decimal]:
+    """Soma o periodo de faturamento (mes/ano) de varios cartoes em uma consulta agrupada.
+
+    Cada cartao tem seus proprios limites de periodo; todos entram no mesmo
+    SELECT ... GROUP BY cartao_credito_id, usando o indice (cartao, data).
+    """
+    if not cards:
+        return {}
+    bounds = []
+    for card in cards:
+        start, end = _billing_period(card.dia_fechamento_fatura, mes, ano)
+        bounds.append(
+            and_(
+                Transaction.cartao_credito_id == card.id,
+                Transaction.data_transacao >= datetime.combine(start, datetime.min.time()),
+                Transaction.data_transacao <= datetime.combine(end, datetime.max.time()),
+                Transaction.compra_parcelada_id.is_(None),
+            )
+        )
+    stmt = (
+        select(Transaction.cartao_credito_id, func.coalesce(func.sum(Transaction.valor), 0))
+        .where(or_(*bounds))
+        .group_by(Transaction.cartao_credito_id)
+    )
+    totals = {card_id: Decimal(str(total)) for card_id, total in db.execute(stmt).all()}
+    for card_id, parcelas in installment_totals(db, [card.id for card in cards], mes, ano).items():
+        totals[card_id] = totals.get(card_id, Decimal("0.00")) + parcelas
+    return totals
 
 
 def get_or_create_invoice(
@@ -125,6 +216,112 @@ def recalculate_invoice(db: Session, invoice: CreditCardInvoice) -> CreditCardIn
     return invoice
 
 
+def apply_invoice_delta(db: Session, cartao_credito_id: int, mes: int, ano: int, delta: Decimal) -> int:
+    """Soma `delta` ao valor_total da fatura aberta do periodo, sem commit.
+
+    Mantem o total incrementalmente nas escritas de transacoes, na mesma
+    transacao do banco. Se a fatura ainda nao existe nada e feito: ela sera
+    calculada por completo quando for criada.
+    """
+    stmt = (
+        update(CreditCardInvoice)
+        .where(
+            and_(
+                CreditCardInvoice.cartao_credito_id == cartao_credito_id,
+                CreditCardInvoice.mes_referencia == mes,
+                CreditCardInvoice.ano_referencia == ano,
+                CreditCardInvoice.status == "aberta",
+            )
+        )
+        .values(valor_total=CreditCardInvoice.valor_total + Decimal(delta))
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).rowcount
+
+
+def verify_invoice_totals(db: Session, corrigir: bool = True) -> list[dict]:
+    """Soma novamente as faturas abertas e reporta as que divergem do valor mantido.
+
+    Processa blocos de faturas com uma consulta agrupada por bloco (CASE por
+    periodo). Com `corrigir`, grava o valor recalculado nas divergentes.
+    """
+    drifts: list[dict] = []
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(CreditCardInvoice, CreditCard.dia_fechamento_fatura)
+            .join(CreditCard, CreditCard.id == CreditCardInvoice.cartao_credito_id)
+            .where(and_(CreditCardInvoice.status == "aberta", CreditCardInvoice.id > last_id))
+            .order_by(CreditCardInvoice.id)
+            .limit(VERIFY_CHUNK_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1][0].id
+
+        whens = []
+        for invoice, dia_fechamento in rows:
+            start, end = _billing_period(dia_fechamento, invoice.mes_referencia, invoice.ano_referencia)
+            whens.append((
+                and_(
+                    Transaction.cartao_credito_id == invoice.cartao_credito_id,
+                    Transaction.data_transacao >= datetime.combine(start, datetime.min.time()),
+                    Transaction.data_transacao <= datetime.combine(end, datetime.max.time()),
+                    Transaction.compra_parcelada_id.is_(None),
+                ),
+                invoice.id,
+            ))
+        invoice_id = case(*whens, else_=None).label("fatura_id")
+        stmt = (
+            select(invoice_id, func.coalesce(func.sum(Transaction.valor), 0))
+            .where(or_(*[condition for condition, _ in whens]))
+            .group_by(invoice_id)
+        )
+        actual = {fatura_id: Decimal(str(total)) for fatura_id, total in db.execute(stmt).all()}
+
+        # Parcelas alocadas as faturas do bloco
+        by_period = {
+            (invoice.cartao_credito_id, invoice.ano_referencia, invoice.mes_referencia): invoice.id
+            for invoice, _ in rows
+        }
+        period = tuple_(
+            InstallmentAllocation.cartao_credito_id,
+            InstallmentAllocation.ano_referencia,
+            InstallmentAllocation.mes_referencia,
+        )
+        parcelas = db.execute(
+            select(
+                InstallmentAllocation.cartao_credito_id,
+                InstallmentAllocation.ano_referencia,
+                InstallmentAllocation.mes_referencia,
+                func.sum(InstallmentAllocation.valor),
+            )
+            .where(period.in_(list(by_period)))
+            .group_by(
+                InstallmentAllocation.cartao_credito_id,
+                InstallmentAllocation.ano_referencia,
+                InstallmentAllocation.mes_referencia,
+            )
+        ).all()
+        for card_id, ano, mes, total in parcelas:
+            fatura_id = by_period[(card_id, ano, mes)]
+            actual[fatura_id] = actual.get(fatura_id, Decimal("0.00")) + Decimal(str(total))
+
+        for invoice, _ in rows:
+            expected = actual.get(invoice.id, Decimal("0.00"))
+            if expected != invoice.valor_total:
+                drifts.append({"fatura_id": invoice.id, "valor_total": invoice.valor_total, "valor_calculado": expected})
+                logger.warning(
+                    "Fatura %s divergente: mantido=%s calculado=%s", invoice.id, invoice.valor_total, expected
+                )
+                if corrigir:
+                    invoice.valor_total = expected
+                    db.add(invoice)
+        if corrigir:
+            db.commit()
+    return drifts
+
+
 def list_invoices(
     db: Session, cartao_credito_id: int, usuario_id: int
 ) -> list[CreditCardInvoice]:
@@ -149,19 +346,18 @@ def get_invoice(db: Session, invoice_id: int) -> CreditCardInvoice | None:
 def pay_invoice(
     db: Session, invoice: CreditCardInvoice, conta_pagamento_id: int
 ) -> CreditCardInvoice:
-    """Marca fatura como paga e debita a conta bancaria."""
-    account = get_account(db, conta_pagamento_id)
-    if not account:
+    """Marca fatura como paga, debita a conta bancaria e libera o limite do cartao."""
+    from app.crud.card import apply_limit_delta
+
+    # Debitar valor da conta bancaria (a conta precisa ser do dono da fatura)
+    if not apply_balance_delta(db, conta_pagamento_id, -invoice.valor_total, usuario_id=invoice.usuario_id):
         raise ValueError("Conta bancaria nao encontrada")
+    apply_limit_delta(db, invoice.cartao_credito_id, -invoice.valor_total)
 
     invoice.status = "paga"
     invoice.data_pagamento = datetime.now()
     invoice.conta_pagamento_id = conta_pagamento_id
     db.add(invoice)
-
-    # Debitar valor da conta bancaria
-    apply_balance_delta(db, account, -invoice.valor_total)
-
     db.commit()
     db.refresh(invoice)
     return invoice
@@ -178,6 +374,7 @@ def get_invoice_transactions(
                 Transaction.cartao_credito_id == cartao_credito_id,
                 Transaction.data_transacao >= datetime.combine(start_date, datetime.min.time()),
                 Transaction.data_transacao <= datetime.combine(end_date, datetime.max.time()),
+                Transaction.compra_parcelada_id.is_(None),
             )
         )
         .order_by(Transaction.data_transacao.desc())
@@ -186,27 +383,51 @@ def get_invoice_transactions(
 
 
 def get_current_invoices_summary(db: Session, usuario_id: int) -> list[dict]:
-    """Resumo das faturas atuais de todos os cartoes do usuario (para dashboard)."""
+    """Resumo das faturas atuais de todos os cartoes do usuario (para dashboard).
+
+    Somente leitura: faturas existentes usam o valor_total mantido
+    incrementalmente e os cartoes sem fatura no mes tem o total do periodo
+    calculado em uma unica consulta agrupada. Nenhuma fatura e criada aqui.
+    `parcelas_futuras` e o limite ja comprometido com parcelas de meses seguintes.
+    """
     from app.crud.card import list_cards
 
     cards = list_cards(db, usuario_id)
+    if not cards:
+        return []
     today = date.today()
-    summaries = []
+    stmt = select(CreditCardInvoice).where(
+        and_(
+            CreditCardInvoice.usuario_id == usuario_id,
+            CreditCardInvoice.mes_referencia == today.month,
+            CreditCardInvoice.ano_referencia == today.year,
+        )
+    )
+    invoices = {inv.cartao_credito_id: inv for inv in db.execute(stmt).scalars()}
+    totals = period_totals(db, [c for c in cards if c.id not in invoices], today.month, today.year)
+    futuras = future_installment_totals(db, [c.id for c in cards], today.month, today.year)
 
+    summaries = []
     for card in cards:
-        invoice = get_or_create_invoice(db, card.id, today.month, today.year, usuario_id)
-        # Recalcular se estiver aberta
-        if invoice.status == "aberta":
-            invoice = recalculate_invoice(db, invoice)
+        invoice = invoices.get(card.id)
+        if invoice:
+            valor_total, status, vencimento = invoice.valor_total, invoice.status, invoice.data_vencimento
+        else:
+            valor_total = totals.get(card.id, Decimal("0.00"))
+            status = "aberta"
+            vencimento = _due_date(card.dia_vencimento_fatura, today.month, today.year)
 
         summaries.append({
             "cartao_id": card.id,
             "cartao_nome": card.nome_cartao,
             "bandeira": card.bandeira,
-            "valor_total": invoice.valor_total,
-            "data_vencimento": invoice.data_vencimento,
-            "status": invoice.status,
+            "valor_total": valor_total,
+            "data_vencimento": vencimento,
+            "status": status,
             "limite": card.limite,
+            "limite_utilizado": card.limite_utilizado,
+            "limite_disponivel": card.limite - card.limite_utilizado,
+            "parcelas_futuras": futuras.get(card.id, Decimal("0.00")),
         })
 
     return summaries
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.scheduler_lease import SchedulerLease
+
+
+def acquire_lease(
+    db: Session, nome: str, dono: str, ttl_seconds: int, stale_after_seconds: int = 0, criar: bool = True
+) -> bool:
+    """Adquire ou renova a lease `nome` para `dono`. Retorna True se `dono` ficou com ela.
+
+    A lease de outro dono so e tomada depois de expirada ha `stale_after_seconds`.
+    Com `criar=False` uma lease que ainda nao existe nao e criada.
+    O UPDATE condicional e atomico, entao dois workers nunca ficam com a mesma lease.
+    """
+    now = datetime.utcnow()
+    expira_em = now + timedelta(seconds=ttl_seconds)
+    result = db.execute(
+        update(SchedulerLease)
+        .where(
+            (SchedulerLease.nome == nome)
+            & or_(
+                SchedulerLease.dono == dono,
+                SchedulerLease.expira_em < now - timedelta(seconds=stale_after_seconds),
+            )
+        )
+        .values(dono=dono, expira_em=expira_em, heartbeat_em=now)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        db.commit()
+        return True
+    if not criar:
+        db.rollback()
+        return False
+
+    # Lease ainda nao existe: o primeiro INSERT vence, os demais batem na PK
+    try:
+        db.add(SchedulerLease(nome=nome, dono=dono, expira_em=expira_em, heartbeat_em=now))
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+
+
+def release_lease(db: Session, nome: str, dono: str) -> None:
+    db.execute(delete(SchedulerLease).where((SchedulerLease.nome == nome) & (SchedulerLease.dono == dono)))
+    db.commit()
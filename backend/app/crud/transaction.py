@@ -1,13 +1,51 @@
+import base64
+import json
+from datetime import datetime
 from decimal import Decimal
-from typing import Iterable
+from typing import Iterable, Iterator
 
-from sqlalchemy import and_, func, select
+from sqlalchemy import and_, func, insert, or_, select
 from sqlalchemy.orm import Session
 
 from app.crud.account import apply_balance_delta
+from app.crud.card import apply_limit_delta
+from app.crud.daily_summary import apply_rollup_deltas, rollup_deltas
+from app.crud.invoice import apply_invoice_delta, invoice_reference
+from app.models.card import CreditCard
 from app.models.transaction import Transaction, TipoTransacao
 
 
+def _apply_card_delta(db: Session, usuario_id: int, cartao_credito_id: int, data_transacao, delta: Decimal) -> None:
+    # A fatura e escolhida pelo periodo de faturamento do cartao em que cai a data;
+    # cartao de outro usuario nao recebe delta
+    fechamento = db.execute(
+        select(CreditCard.dia_fechamento_fatura)
+        .where(and_(CreditCard.id == cartao_credito_id, CreditCard.usuario_id == usuario_id))
+    ).scalar_one_or_none()
+    if fechamento is not None:
+        mes, ano = invoice_reference(fechamento, data_transacao)
+        apply_invoice_delta(db, cartao_credito_id, mes, ano, delta)
+        apply_limit_delta(db, cartao_credito_id, delta, mes, ano)
+
+
+def _commit_keeping(db: Session, obj) -> None:
+    """Commit sem expirar `obj` (evita o SELECT de refresh); os demais objetos expiram normalmente.
+
+    Os outros objetos podem ter sido alterados pelos UPDATEs atomicos de
+    saldo/fatura/limite, entao continuam sendo recarregados no proximo acesso.
+    """
+    expire_on_commit = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = expire_on_commit
+    if expire_on_commit:
+        for other in list(db.identity_map.values()):
+            if other is not obj:
+                db.expire(other)
+
+
 def create_transaction(
     db: Session,
     usuario_id: int,
@@ -18,6 +56,7 @@ def create_transaction(
     categoria_id: int | None = None,
     conta_bancaria_id: int | None = None,
     cartao_credito_id: int | None = None,
+    subcategoria_id: int | None = None,
 ) -> Transaction:
     tx = Transaction(
         usuario_id=usuario_id,
@@ -26,23 +65,93 @@ def create_transaction(
         data_transacao=data_transacao,
         descricao=descricao,
         categoria_id=categoria_id,
+        subcategoria_id=subcategoria_id,
         conta_bancaria_id=conta_bancaria_id,
         cartao_credito_id=cartao_credito_id,
     )
     db.add(tx)
-    db.commit()
-    db.refresh(tx)
 
-    # Atualiza saldo da conta, se houver
+    # Atualiza saldo da conta e total da fatura, se houver, na mesma transacao do INSERT
     if conta_bancaria_id:
         delta = valor if tipo == TipoTransacao.RECEITA else -valor
-        apply_balance_delta(db, tx.conta, delta)
+        apply_balance_delta(db, conta_bancaria_id, delta, usuario_id=usuario_id)
+    if cartao_credito_id:
+        _apply_card_delta(db, usuario_id, cartao_credito_id, data_transacao, valor)
+    apply_rollup_deltas(db, rollup_deltas([tx]))
 
+    db.flush()
+    _commit_keeping(db, tx)
     return tx
 
 
-def list_transactions(
-    db: Session,
+_ORDER_FIELDS = {
+    "data_transacao": Transaction.data_transacao,
+    "valor": Transaction.valor,
+    "id": Transaction.id,
+}
+
+
+def encode_cursor(tx: Transaction, order_by: str = "data_transacao", order_dir: str = "desc") -> str:
+    """Gera o token opaco `after` a partir do ultimo item da pagina (order_col, id)."""
+    if order_by not in _ORDER_FIELDS:
+        order_by = "data_transacao"
+    value = getattr(tx, order_by)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, Decimal):
+        value = str(value)
+    # Mesma normalizacao de _apply_page: qualquer coisa diferente de "asc" ordena desc
+    direction = "asc" if order_dir.lower() == "asc" else "desc"
+    payload = {"o": order_by, "d": direction, "v": value, "id": tx.id}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> dict:
+    """Decodifica o token `after`. Levanta ValueError se o token for invalido."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        order_by = payload["o"]
+        if order_by not in _ORDER_FIELDS:
+            raise ValueError(order_by)
+        value = payload["v"]
+        if order_by == "data_transacao":
+            value = datetime.fromisoformat(value)
+        elif order_by == "valor":
+            value = Decimal(value)
+        else:
+            value = int(value)
+        return {"order_by": order_by, "order_dir": payload["d"], "value": value, "id": int(payload["id"])}
+    except (KeyError, TypeError, ValueError, ArithmeticError) as exc:
+        raise ValueError("Cursor invalido") from exc
+
+
+def _seek_predicate(order_col, order_by: str, ascending: bool, value, last_id: int):
+    # Predicado de seek (keyset): (order_col, id) estritamente apos o ultimo item visto
+    if order_by == "id":
+        return Transaction.id > last_id if ascending else Transaction.id < last_id
+    if ascending:
+        return or_(order_col > value, and_(order_col == value, Transaction.id > last_id))
+    return or_(order_col < value, and_(order_col == value, Transaction.id < last_id))
+
+
+def bulk_insert_transactions(db: Session, rows: list[dict]) -> int:
+    """Insere transacoes em lote (executemany), sem commit.
+
+    Atualiza o RESUMO_DIARIO do lote. Nao aplica saldo nem faturas: quem chama
+    agrega os deltas e os aplica uma vez por conta/fatura
+    (apply_balance_delta/apply_invoice_delta) na mesma transacao.
+    """
+    if not rows:
+        return 0
+    db.execute(insert(Transaction), rows)
+    apply_rollup_deltas(db, rollup_deltas(rows))
+    return len(rows)
+
+
+def _apply_filters(
+    stmt,
     usuario_ids: list[int],
     tipo: str | None = None,
     categoria_ids: list[int] | None = None,
@@ -50,14 +159,9 @@ def list_transactions(
     cartao_ids: list[int] | None = None,
     start_date=None,
     end_date=None,
-    order_by: str = "data_transacao",
-    order_dir: str = "desc",
-    page: int = 1,
-    page_size: int = 20,
-) -> list[Transaction]:
-    if not usuario_ids:
-        return []
-    stmt = select(Transaction).where(Transaction.usuario_id.in_(usuario_ids))
+):
+    """Aplica o conjunto de filtros comum a listagem, contagem e exportacao."""
+    stmt = stmt.where(Transaction.usuario_id.in_(usuario_ids))
     if tipo:
         stmt = stmt.where(Transaction.tipo == tipo)
     if categoria_ids:
@@ -72,25 +176,61 @@ def list_transactions(
         stmt = stmt.where(Transaction.data_transacao >= start_date)
     elif end_date:
         stmt = stmt.where(Transaction.data_transacao <= end_date)
+    return stmt
+
 
-    allowed_order_fields = {
-        "data_transacao": Transaction.data_transacao,
-        "valor": Transaction.valor,
-        "id": Transaction.id,
-    }
-    order_col = allowed_order_fields.get(order_by, Transaction.data_transacao)
-    if order_dir.lower() == "asc":
+def _apply_page(stmt, order_by: str, order_dir: str, page: int, page_size: int, after: str | None):
+    """Aplica ordenacao e pagina (keyset quando ha `after`, OFFSET caso contrario)."""
+    if order_by not in _ORDER_FIELDS:
+        order_by = "data_transacao"
+    order_col = _ORDER_FIELDS[order_by]
+    ascending = order_dir.lower() == "asc"
+    if ascending:
         stmt = stmt.order_by(order_col.asc(), Transaction.id.asc())
     else:
         stmt = stmt.order_by(order_col.desc(), Transaction.id.desc())
 
-    if page < 1:
-        page = 1
     if page_size < 1:
         page_size = 20
+    if after:
+        cursor = decode_cursor(after)
+        if cursor["order_by"] != order_by or cursor["order_dir"] != ("asc" if ascending else "desc"):
+            raise ValueError("Cursor nao corresponde a ordenacao solicitada")
+        stmt = stmt.where(_seek_predicate(order_col, order_by, ascending, cursor["value"], cursor["id"]))
+        return stmt.limit(page_size)
+
+    if page < 1:
+        page = 1
     offset = (page - 1) * page_size
-    stmt = stmt.offset(offset).limit(page_size)
+    return stmt.offset(offset).limit(page_size)
+
+
+def list_transactions(
+    db: Session,
+    usuario_ids: list[int],
+    tipo: str | None = None,
+    categoria_ids: list[int] | None = None,
+    conta_ids: list[int] | None = None,
+    cartao_ids: list[int] | None = None,
+    start_date=None,
+    end_date=None,
+    order_by: str = "data_transacao",
+    order_dir: str = "desc",
+    page: int = 1,
+    page_size: int = 20,
+    after: str | None = None,
+) -> list[Transaction]:
+    """Lista transacoes filtradas.
 
+    Com `after` (token gerado por `encode_cursor`) usa paginacao keyset e ignora
+    `page`; sem ele mantem a paginacao por OFFSET para clientes antigos.
+    """
+    if not usuario_ids:
+        return []
+    stmt = _apply_filters(
+        select(Transaction), usuario_ids, tipo, categoria_ids, conta_ids, cartao_ids, start_date, end_date
+    )
+    stmt = _apply_page(stmt, order_by, order_dir, page, page_size, after)
     return list(db.execute(stmt).scalars().all())
 
 
@@ -106,29 +246,102 @@ def count_transactions(
 ) -> int:
     if not usuario_ids:
         return 0
-    stmt = select(func.count(Transaction.id)).where(Transaction.usuario_id.in_(usuario_ids))
-    if tipo:
-        stmt = stmt.where(Transaction.tipo == tipo)
-    if categoria_ids:
-        stmt = stmt.where(Transaction.categoria_id.in_(categoria_ids))
-    if conta_ids:
-        stmt = stmt.where(Transaction.conta_bancaria_id.in_(conta_ids))
-    if cartao_ids:
-        stmt = stmt.where(Transaction.cartao_credito_id.in_(cartao_ids))
-    if start_date and end_date:
-        stmt = stmt.where(and_(Transaction.data_transacao >= start_date, Transaction.data_transacao <= end_date))
-    elif start_date:
-        stmt = stmt.where(Transaction.data_transacao >= start_date)
-    elif end_date:
-        stmt = stmt.where(Transaction.data_transacao <= end_date)
+    stmt = _apply_filters(
+        select(func.count(Transaction.id)), usuario_ids, tipo, categoria_ids, conta_ids, cartao_ids, start_date, end_date
+    )
     return int(db.execute(stmt).scalar_one())
 
 
+def transactions_fingerprint(db: Session, usuario_ids: list[int], start_date=None, end_date=None) -> str:
+    """Versao das transacoes filtradas, lida do banco: quantidade e maior id.
+
+    Transacoes nao sao editadas (so criadas e excluidas), entao qualquer
+    escrita no filtro muda o par. Usa so o indice (usuario, data, id).
+    """
+    if not usuario_ids:
+        return "0:0"
+    stmt = _apply_filters(
+        select(func.count(Transaction.id), func.coalesce(func.max(Transaction.id), 0)),
+        usuario_ids,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    count, last_id = db.execute(stmt).one()
+    return f"{count}:{last_id}"
+
+
+def list_transactions_with_total(
+    db: Session,
+    usuario_ids: list[int],
+    tipo: str | None = None,
+    categoria_ids: list[int] | None = None,
+    conta_ids: list[int] | None = None,
+    cartao_ids: list[int] | None = None,
+    start_date=None,
+    end_date=None,
+    order_by: str = "data_transacao",
+    order_dir: str = "desc",
+    page: int = 1,
+    page_size: int = 20,
+    after: str | None = None,
+    include_total: bool = True,
+) -> tuple[list[Transaction], int | None]:
+    """Lista a pagina e o total do filtro em uma unica consulta.
+
+    No modo OFFSET o total vem de `COUNT(*) OVER()`, calculado antes do LIMIT.
+    No modo keyset a janela so enxergaria as linhas apos o cursor, entao o
+    total exige uma contagem separada. Com `include_total=False` nao ha contagem.
+    """
+    filters = (usuario_ids, tipo, categoria_ids, conta_ids, cartao_ids, start_date, end_date)
+    if not include_total or after:
+        items = list_transactions(
+            db, *filters, order_by=order_by, order_dir=order_dir, page=page, page_size=page_size, after=after
+        )
+        total = count_transactions(db, *filters) if include_total else None
+        return items, total
+
+    if not usuario_ids:
+        return [], 0
+    stmt = _apply_filters(select(Transaction, func.count().over().label("total")), *filters)
+    stmt = _apply_page(stmt, order_by, order_dir, page, page_size, None)
+    rows = db.execute(stmt).all()
+    if rows:
+        return [row[0] for row in rows], int(rows[0][1])
+    # Pagina alem do fim: a janela nao retorna linhas, entao o total precisa de contagem propria
+    total = count_transactions(db, *filters) if page > 1 else 0
+    return [], total
+
+
+def iter_transaction_rows(
+    db: Session,
+    usuario_ids: list[int],
+    columns: Iterable,
+    start_date=None,
+    end_date=None,
+    batch_size: int = 1000,
+) -> Iterator:
+    """Percorre as transacoes filtradas com cursor no servidor (stream_results).
+
+    Seleciona so as colunas pedidas e busca `batch_size` linhas por vez, entao a
+    memoria fica constante independente do tamanho do resultado.
+    """
+    if not usuario_ids:
+        return
+    stmt = _apply_filters(select(*columns), usuario_ids, start_date=start_date, end_date=end_date)
+    stmt = stmt.order_by(Transaction.data_transacao.desc(), Transaction.id.desc()).execution_options(
+        stream_results=True, yield_per=batch_size
+    )
+    yield from db.execute(stmt)
+
+
 def delete_transaction(db: Session, tx: Transaction) -> None:
     # Reverte saldo se tinha conta bancária
     if tx.conta_bancaria_id:
         delta = -tx.valor if tx.tipo == TipoTransacao.RECEITA else tx.valor
-        apply_balance_delta(db, tx.conta, delta)
+        apply_balance_delta(db, tx.conta_bancaria_id, delta, usuario_id=tx.usuario_id)
+    if tx.cartao_credito_id:
+        _apply_card_delta(db, tx.usuario_id, tx.cartao_credito_id, tx.data_transacao, -tx.valor)
+    apply_rollup_deltas(db, rollup_deltas([tx], sign=-1))
     db.delete(tx)
     db.commit()
 
@@ -9,5 +9,8 @@ from app.models.transaction import Transaction  # noqa: F401
 from app.models.fixed_expense import FixedExpense  # noqa: F401
 from app.models.share import Share  # noqa: F401
 from app.models.document import Document  # noqa: F401
-
-
+from app.models.scheduler_lease import SchedulerLease  # noqa: F401
+from app.models.billing_calendar import BillingCalendar  # noqa: F401
+from app.models.installment import InstallmentAllocation, InstallmentPurchase  # noqa: F401
+from app.models.daily_summary import DailySummary  # noqa: F401
+from app.models.report import ReportJob  # noqa: F401
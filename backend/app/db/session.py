@@ -11,4 +11,9 @@ engine = create_engine(settings.database_url, pool_pre_ping=True, future=True)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
 
+# Commits pelo ORM invalidam o cache de agregados dos usuarios afetados
+from app.services.cache import register_invalidation  # noqa: E402
+
+register_invalidation(SessionLocal)
+
 
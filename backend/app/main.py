@@ -20,6 +20,9 @@ from app.api.routes.shares import router as shares_router
 from app.api.routes.reports import router as reports_router
 from app.api.routes.uploads import router as uploads_router
 from app.api.routes.invoices import router as invoices_router
+from app.api.routes.forecast import router as forecast_router
+from app.services.cache import cache_stats
+from app.services.reports import shutdown_report_pool
 from app.services.scheduler import start_scheduler, stop_scheduler
 from app.db.session import engine
 from app.db import base  # noqa: F401
@@ -106,6 +109,7 @@ def health_check():
             "name": settings.db_name
         },
         "cors_origins": settings.cors_origins,
+        "cache": cache_stats(),
         "uptime": "running"
     }
 
@@ -125,6 +129,7 @@ app.include_router(shares_router, prefix="/api", tags=["shares"])
 app.include_router(reports_router, prefix="/api", tags=["reports"]) 
 app.include_router(uploads_router, prefix="/api", tags=["uploads"])
 app.include_router(invoices_router, prefix="/api", tags=["invoices"]) 
+app.include_router(forecast_router, prefix="/api", tags=["forecast"])
 
 
 @app.on_event("startup")
@@ -140,5 +145,6 @@ def on_startup():
 @app.on_event("shutdown")
 def on_shutdown():
     stop_scheduler()
+    shutdown_report_pool()
 
 
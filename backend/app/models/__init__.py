@@ -11,6 +11,11 @@ from .verification_code import VerificationCode
 from .password_reset_token import PasswordResetToken
 from .bank import Bank
 from .invoice import CreditCardInvoice
+from .scheduler_lease import SchedulerLease
+from .billing_calendar import BillingCalendar
+from .installment import InstallmentAllocation, InstallmentPurchase
+from .daily_summary import DailySummary
+from .report import ReportJob
 
 __all__ = [
     "User",
@@ -26,4 +31,10 @@ __all__ = [
     "VerificationCode",
     "PasswordResetToken",
     "Bank",
+    "SchedulerLease",
+    "BillingCalendar",
+    "InstallmentPurchase",
+    "InstallmentAllocation",
+    "DailySummary",
+    "ReportJob",
 ]
@@ -0,0 +1,20 @@
+from datetime import date
+
+from sqlalchemy import Date, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+
+class BillingCalendar(Base):
+    __tablename__ = "CALENDARIO_FATURAS"
+    __table_args__ = (
+        Index("ix_CALENDARIO_FATURAS_cartao_periodo", "cartao_credito_id", "data_inicio", "data_fim"),
+    )
+
+    cartao_credito_id: Mapped[int] = mapped_column(ForeignKey("CARTOES_CREDITO.id", ondelete="CASCADE"), primary_key=True)
+    ano_referencia: Mapped[int] = mapped_column(primary_key=True)
+    mes_referencia: Mapped[int] = mapped_column(primary_key=True)
+    data_inicio: Mapped[date] = mapped_column(Date, nullable=False)
+    data_fim: Mapped[date] = mapped_column(Date, nullable=False)
+    data_vencimento: Mapped[date] = mapped_column(Date, nullable=False)
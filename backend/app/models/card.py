@@ -14,6 +14,8 @@ class CreditCard(Base):
     nome_cartao: Mapped[str] = mapped_column(String(120), nullable=False)
     bandeira: Mapped[str] = mapped_column(String(60), nullable=False)
     limite: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False, default=Decimal("0.00"))
+    # Mantido incrementalmente: compras e parcelas ainda nao pagas
+    limite_utilizado: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False, default=Decimal("0.00"))
     dia_fechamento_fatura: Mapped[int] = mapped_column(nullable=False)
     dia_vencimento_fatura: Mapped[int] = mapped_column(nullable=False)
     ultimos_4_digitos: Mapped[str | None] = mapped_column(String(4), nullable=True)
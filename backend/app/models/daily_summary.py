@@ -0,0 +1,25 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import Date, ForeignKey, Numeric, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+
+class DailySummary(Base):
+    """Total diario das transacoes por (usuario, dia, tipo, categoria, conta, cartao).
+
+    Conta e cartao ausentes usam 0 (fazem parte da chave primaria).
+    """
+
+    __tablename__ = "RESUMO_DIARIO"
+
+    usuario_id: Mapped[int] = mapped_column(ForeignKey("usuarios.id", ondelete="CASCADE"), primary_key=True)
+    dia: Mapped[date] = mapped_column(Date, primary_key=True)
+    tipo: Mapped[str] = mapped_column(String(20), primary_key=True)
+    categoria_id: Mapped[int] = mapped_column(primary_key=True)
+    conta_bancaria_id: Mapped[int] = mapped_column(primary_key=True, default=0)
+    cartao_credito_id: Mapped[int] = mapped_column(primary_key=True, default=0)
+    total: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=Decimal("0.00"))
+    quantidade: Mapped[int] = mapped_column(nullable=False, default=0)
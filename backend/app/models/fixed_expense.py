@@ -1,7 +1,7 @@
 from datetime import date
 from decimal import Decimal
 
-from sqlalchemy import Date, Enum as SAEnum, ForeignKey, Numeric, String
+from sqlalchemy import Date, Enum as SAEnum, ForeignKey, Index, Numeric, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base_class import Base
@@ -9,6 +9,10 @@ from app.db.base_class import Base
 
 class FixedExpense(Base):
     __tablename__ = "GASTOS_FIXOS"
+    __table_args__ = (
+        Index("ix_GASTOS_FIXOS_status_id", "status", "id"),
+        Index("ix_GASTOS_FIXOS_usuario_lembrete", "usuario_id", "status", "lembrete_ativado", "dia_vencimento"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     usuario_id: Mapped[int] = mapped_column(ForeignKey("usuarios.id", ondelete="CASCADE"), index=True)
@@ -23,6 +27,8 @@ class FixedExpense(Base):
     status: Mapped[str] = mapped_column(SAEnum("Ativo", "Inativo", name="status_gasto_fixo"), default="Ativo")
     lembrete_ativado: Mapped[bool] = mapped_column(default=True)
     ultimo_lancamento: Mapped[date | None] = mapped_column(Date, nullable=True)
+    # Proxima ocorrencia a lancar; NULL quando o agendamento muda (recalculada pelo job)
+    proximo_vencimento: Mapped[date | None] = mapped_column(Date, nullable=True)
 
     usuario = relationship("User", backref="gastos_fixos")
     categoria = relationship("Category")
@@ -0,0 +1,50 @@
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import DateTime, ForeignKey, Index, Numeric, String, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.db.base_class import Base
+
+
+class InstallmentPurchase(Base):
+    __tablename__ = "COMPRAS_PARCELADAS"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    usuario_id: Mapped[int] = mapped_column(ForeignKey("usuarios.id", ondelete="CASCADE"), index=True)
+    cartao_credito_id: Mapped[int] = mapped_column(ForeignKey("CARTOES_CREDITO.id", ondelete="CASCADE"), index=True)
+    categoria_id: Mapped[int | None] = mapped_column(ForeignKey("CATEGORIAS.id", ondelete="SET NULL"), nullable=True)
+    descricao: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    valor_total: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
+    numero_parcelas: Mapped[int] = mapped_column(nullable=False)
+    data_compra: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    data_criacao: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    cartao = relationship("CreditCard", backref="compras_parceladas")
+    parcelas = relationship(
+        "InstallmentAllocation",
+        back_populates="compra",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="InstallmentAllocation.numero_parcela",
+    )
+
+
+class InstallmentAllocation(Base):
+    """Parcela de uma compra alocada a uma fatura (cartao, mes, ano)."""
+
+    __tablename__ = "PARCELAS_FATURA"
+    __table_args__ = (
+        UniqueConstraint("compra_id", "numero_parcela", name="uq_parcela_compra_numero"),
+        Index("ix_PARCELAS_FATURA_cartao_periodo", "cartao_credito_id", "ano_referencia", "mes_referencia", "valor"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    compra_id: Mapped[int] = mapped_column(ForeignKey("COMPRAS_PARCELADAS.id", ondelete="CASCADE"), nullable=False)
+    cartao_credito_id: Mapped[int] = mapped_column(ForeignKey("CARTOES_CREDITO.id", ondelete="CASCADE"), nullable=False)
+    numero_parcela: Mapped[int] = mapped_column(nullable=False)
+    mes_referencia: Mapped[int] = mapped_column(nullable=False)
+    ano_referencia: Mapped[int] = mapped_column(nullable=False)
+    valor: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
+
+    compra = relationship("InstallmentPurchase", back_populates="parcelas")
@@ -0,0 +1,32 @@
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, ForeignKey, Index, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+
+class ReportJob(Base):
+    __tablename__ = "RELATORIOS"
+    __table_args__ = (
+        Index("ix_RELATORIOS_usuario_chave", "usuario_id", "chave"),
+    )
+    # Status de job nao e dado financeiro: nao invalida o cache de agregados
+    invalida_cache = False
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    usuario_id: Mapped[int] = mapped_column(ForeignKey("usuarios.id", ondelete="CASCADE"), nullable=False)
+    formato: Mapped[str] = mapped_column(String(10), nullable=False, default="pdf")
+    data_inicio: Mapped[date | None] = mapped_column(Date, nullable=True)
+    data_fim: Mapped[date | None] = mapped_column(Date, nullable=True)
+    # Hash de (usuario, periodo, versao dos dados): pedidos iguais reaproveitam o arquivo
+    chave: Mapped[str] = mapped_column(String(64), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pendente")
+    caminho_arquivo: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    tamanho: Mapped[int | None] = mapped_column(nullable=True)
+    linhas: Mapped[int | None] = mapped_column(nullable=True)
+    erro: Mapped[str | None] = mapped_column(Text, nullable=True)
+    data_criacao: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    data_conclusao: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Lease do job pendente/processando: renovado pelo worker enquanto gera o arquivo
+    atualizado_em: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
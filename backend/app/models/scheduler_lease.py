@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+
+class SchedulerLease(Base):
+    __tablename__ = "SCHEDULER_LEASES"
+
+    nome: Mapped[str] = mapped_column(String(100), primary_key=True)
+    dono: Mapped[str] = mapped_column(String(255), nullable=False)
+    expira_em: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    heartbeat_em: Mapped[datetime] = mapped_column(DateTime, nullable=False)
@@ -1,7 +1,7 @@
 from datetime import date, datetime
 from decimal import Decimal
 
-from sqlalchemy import Date, DateTime, Enum as SAEnum, ForeignKey, Numeric, String, Text, func
+from sqlalchemy import Date, DateTime, Enum as SAEnum, ForeignKey, Index, Numeric, String, Text, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base_class import Base
@@ -14,10 +14,19 @@ class TipoTransacao(str):
 
 class Transaction(Base):
     __tablename__ = "TRANSACOES"
+    __table_args__ = (
+        Index("ix_TRANSACOES_usuario_data_id", "usuario_id", "data_transacao", "id"),
+        Index("ix_TRANSACOES_cartao_data", "cartao_credito_id", "data_transacao", "valor"),
+        Index("ix_TRANSACOES_usuario_tipo_data", "usuario_id", "tipo", "data_transacao", "categoria_id", "valor"),
+        UniqueConstraint("gasto_fixo_id", "data_transacao", name="uq_transacao_gasto_fixo_data"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     usuario_id: Mapped[int] = mapped_column(ForeignKey("usuarios.id", ondelete="CASCADE"), index=True)
     categoria_id: Mapped[int] = mapped_column(ForeignKey("CATEGORIAS.id", ondelete="RESTRICT"), nullable=False, index=True)
+    subcategoria_id: Mapped[int | None] = mapped_column(
+        ForeignKey("SUBCATEGORIAS.id", ondelete="SET NULL"), nullable=True, index=True
+    )
     conta_bancaria_id: Mapped[int | None] = mapped_column(ForeignKey("CONTAS_BANCARIAS.id", ondelete="SET NULL"), nullable=True)
     cartao_credito_id: Mapped[int | None] = mapped_column(ForeignKey("CARTOES_CREDITO.id", ondelete="SET NULL"), nullable=True)
     tipo: Mapped[str] = mapped_column(SAEnum(TipoTransacao.RECEITA, TipoTransacao.DESPESA, name="tipo_transacao"), nullable=False)
@@ -26,10 +35,16 @@ class Transaction(Base):
     data_transacao: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     eh_gasto_fixo: Mapped[bool] = mapped_column(default=False)
     gasto_fixo_id: Mapped[int | None] = mapped_column(ForeignKey("GASTOS_FIXOS.id", ondelete="SET NULL"), nullable=True)
+    # Compra parcelada que originou a transacao: entra nos agregados, mas a fatura
+    # soma as parcelas alocadas (PARCELAS_FATURA) e nao esta linha
+    compra_parcelada_id: Mapped[int | None] = mapped_column(
+        ForeignKey("COMPRAS_PARCELADAS.id", ondelete="SET NULL"), nullable=True, index=True
+    )
     data_criacao: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     usuario = relationship("User", backref="transacoes")
     categoria = relationship("Category")
+    subcategoria = relationship("Subcategory")
     conta = relationship("BankAccount")
     cartao = relationship("CreditCard")
 
@@ -1,6 +1,6 @@
 from decimal import Decimal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, computed_field
 
 
 class CardBase(BaseModel):
@@ -36,6 +36,12 @@ class CardPublic(BaseModel):
     dia_vencimento_fatura: int
     ultimos_4_digitos: str | None
     cor: str | None
+    limite_utilizado: Decimal = Decimal("0.00")
+
+    @computed_field
+    @property
+    def limite_disponivel(self) -> Decimal:
+        return self.limite - self.limite_utilizado
 
     class Config:
         from_attributes = True
@@ -1,7 +1,7 @@
 from datetime import date, datetime
 from decimal import Decimal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.schemas.transaction import TransactionPublic
 
@@ -22,8 +22,28 @@ class InvoicePublic(BaseModel):
         from_attributes = True
 
 
+class InvoiceInstallment(BaseModel):
+    compra_id: int
+    descricao: str | None
+    numero_parcela: int
+    numero_parcelas: int
+    valor: Decimal
+
+
 class InvoiceWithTransactions(InvoicePublic):
     transacoes: list[TransactionPublic] = []
+    parcelas: list[InvoiceInstallment] = []
+
+
+class InvoiceHistoryItem(BaseModel):
+    mes_referencia: int
+    ano_referencia: int
+    data_inicio: date
+    data_fim: date
+    data_vencimento: date
+    valor_total: Decimal
+    status: str
+    fatura_id: int | None = None
 
 
 class InvoicePayment(BaseModel):
@@ -38,6 +58,41 @@ class InvoiceSummary(BaseModel):
     data_vencimento: date
     status: str
     limite: Decimal
+    limite_utilizado: Decimal = Decimal("0.00")
+    limite_disponivel: Decimal = Decimal("0.00")
+    parcelas_futuras: Decimal = Decimal("0.00")
+
+    class Config:
+        from_attributes = True
+
+
+class InstallmentPurchaseCreate(BaseModel):
+    valor_total: Decimal = Field(gt=0)
+    numero_parcelas: int = Field(ge=2, le=48)
+    data_compra: datetime
+    descricao: str | None = Field(default=None, max_length=255)
+    categoria_id: int
+
+
+class InstallmentAllocationPublic(BaseModel):
+    numero_parcela: int
+    mes_referencia: int
+    ano_referencia: int
+    valor: Decimal
+
+    class Config:
+        from_attributes = True
+
+
+class InstallmentPurchasePublic(BaseModel):
+    id: int
+    cartao_credito_id: int
+    categoria_id: int | None
+    descricao: str | None
+    valor_total: Decimal
+    numero_parcelas: int
+    data_compra: datetime
+    parcelas: list[InstallmentAllocationPublic] = []
 
     class Config:
         from_attributes = True
@@ -0,0 +1,19 @@
+from datetime import date, datetime
+
+from pydantic import BaseModel
+
+
+class ReportJobPublic(BaseModel):
+    id: int
+    formato: str
+    status: str
+    data_inicio: date | None
+    data_fim: date | None
+    tamanho: int | None
+    linhas: int | None
+    erro: str | None
+    data_criacao: datetime | None
+    data_conclusao: datetime | None
+
+    class Config:
+        from_attributes = True
@@ -10,6 +10,7 @@ class TransactionBase(BaseModel):
     data_transacao: datetime
     descricao: str | None = Field(default=None, max_length=255)
     categoria_id: int | None = None
+    subcategoria_id: int | None = None
     conta_bancaria_id: int | None = None
     cartao_credito_id: int | None = None
 
@@ -25,6 +26,7 @@ class TransactionPublic(BaseModel):
     data_transacao: datetime
     descricao: str | None
     categoria_id: int | None
+    subcategoria_id: int | None = None
     conta_bancaria_id: int | None
     cartao_credito_id: int | None
 
@@ -32,3 +34,13 @@ class TransactionPublic(BaseModel):
         from_attributes = True
 
 
+
+
+class TransactionImportError(BaseModel):
+    linha: int
+    erro: str
+
+
+class TransactionImportResult(BaseModel):
+    importadas: int
+    erros: list[TransactionImportError] = []
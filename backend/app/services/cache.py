@@ -0,0 +1,216 @@
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+from typing import Any, Callable
+
+from sqlalchemy import event
+
+from app.core.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class MemoryBackend:
+    """LRU em processo com limite de entradas e validade por entrada."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISSING
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisBackend:
+    """Backend compartilhado entre workers (requer o pacote `redis`)."""
+
+    def __init__(self, url: str, prefix: str = "moneyhub:cache:"):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Any:
+        raw = self._client.get(self.prefix + key)
+        return _MISSING if raw is None else pickle.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        self._client.set(self.prefix + key, pickle.dumps(value), ex=ttl)
+
+    def version(self, usuario_id: int) -> int:
+        return int(self._client.get(f"{self.prefix}versao:{usuario_id}") or 0)
+
+    def bump(self, usuario_id: int) -> int:
+        return int(self._client.incr(f"{self.prefix}versao:{usuario_id}"))
+
+
+class ResultCache:
+    """Cache de agregados por (usuario_id, endpoint, periodo).
+
+    Cada usuario tem uma versao de dados que entra na chave; toda escrita
+    incrementa a versao e as entradas antigas deixam de ser lidas (expiram
+    pelo LRU/ttl). Com backend compartilhado, versoes e valores ficam nele e
+    o LRU local serve de primeiro nivel.
+    """
+
+    def __init__(self, max_entries: int, ttl: int, shared: RedisBackend | None = None):
+        self.local = MemoryBackend(max_entries)
+        self.shared = shared
+        self.ttl = ttl
+        self._versions: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, usuario_id: int) -> int:
+        if self.shared is not None:
+            return self.shared.version(usuario_id)
+        return self._versions.get(usuario_id, 0)
+
+    def bump(self, usuario_id: int) -> None:
+        if self.shared is not None:
+            self.shared.bump(usuario_id)
+            return
+        with self._lock:
+            self._versions[usuario_id] = self._versions.get(usuario_id, 0) + 1
+
+    def get_or_compute(self, usuario_id: int, endpoint: str, period: str, compute: Callable[[], Any]) -> Any:
+        """Le o agregado ou calcula e guarda.
+
+        Falhas do backend compartilhado (Redis fora do ar, timeout) nao viram
+        erro na requisicao: sao registradas e o valor e calculado sem cache.
+        """
+        try:
+            key = f"{endpoint}:{usuario_id}:{self.version(usuario_id)}:{period}"
+            value = self.local.get(key)
+            if value is _MISSING and self.shared is not None:
+                value = self.shared.get(key)
+                if value is not _MISSING:
+                    self.local.set(key, value, self.ttl)
+        except Exception:
+            logger.exception("Falha ao ler o cache de agregados; calculando sem cache")
+            return compute()
+        with self._lock:
+            if value is _MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if value is _MISSING:
+            value = compute()
+            self.local.set(key, value, self.ttl)
+            if self.shared is not None:
+                try:
+                    self.shared.set(key, value, self.ttl)
+                except Exception:
+                    logger.exception("Falha ao gravar no cache de agregados")
+        return value
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": "redis" if self.shared is not None else "memory",
+            "entries": len(self.local),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+_cache: ResultCache | None = None
+
+
+def get_cache() -> ResultCache:
+    global _cache
+    if _cache is None:
+        settings = get_settings()
+        shared = None
+        if settings.cache_redis_url:
+            try:
+                shared = RedisBackend(settings.cache_redis_url)
+            except ImportError:
+                logger.warning("Pacote redis nao instalado; cache de agregados desligado")
+        if shared is None and settings.cache_enabled:
+            logger.info("CACHE_REDIS_URL nao configurado; cache de agregados desligado")
+        _cache = ResultCache(settings.cache_max_entries, settings.cache_ttl_seconds, shared)
+    return _cache
+
+
+def cached(usuario_id: int, endpoint: str, period: str, compute: Callable[[], Any]) -> Any:
+    """Le o agregado do cache ou calcula e guarda.
+
+    So usa o cache com backend compartilhado (CACHE_REDIS_URL): versoes em
+    memoria nao veriam escritas feitas por outros workers. Desligado tambem
+    com CACHE_ENABLED=false.
+    """
+    cache = get_cache()
+    if not get_settings().cache_enabled or cache.shared is None:
+        return compute()
+    return cache.get_or_compute(usuario_id, endpoint, period, compute)
+
+
+def bump_data_version(*usuario_ids: int) -> None:
+    """Invalida os agregados dos usuarios (escritas em lote fora do ORM)."""
+    cache = get_cache()
+    for usuario_id in set(usuario_ids):
+        try:
+            cache.bump(usuario_id)
+        except Exception:
+            logger.exception("Falha ao invalidar cache do usuario %s", usuario_id)
+
+
+def cache_stats() -> dict:
+    return get_cache().stats()
+
+
+def _collect_users(session, flush_context) -> None:
+    # Ainda com o estado pre-flush: new/dirty/deleted listam os objetos escritos
+    users = session.info.setdefault("cache_usuarios", set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not getattr(obj, "invalida_cache", True):
+            continue
+        usuario_id = getattr(obj, "usuario_id", None)
+        if usuario_id:
+            users.add(usuario_id)
+
+
+def _bump_after_commit(session) -> None:
+    users = session.info.pop("cache_usuarios", None)
+    if users:
+        bump_data_version(*users)
+
+
+def _discard_after_rollback(session, previous_transaction) -> None:
+    session.info.pop("cache_usuarios", None)
+
+
+def register_invalidation(session_factory) -> None:
+    """Incrementa a versao dos usuarios afetados a cada commit feito pelo ORM."""
+    event.listen(session_factory, "after_flush", _collect_users)
+    event.listen(session_factory, "after_commit", _bump_after_commit)
+    event.listen(session_factory, "after_soft_rollback", _discard_after_rollback)
@@ -0,0 +1,171 @@
+import tempfile
+from datetime import date
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.crud.transaction import iter_transaction_rows
+from app.db.session import SessionLocal
+from app.models.account import BankAccount
+from app.models.card import CreditCard
+from app.models.category import Category
+from app.models.subcategory import Subcategory
+from app.models.transaction import Transaction
+
+
+EXPORT_BATCH_ROWS = 10000
+FILE_CHUNK_BYTES = 64 * 1024
+
+FORMATS = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+FIELDS = ("id", "data", "tipo", "valor", "descricao", "categoria", "subcategoria", "conta", "cartao")
+
+_EXPORT_COLUMNS = (
+    Transaction.id,
+    Transaction.data_transacao,
+    Transaction.tipo,
+    Transaction.valor,
+    Transaction.descricao,
+    Transaction.categoria_id,
+    Transaction.subcategoria_id,
+    Transaction.conta_bancaria_id,
+    Transaction.cartao_credito_id,
+)
+
+
+def require_writer(formato: str) -> None:
+    """Importa a biblioteca do formato antes do streaming (ImportError vira erro da request)."""
+    if formato == "xlsx":
+        import openpyxl  # noqa: F401
+    else:
+        import pyarrow  # noqa: F401
+
+
+def transaction_dimensions(db: Session, usuario_ids: list[int]) -> dict[str, dict[int, str]]:
+    """Nomes de categorias, subcategorias, contas e cartoes dos usuarios: uma consulta por dimensao."""
+    categorias = db.execute(
+        select(Category.id, Category.nome).where(or_(Category.usuario_id.in_(usuario_ids), Category.usuario_id.is_(None)))
+    ).tuples().all()
+    subcategorias = db.execute(
+        select(Subcategory.id, Subcategory.nome)
+        .where(or_(Subcategory.usuario_id.in_(usuario_ids), Subcategory.usuario_id.is_(None)))
+    ).tuples().all()
+    contas = db.execute(
+        select(BankAccount.id, BankAccount.nome_banco).where(BankAccount.usuario_id.in_(usuario_ids))
+    ).tuples().all()
+    cartoes = db.execute(
+        select(CreditCard.id, CreditCard.nome_cartao).where(CreditCard.usuario_id.in_(usuario_ids))
+    ).tuples().all()
+    return {
+        "categoria": dict(categorias),
+        "subcategoria": dict(subcategorias),
+        "conta": dict(contas),
+        "cartao": dict(cartoes),
+    }
+
+
+def iter_column_batches(
+    db: Session, usuario_ids: list[int], start_date: date | None, end_date: date | None, batch_size: int = EXPORT_BATCH_ROWS
+):
+    """Lotes colunares (dict campo -> lista) lidos do cursor, com os ids ja trocados por nomes."""
+    dims = transaction_dimensions(db, usuario_ids)
+    categorias, subcategorias = dims["categoria"], dims["subcategoria"]
+    contas, cartoes = dims["conta"], dims["cartao"]
+    batch = {field: [] for field in FIELDS}
+    rows = iter_transaction_rows(
+        db, usuario_ids, _EXPORT_COLUMNS, start_date=start_date, end_date=end_date, batch_size=batch_size
+    )
+    for t in rows:
+        batch["id"].append(t.id)
+        batch["data"].append(t.data_transacao)
+        batch["tipo"].append(t.tipo)
+        batch["valor"].append(t.valor)
+        batch["descricao"].append(t.descricao)
+        batch["categoria"].append(categorias.get(t.categoria_id))
+        batch["subcategoria"].append(subcategorias.get(t.subcategoria_id))
+        batch["conta"].append(contas.get(t.conta_bancaria_id))
+        batch["cartao"].append(cartoes.get(t.cartao_credito_id))
+        if len(batch["id"]) >= batch_size:
+            yield batch
+            batch = {field: [] for field in FIELDS}
+    if batch["id"]:
+        yield batch
+
+
+def _arrow_schema():
+    import pyarrow as pa
+
+    # Colunas de baixa cardinalidade como dicionario: arquivo menor e leitura mais rapida
+    names = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("id", pa.int64()),
+        ("data", pa.timestamp("us")),
+        ("tipo", names),
+        ("valor", pa.decimal128(12, 2)),
+        ("descricao", pa.string()),
+        ("categoria", names),
+        ("subcategoria", names),
+        ("conta", names),
+        ("cartao", names),
+    ])
+
+
+def _write_arrow(sink, batches, parquet: bool) -> None:
+    import pyarrow as pa
+
+    schema = _arrow_schema()
+    if parquet:
+        import pyarrow.parquet as pq
+
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    with writer:
+        for batch in batches:
+            # Datas com fuso sao gravadas sem ele (mesmo valor exibido no app)
+            batch["data"] = [d.replace(tzinfo=None) for d in batch["data"]]
+            record = pa.RecordBatch.from_arrays(
+                [pa.array(batch[field.name], type=field.type) for field in schema], schema=schema
+            )
+            writer.write_batch(record)
+
+
+def _write_xlsx(sink, batches) -> None:
+    from openpyxl import Workbook
+
+    # write_only grava as linhas em disco conforme chegam
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Transacoes")
+    ws.append(list(FIELDS))
+    for batch in batches:
+        for row in zip(*(batch[field] for field in FIELDS)):
+            values = list(row)
+            values[1] = values[1].replace(tzinfo=None)
+            ws.append(values)
+    wb.save(sink)
+
+
+def export_transactions(formato: str, usuario_ids: list[int], start_date: date | None, end_date: date | None):
+    """Gera o arquivo em um temporario (lote a lote) e o devolve em pedacos para o StreamingResponse.
+
+    Parquet e XLSX so ficam validos depois do rodape, entao o arquivo e
+    montado inteiro antes do envio; a memoria continua limitada a um lote.
+    """
+    db = SessionLocal()
+    try:
+        with tempfile.TemporaryFile() as sink:
+            batches = iter_column_batches(db, usuario_ids, start_date, end_date)
+            if formato == "xlsx":
+                _write_xlsx(sink, batches)
+            else:
+                _write_arrow(sink, batches, parquet=formato == "parquet")
+            db.close()
+            sink.seek(0)
+            while chunk := sink.read(FILE_CHUNK_BYTES):
+                yield chunk
+    finally:
+        db.close()
@@ -0,0 +1,264 @@
+import calendar
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import accumulate
+from statistics import median
+
+from sqlalchemy import and_, extract, func, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.crud.billing_calendar import shift_month
+from app.crud.fixed_expense import fixed_expense_occurrences
+from app.crud.invoice import _due_date, invoice_reference, period_totals
+from app.models.account import BankAccount
+from app.models.card import CreditCard
+from app.models.fixed_expense import FixedExpense
+from app.models.installment import InstallmentAllocation
+from app.models.invoice import CreditCardInvoice
+from app.models.transaction import TipoTransacao, Transaction
+
+
+# Deteccao de receitas recorrentes: mesma descricao/conta em ao menos
+# RECURRING_MIN_MONTHS dos ultimos RECURRING_LOOKBACK_MONTHS meses fechados
+RECURRING_LOOKBACK_MONTHS = 6
+RECURRING_MIN_MONTHS = 3
+
+# Faturas fechadas e nao pagas entram como saida so se venceram ha no maximo
+# OVERDUE_INVOICE_MONTHS periodos; as mais antigas sao consideradas abandonadas
+OVERDUE_INVOICE_MONTHS = 2
+
+
+def _cents(value) -> int:
+    return int((Decimal(value) * 100).to_integral_value())
+
+
+def _money(cents: int) -> str:
+    return str(Decimal(cents).scaleb(-2))
+
+
+def _monthly_dates(day: int, start: date, end: date) -> list[date]:
+    # Mesmo calculo dos gastos fixos (dia ajustado ao fim de meses curtos)
+    return fixed_expense_occurrences(day, start, end)
+
+
+def detect_recurring_income(db: Session, usuario_id: int, today: date) -> list[dict]:
+    """Receitas que se repetem mensalmente no historico (descricao + conta).
+
+    Uma consulta agrupada por (descricao, conta, ano, mes); valor e dia
+    projetados sao as medianas dos meses em que a receita apareceu.
+    """
+    first_mes, first_ano = shift_month(today.month, today.year, -RECURRING_LOOKBACK_MONTHS)
+    start = date(first_ano, first_mes, 1)
+    end = today.replace(day=1)
+    ano = extract("year", Transaction.data_transacao)
+    mes = extract("month", Transaction.data_transacao)
+    rows = db.execute(
+        select(
+            Transaction.descricao,
+            Transaction.conta_bancaria_id,
+            ano,
+            mes,
+            func.sum(Transaction.valor),
+            func.min(extract("day", Transaction.data_transacao)),
+        )
+        .where(
+            and_(
+                Transaction.usuario_id == usuario_id,
+                Transaction.tipo == TipoTransacao.RECEITA,
+                Transaction.data_transacao >= start,
+                Transaction.data_transacao < end,
+                Transaction.descricao.is_not(None),
+            )
+        )
+        .group_by(Transaction.descricao, Transaction.conta_bancaria_id, ano, mes)
+    ).all()
+
+    months: dict[tuple, list[tuple[Decimal, int]]] = defaultdict(list)
+    for descricao, conta_id, _, _, total, dia in rows:
+        months[(descricao.strip().lower(), conta_id)].append((Decimal(str(total)), int(dia)))
+
+    recurring = []
+    for (descricao, conta_id), seen in months.items():
+        if len(seen) < RECURRING_MIN_MONTHS:
+            continue
+        recurring.append({
+            "descricao": descricao,
+            "conta_bancaria_id": conta_id,
+            "valor": Decimal(str(median(v for v, _ in seen))).quantize(Decimal("0.01")),
+            "dia": int(median(d for _, d in seen)),
+            "meses": len(seen),
+        })
+    return recurring
+
+
+def _card_invoice_flows(db: Session, usuario_id: int, today: date, end: date, fixed: list) -> list[tuple[date, int]]:
+    """Saidas previstas (vencimento, centavos) das faturas em aberto e futuras de todos os cartoes.
+
+    Faturas abertas e fechadas vencidas ha ate OVERDUE_INVOICE_MONTHS meses (ou
+    a vencer) usam o valor_total; periodos sem fatura somam transacoes (periodo
+    atual), parcelas alocadas e gastos fixos no cartao.
+    """
+    cards = list(db.execute(select(CreditCard).where(CreditCard.usuario_id == usuario_id)).scalars())
+    if not cards:
+        return []
+    current = {card.id: invoice_reference(card.dia_fechamento_fatura, today) for card in cards}
+    first_mes, first_ano = min(current.values(), key=lambda ref: (ref[1], ref[0]))
+
+    overdue_mes, overdue_ano = shift_month(today.month, today.year, -OVERDUE_INVOICE_MONTHS)
+    overdue_since = date(overdue_ano, overdue_mes, min(today.day, calendar.monthrange(overdue_ano, overdue_mes)[1]))
+    invoices = {
+        (inv.cartao_credito_id, inv.mes_referencia, inv.ano_referencia): inv
+        for inv in db.execute(
+            select(CreditCardInvoice).where(
+                and_(
+                    CreditCardInvoice.usuario_id == usuario_id,
+                    or_(
+                        CreditCardInvoice.status == "aberta",
+                        and_(
+                            CreditCardInvoice.status == "fechada",
+                            CreditCardInvoice.data_vencimento >= overdue_since,
+                        ),
+                    ),
+                )
+            )
+        ).scalars()
+    }
+    allocations = {
+        (card_id, mes, ano): Decimal(str(total))
+        for card_id, ano, mes, total in db.execute(
+            select(
+                InstallmentAllocation.cartao_credito_id,
+                InstallmentAllocation.ano_referencia,
+                InstallmentAllocation.mes_referencia,
+                func.sum(InstallmentAllocation.valor),
+            )
+            .where(
+                and_(
+                    InstallmentAllocation.cartao_credito_id.in_([card.id for card in cards]),
+                    tuple_(InstallmentAllocation.ano_referencia, InstallmentAllocation.mes_referencia)
+                    >= tuple_(first_ano, first_mes),
+                )
+            )
+            .group_by(
+                InstallmentAllocation.cartao_credito_id,
+                InstallmentAllocation.ano_referencia,
+                InstallmentAllocation.mes_referencia,
+            )
+        ).all()
+    }
+    # Transacoes ja lancadas no periodo atual (um SELECT agrupado por referencia distinta)
+    by_ref: dict[tuple[int, int], list[CreditCard]] = defaultdict(list)
+    for card in cards:
+        by_ref[current[card.id]].append(card)
+    open_totals: dict[int, Decimal] = {}
+    for (mes, ano), group in by_ref.items():
+        open_totals.update(period_totals(db, group, mes, ano))
+
+    fechamento = {card.id: card.dia_fechamento_fatura for card in cards}
+    extra: dict[tuple[int, int, int], int] = defaultdict(int)
+    for fx, due in fixed:
+        if fx.cartao_credito_id in fechamento:
+            extra[(fx.cartao_credito_id, *invoice_reference(fechamento[fx.cartao_credito_id], due))] += _cents(fx.valor)
+
+    flows: list[tuple[date, int]] = []
+    for card in cards:
+        cur_mes, cur_ano = current[card.id]
+        # Faturas anteriores ainda nao pagas (fechadas ou atrasadas)
+        for (card_id, mes, ano), inv in invoices.items():
+            if card_id == card.id and (ano, mes) < (cur_ano, cur_mes) and inv.data_vencimento <= end:
+                flows.append((max(inv.data_vencimento, today), _cents(inv.valor_total)))
+        offset = 0
+        while True:
+            mes, ano = shift_month(cur_mes, cur_ano, offset)
+            due = _due_date(card.dia_vencimento_fatura, mes, ano)
+            if due > end:
+                break
+            inv = invoices.get((card.id, mes, ano))
+            if inv is not None:
+                amount = _cents(inv.valor_total)
+            elif offset == 0:
+                amount = _cents(open_totals.get(card.id, 0))
+            else:
+                amount = _cents(allocations.get((card.id, mes, ano), 0))
+            amount += extra.get((card.id, mes, ano), 0)
+            if amount:
+                flows.append((max(due, today), amount))
+            offset += 1
+    return flows
+
+
+def forecast(db: Session, usuario_id: int, months: int, today: date | None = None) -> dict:
+    """Projeta o saldo diario de cada conta pelos proximos `months` meses.
+
+    Cada fluxo (gasto fixo, fatura, receita recorrente) vira um delta em
+    centavos no indice do seu dia; o saldo de cada conta e a soma acumulada
+    desse vetor. Fluxos sem conta definida (faturas de cartao, que sao pagas
+    pela conta escolhida no pagamento) ficam na serie `nao_alocado`.
+    """
+    today = today or date.today()
+    end_mes, end_ano = shift_month(today.month, today.year, months)
+    end = date(end_ano, end_mes, min(today.day, calendar.monthrange(end_ano, end_mes)[1]))
+    days = (end - today).days + 1
+
+    accounts = db.execute(
+        select(BankAccount.id, BankAccount.nome_banco, BankAccount.saldo_atual)
+        .where(BankAccount.usuario_id == usuario_id)
+        .order_by(BankAccount.id)
+    ).all()
+    deltas: dict[int | None, list[int]] = {acc.id: [0] * days for acc in accounts}
+    deltas[None] = [0] * days
+
+    def add(conta_id, when: date, cents: int) -> None:
+        series = deltas.get(conta_id, deltas[None])
+        series[max((when - today).days, 0)] += cents
+
+    # Gastos fixos: ocorrencias ainda nao lancadas dentro da janela
+    fixed = []
+    for fx in db.execute(
+        select(FixedExpense).where(and_(FixedExpense.usuario_id == usuario_id, FixedExpense.status == "Ativo"))
+    ).scalars():
+        start = max(today, fx.data_inicio)
+        if fx.ultimo_lancamento and fx.ultimo_lancamento >= start:
+            start = fx.ultimo_lancamento + timedelta(days=1)
+        stop = min(end, fx.data_fim) if fx.data_fim else end
+        for due in (_monthly_dates(fx.dia_vencimento, start, stop) if start <= stop else []):
+            fixed.append((fx, due))
+            if fx.conta_bancaria_id:
+                add(fx.conta_bancaria_id, due, -_cents(fx.valor))
+
+    for due, cents in _card_invoice_flows(db, usuario_id, today, end, fixed):
+        add(None, due, -cents)
+
+    recurring = detect_recurring_income(db, usuario_id, today)
+    for item in recurring:
+        for when in _monthly_dates(item["dia"], today + timedelta(days=1), end):
+            add(item["conta_bancaria_id"], when, _cents(item["valor"]))
+
+    contas = []
+    total = [0] * days
+    for acc in accounts:
+        balance = list(accumulate(deltas[acc.id], initial=_cents(acc.saldo_atual)))[1:]
+        total = [t + b for t, b in zip(total, balance)]
+        low = min(range(days), key=balance.__getitem__)
+        contas.append({
+            "id": acc.id,
+            "nome_banco": acc.nome_banco,
+            "saldo_atual": str(acc.saldo_atual),
+            "saldo": [_money(c) for c in balance],
+            "saldo_minimo": {"data": (today + timedelta(days=low)).isoformat(), "valor": _money(balance[low])},
+        })
+    unallocated = list(accumulate(deltas[None]))
+    total = [t + u for t, u in zip(total, unallocated)]
+
+    return {
+        "inicio": today.isoformat(),
+        "fim": end.isoformat(),
+        "datas": [(today + timedelta(days=i)).isoformat() for i in range(days)],
+        "contas": contas,
+        "nao_alocado": [_money(c) for c in unallocated],
+        "total": [_money(c) for c in total],
+        "receitas_recorrentes": [
+            {**item, "valor": str(item["valor"])} for item in recurring
+        ],
+    }
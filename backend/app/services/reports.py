@@ -0,0 +1,326 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.crud.transaction import iter_transaction_rows, transactions_fingerprint
+from app.models.report import ReportJob
+from app.models.transaction import Transaction
+
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDENTE = "pendente"
+STATUS_PROCESSANDO = "processando"
+STATUS_CONCLUIDO = "concluido"
+STATUS_ERRO = "erro"
+
+# Job pendente/processando sem renovacao do lease nesse prazo e considerado morto
+REPORT_LEASE_SECONDS = 300
+LEASE_RENEW_SECONDS = 30
+
+PURGE_CHUNK_SIZE = 500
+
+_PDF_COLUMNS = (
+    Transaction.data_transacao,
+    Transaction.tipo,
+    Transaction.valor,
+    Transaction.descricao,
+)
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def data_version(db: Session, usuario_ids: list[int], start_date: date | None, end_date: date | None) -> str:
+    """Versao dos dados do relatorio, lida do banco (vale para todos os workers)."""
+    return transactions_fingerprint(db, sorted(set(usuario_ids)), start_date=start_date, end_date=end_date)
+
+
+def report_key(usuario_id: int, start_date: date | None, end_date: date | None, version: str) -> str:
+    raw = f"pdf|{usuario_id}|{start_date}|{end_date}|{version}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _report_path(usuario_id: int, chave: str) -> str:
+    return os.path.join(get_settings().reports_dir, str(usuario_id), f"{chave}.pdf")
+
+
+def _init_worker() -> None:
+    # Conexoes herdadas do processo pai (fork) nao podem ser reutilizadas no filho
+    from app.db.session import engine
+
+    engine.dispose(close=False)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=get_settings().report_workers, initializer=_init_worker)
+        return _executor
+
+
+def shutdown_report_pool() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _mark_failed(db: Session, job_id: int, message: str) -> None:
+    db.execute(
+        update(ReportJob)
+        .where(ReportJob.id == job_id)
+        .values(status=STATUS_ERRO, erro=message[:1000], data_conclusao=_utcnow())
+    )
+    db.commit()
+
+
+def _draw_pdf(path: str, rows, titulo: str) -> int:
+    """Desenha as linhas pagina a pagina direto no arquivo; devolve quantas foram escritas."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(path, pagesize=A4)
+    width, height = A4
+    page = 1
+
+    def header() -> float:
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(50, height - 50, "Relatório de Transações")
+        c.setFont("Helvetica", 9)
+        c.drawString(50, height - 66, titulo)
+        c.drawRightString(width - 50, height - 66, f"Página {page}")
+        c.setFont("Helvetica", 10)
+        return height - 90
+
+    y = header()
+    count = 0
+    for t in rows:
+        line = f"{t.data_transacao.isoformat()} - {t.tipo} - R$ {t.valor:.2f} - {t.descricao or ''}"
+        c.drawString(50, y, line)
+        count += 1
+        y -= 14
+        if y < 50:
+            c.showPage()
+            page += 1
+            y = header()
+    c.save()
+    return count
+
+
+def _renew_lease(job_id: int) -> None:
+    # Sessao curta propria: a conexao do job esta ocupada com o cursor em streaming
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(ReportJob)
+            .where(and_(ReportJob.id == job_id, ReportJob.status == STATUS_PROCESSANDO))
+            .values(atualizado_em=_utcnow())
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _with_lease(rows, job_id: int, interval: float = LEASE_RENEW_SECONDS):
+    """Repassa as linhas renovando o lease do job a cada `interval` segundos."""
+    renewed = time.monotonic()
+    for row in rows:
+        if time.monotonic() - renewed >= interval:
+            _renew_lease(job_id)
+            renewed = time.monotonic()
+        yield row
+
+
+def render_pdf_report(job_id: int, usuario_ids: list[int]) -> None:
+    """Executado no pool de processos: gera o PDF do job lendo as transacoes em streaming.
+
+    Usa sessao propria e grava em arquivo temporario, renomeado ao concluir,
+    entao um download nunca ve um PDF pela metade.
+    """
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    tmp_path = None
+    try:
+        job = db.get(ReportJob, job_id)
+        if job is None:
+            return
+        job.status = STATUS_PROCESSANDO
+        job.atualizado_em = _utcnow()
+        usuario_id, chave = job.usuario_id, job.chave
+        start_date, end_date = job.data_inicio, job.data_fim
+        db.commit()
+
+        path = _report_path(usuario_id, chave)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        titulo = f"Período: {start_date.isoformat() if start_date else 'início'} a {end_date.isoformat() if end_date else 'hoje'}"
+        rows = iter_transaction_rows(db, usuario_ids, _PDF_COLUMNS, start_date=start_date, end_date=end_date)
+        count = _draw_pdf(tmp_path, _with_lease(rows, job_id), titulo)
+        os.replace(tmp_path, path)
+        tmp_path = None
+
+        db.execute(
+            update(ReportJob)
+            .where(ReportJob.id == job_id)
+            .values(
+                status=STATUS_CONCLUIDO,
+                caminho_arquivo=path,
+                tamanho=os.path.getsize(path),
+                linhas=count,
+                atualizado_em=_utcnow(),
+                data_conclusao=_utcnow(),
+            )
+        )
+        db.commit()
+    except Exception as exc:
+        logger.exception("Falha ao gerar relatorio %s", job_id)
+        db.rollback()
+        _mark_failed(db, job_id, f"{type(exc).__name__}: {exc}")
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        db.close()
+
+
+def _on_done(job_id: int, future: Future) -> None:
+    exc = future.exception() if not future.cancelled() else None
+    if exc is None and not future.cancelled():
+        return
+    # Processo do pool morreu (ou job cancelado no shutdown) antes de registrar o erro
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        _mark_failed(db, job_id, "Geracao interrompida" if exc is None else f"{type(exc).__name__}: {exc}")
+    finally:
+        db.close()
+
+
+def _expire_stale_jobs(db: Session, usuario_id: int, chave: str, cutoff: datetime) -> None:
+    # Jobs cujo worker sumiu (processo morto, deploy) sem marcar o erro
+    db.execute(
+        update(ReportJob)
+        .where(
+            and_(
+                ReportJob.usuario_id == usuario_id,
+                ReportJob.chave == chave,
+                ReportJob.status.in_((STATUS_PENDENTE, STATUS_PROCESSANDO)),
+                or_(ReportJob.atualizado_em.is_(None), ReportJob.atualizado_em < cutoff),
+            )
+        )
+        .values(status=STATUS_ERRO, erro="Lease expirado", data_conclusao=_utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def submit_pdf_report(
+    db: Session, usuario_id: int, usuario_ids: list[int], start_date: date | None, end_date: date | None
+) -> ReportJob:
+    """Cria o job do PDF e o envia ao pool; pedidos identicos reaproveitam o job/arquivo existente.
+
+    Identicos = mesmo usuario, periodo e versao dos dados (quantidade e
+    maior id das transacoes do periodo, lidos do banco); criar ou excluir uma
+    transacao muda a versao e gera um novo arquivo. Um job em andamento so e
+    reaproveitado com lease valido (gravado no banco, visivel a todos os workers).
+    """
+    version = data_version(db, usuario_ids, start_date, end_date)
+    chave = report_key(usuario_id, start_date, end_date, version)
+    _expire_stale_jobs(db, usuario_id, chave, _utcnow() - timedelta(seconds=REPORT_LEASE_SECONDS))
+    db.commit()
+    for existing in db.execute(
+        select(ReportJob)
+        .where(
+            and_(
+                ReportJob.usuario_id == usuario_id,
+                ReportJob.chave == chave,
+                ReportJob.status != STATUS_ERRO,
+            )
+        )
+        .order_by(ReportJob.id.desc())
+    ).scalars():
+        if existing.status != STATUS_CONCLUIDO:
+            return existing
+        if existing.caminho_arquivo and os.path.exists(existing.caminho_arquivo):
+            return existing
+
+    job = ReportJob(
+        usuario_id=usuario_id,
+        formato="pdf",
+        data_inicio=start_date,
+        data_fim=end_date,
+        chave=chave,
+        atualizado_em=_utcnow(),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    future = _get_executor().submit(render_pdf_report, job.id, list(usuario_ids))
+    future.add_done_callback(lambda f, job_id=job.id: _on_done(job_id, f))
+    return job
+
+
+def get_report_job(db: Session, job_id: int) -> ReportJob | None:
+    return db.get(ReportJob, job_id)
+
+
+def purge_old_reports(db: Session, retention_days: int, now: datetime | None = None) -> int:
+    """Apaga os jobs criados ha mais de `retention_days` dias e seus arquivos. Commit a cada bloco.
+
+    Jobs ainda em andamento com lease valido sao mantidos. Devolve quantos jobs foram removidos.
+    """
+    now = now or _utcnow()
+    created_before = now - timedelta(days=retention_days)
+    lease_cutoff = now - timedelta(seconds=REPORT_LEASE_SECONDS)
+    removed = 0
+    while True:
+        rows = db.execute(
+            select(ReportJob.id, ReportJob.caminho_arquivo)
+            .where(
+                and_(
+                    ReportJob.data_criacao < created_before,
+                    or_(
+                        ReportJob.status.in_((STATUS_CONCLUIDO, STATUS_ERRO)),
+                        ReportJob.atualizado_em.is_(None),
+                        ReportJob.atualizado_em < lease_cutoff,
+                    ),
+                )
+            )
+            .order_by(ReportJob.id)
+            .limit(PURGE_CHUNK_SIZE)
+        ).all()
+        if not rows:
+            return removed
+        for _, path in rows:
+            if path:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    logger.exception("Falha ao remover o arquivo de relatorio %s", path)
+        db.execute(
+            delete(ReportJob)
+            .where(ReportJob.id.in_([job_id for job_id, _ in rows]))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        removed += len(rows)
@@ -1,24 +1,148 @@
-from datetime import date
+import logging
+import math
+import os
+import socket
+import uuid
+from datetime import date, datetime, timedelta, timezone
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from sqlalchemy.orm import Session
 
-from app.crud.fixed_expense import run_fixed_expenses_for_date
+from app.core.config import get_settings
+from app.crud.billing_calendar import close_due_invoices, sync_all_calendars, sync_missing_calendars
+from app.crud.fixed_expense import run_due_fixed_expenses
+from app.crud.invoice import verify_invoice_totals
+from app.crud.scheduler_lease import acquire_lease, release_lease
 from app.db.session import SessionLocal
+from app.services.reports import purge_old_reports
 
 
+logger = logging.getLogger(__name__)
+
 _scheduler: BackgroundScheduler | None = None
 
+# Identificador deste processo nas leases (um por worker do uvicorn)
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Particoes (usuario_id % N) cuja lease este worker detem
+_held_partitions: set[int] = set()
+
+
+def _lease_name(partition: int) -> str:
+    return f"scheduler:{partition}"
+
+
+def _job_heartbeat():
+    """Renova as leases deste worker e assume particoes livres ou abandonadas."""
+    settings = get_settings()
+    ttl = settings.scheduler_lease_ttl_seconds
+    cap = settings.scheduler_max_partitions_per_worker
+    db: Session = SessionLocal()
+    try:
+        for partition in range(settings.scheduler_partitions):
+            name = _lease_name(partition)
+            if partition in _held_partitions:
+                if not acquire_lease(db, name, WORKER_ID, ttl):
+                    _held_partitions.discard(partition)
+                    logger.warning("Lease %s perdida por %s", name, WORKER_ID)
+                continue
+            # Acima do limite, so assume particoes cujo dono parou de renovar ha mais de um ttl
+            # (particoes ainda sem lease ficam para workers abaixo do limite)
+            over_cap = cap > 0 and len(_held_partitions) >= cap
+            if acquire_lease(
+                db, name, WORKER_ID, ttl, stale_after_seconds=ttl if over_cap else 0, criar=not over_cap
+            ):
+                _held_partitions.add(partition)
+                logger.info("Lease %s adquirida por %s", name, WORKER_ID)
+    except Exception:
+        logger.exception("Falha ao renovar leases do agendador")
+    finally:
+        db.close()
+
+
+def _still_holds(db: Session, partition: int) -> bool:
+    # Confirma a lease no banco antes de executar (o worker pode ter ficado parado)
+    settings = get_settings()
+    if acquire_lease(db, _lease_name(partition), WORKER_ID, settings.scheduler_lease_ttl_seconds):
+        return True
+    _held_partitions.discard(partition)
+    return False
+
 
 def _job_run_fixed_expenses():
+    partitions = get_settings().scheduler_partitions
     db: Session = SessionLocal()
     try:
-        # MVP: para todos os usuários cadastrados, executa; em produção, iterar de forma paginada
-        # Para evitar dependência cruzada, consulta IDs diretamente via SQL simples
-        users = db.execute("SELECT id FROM USUARIOS").fetchall()
         today = date.today()
-        for (user_id,) in users:
-            run_fixed_expenses_for_date(db, user_id, today)
+        for partition in sorted(_held_partitions):
+            if not _still_holds(db, partition):
+                continue
+            # Uma passada em lote sobre os gastos devidos dos usuários da partição
+            run_due_fixed_expenses(db, today, partition=(partition, partitions))
+    finally:
+        db.close()
+
+
+def _job_verify_invoice_totals():
+    # Job global: só o dono da partição 0 executa
+    db: Session = SessionLocal()
+    try:
+        if 0 not in _held_partitions or not _still_holds(db, 0):
+            return
+        drifts = verify_invoice_totals(db)
+        if drifts:
+            logger.warning("%s faturas com total divergente foram corrigidas", len(drifts))
+    finally:
+        db.close()
+
+
+def _job_sync_billing_calendars():
+    # Job global: só o dono da partição 0 executa
+    db: Session = SessionLocal()
+    try:
+        if 0 not in _held_partitions or not _still_holds(db, 0):
+            return
+        sync_all_calendars(db)
+    finally:
+        db.close()
+
+
+def _job_close_invoices():
+    # Job global: só o dono da partição 0 executa
+    db: Session = SessionLocal()
+    try:
+        if 0 not in _held_partitions or not _still_holds(db, 0):
+            return
+        # Fechamento usa o calendario: completa antes os cartoes sem janela
+        sync_missing_calendars(db)
+        close_due_invoices(db)
+    finally:
+        db.close()
+
+
+def _job_sync_missing_calendars():
+    # Job global: só o dono da partição 0 executa
+    db: Session = SessionLocal()
+    try:
+        if 0 not in _held_partitions or not _still_holds(db, 0):
+            return
+        sync_missing_calendars(db)
+    finally:
+        db.close()
+
+
+def _job_purge_reports():
+    # Job global: só o dono da partição 0 executa
+    retention_days = get_settings().report_retention_days
+    if retention_days <= 0:
+        return
+    db: Session = SessionLocal()
+    try:
+        if 0 not in _held_partitions or not _still_holds(db, 0):
+            return
+        removed = purge_old_reports(db, retention_days)
+        if removed:
+            logger.info("%s relatorios antigos removidos", removed)
     finally:
         db.close()
 
@@ -27,10 +151,32 @@ def start_scheduler():
     global _scheduler
     if _scheduler is not None:
         return
+    settings = get_settings()
     _scheduler = BackgroundScheduler(timezone="UTC")
+    # todos os workers agendam, mas só quem detém a lease de uma partição executa
+    _scheduler.add_job(
+        _job_heartbeat,
+        "interval",
+        seconds=max(1, math.ceil(settings.scheduler_lease_ttl_seconds / 3)),
+    )
     # roda diariamente às 03:00 UTC
     _scheduler.add_job(_job_run_fixed_expenses, "cron", hour=3, minute=0)
+    # fecha as faturas vencidas e abre as do período corrente às 00:30 UTC
+    _scheduler.add_job(_job_close_invoices, "cron", hour=0, minute=30)
+    # confere os totais mantidos incrementalmente das faturas às 04:00 UTC
+    _scheduler.add_job(_job_verify_invoice_totals, "cron", hour=4, minute=0)
+    # apaga PDFs e jobs de relatório antigos às 05:00 UTC
+    _scheduler.add_job(_job_purge_reports, "cron", hour=5, minute=0)
+    # avança a janela do calendário de faturas no dia 1 de cada mês
+    _scheduler.add_job(_job_sync_billing_calendars, "cron", day=1, hour=2, minute=0)
+    # completa uma vez, logo apos a subida, o calendario de cartoes antigos
+    _scheduler.add_job(
+        _job_sync_missing_calendars,
+        "date",
+        run_date=datetime.now(timezone.utc) + timedelta(seconds=settings.scheduler_lease_ttl_seconds),
+    )
     _scheduler.start()
+    _job_heartbeat()
 
 
 def stop_scheduler():
@@ -38,5 +184,10 @@ def stop_scheduler():
     if _scheduler:
         _scheduler.shutdown()
         _scheduler = None
-
-
+        db: Session = SessionLocal()
+        try:
+            for partition in list(_held_partitions):
+                release_lease(db, _lease_name(partition), WORKER_ID)
+            _held_partitions.clear()
+        finally:
+            db.close()
@@ -0,0 +1,225 @@
+import csv
+import io
+import re
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.crud.account import apply_balance_delta
+from app.crud.card import apply_limit_delta
+from app.crud.invoice import apply_invoice_delta, invoice_reference
+from app.crud.transaction import bulk_insert_transactions
+from app.models.account import BankAccount
+from app.models.card import CreditCard
+from app.models.category import Category
+from app.models.subcategory import Subcategory
+from app.models.transaction import TipoTransacao
+from app.services.cache import bump_data_version
+
+
+CHUNK_SIZE = 1000
+
+_OFX_TAG = re.compile(r"<(/?)([A-Z0-9.]+)>([^<\r\n]*)", re.IGNORECASE)
+
+
+def _parse_decimal(raw: str) -> Decimal:
+    value = raw.strip().replace("R$", "").replace(" ", "")
+    if "," in value and "." in value:
+        # 1.234,56 -> 1234.56
+        value = value.replace(".", "").replace(",", ".")
+    elif "," in value:
+        value = value.replace(",", ".")
+    try:
+        parsed = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"valor '{raw.strip()}' nao e numerico")
+    # NaN/Infinity passam pelo Decimal() mas quebram comparacoes (InvalidOperation)
+    if not parsed.is_finite():
+        raise ValueError(f"valor '{raw.strip()}' nao e numerico")
+    return parsed
+
+
+def _parse_date(raw: str) -> datetime:
+    value = raw.strip()
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return datetime.fromisoformat(value)
+
+
+def _parse_optional_int(raw: str | None) -> int | None:
+    if raw is None or not raw.strip():
+        return None
+    return int(raw)
+
+
+def iter_csv_rows(stream: BinaryIO) -> Iterator[tuple[int, dict]]:
+    """Le o CSV linha a linha. Aceita o mesmo layout da exportacao (/reports/transactions.csv)."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    header = text.readline()
+    delimiter = ";" if header.count(";") > header.count(",") else ","
+    columns = [c.strip().lower() for c in next(csv.reader([header], delimiter=delimiter), [])]
+    reader = csv.reader(text, delimiter=delimiter)
+    for line_no, values in enumerate(reader, start=2):
+        if not any(v.strip() for v in values):
+            continue
+        yield line_no, dict(zip(columns, values))
+
+
+def iter_ofx_rows(stream: BinaryIO) -> Iterator[tuple[int, dict]]:
+    """Le blocos <STMTTRN> de um extrato OFX (SGML ou XML) sem carregar o arquivo todo."""
+    text = io.TextIOWrapper(stream, encoding="latin-1", newline="")
+    current: dict | None = None
+    start_line = 0
+    for line_no, line in enumerate(text, start=1):
+        for closing, tag, value in _OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if closing and current is not None:
+                    yield start_line, current
+                    current = None
+                elif not closing:
+                    current = {}
+                    start_line = line_no
+            elif current is not None and not closing and value.strip():
+                current[tag] = value.strip()
+
+
+def _csv_to_fields(raw: dict) -> dict:
+    valor = _parse_decimal(raw.get("valor", ""))
+    tipo = (raw.get("tipo") or "").strip().capitalize()
+    if not tipo:
+        tipo = TipoTransacao.DESPESA if valor < 0 else TipoTransacao.RECEITA
+        valor = abs(valor)
+    return {
+        "tipo": tipo,
+        "valor": valor,
+        "data_transacao": _parse_date(raw.get("data") or raw.get("data_transacao") or ""),
+        "descricao": (raw.get("descricao") or "").strip() or None,
+        "categoria_id": _parse_optional_int(raw.get("categoria_id")),
+        "subcategoria_id": _parse_optional_int(raw.get("subcategoria_id")),
+        "conta_bancaria_id": _parse_optional_int(raw.get("conta_bancaria_id")),
+        "cartao_credito_id": _parse_optional_int(raw.get("cartao_credito_id")),
+    }
+
+
+def _ofx_to_fields(raw: dict) -> dict:
+    valor = _parse_decimal(raw.get("TRNAMT", ""))
+    posted = raw.get("DTPOSTED", "")
+    return {
+        "tipo": TipoTransacao.DESPESA if valor < 0 else TipoTransacao.RECEITA,
+        "valor": abs(valor),
+        "data_transacao": datetime.strptime(posted[:8], "%Y%m%d"),
+        "descricao": raw.get("MEMO") or raw.get("NAME"),
+        "categoria_id": None,
+        "subcategoria_id": None,
+        "conta_bancaria_id": None,
+        "cartao_credito_id": None,
+    }
+
+
+def import_transactions(
+    db: Session,
+    usuario_id: int,
+    stream: BinaryIO,
+    formato: str,
+    categoria_id: int | None = None,
+    conta_bancaria_id: int | None = None,
+    cartao_credito_id: int | None = None,
+) -> dict:
+    """Importa transacoes em lote a partir de CSV ou OFX.
+
+    As linhas sao validadas e inseridas em blocos de CHUNK_SIZE via executemany.
+    Saldo e faturas sao ajustados uma unica vez ao final: um delta liquido por
+    conta e um por fatura afetada, tudo no mesmo commit. Os campos
+    categoria/conta/cartao informados valem para linhas que nao os trazem.
+    """
+    if formato == "ofx":
+        rows, to_fields = iter_ofx_rows(stream), _ofx_to_fields
+    else:
+        rows, to_fields = iter_csv_rows(stream), _csv_to_fields
+
+    # Ids validos do usuario carregados uma vez (categorias globais incluidas)
+    valid_categorias = set(db.execute(
+        select(Category.id).where((Category.usuario_id == usuario_id) | (Category.usuario_id.is_(None)))
+    ).scalars())
+    # Subcategoria -> categoria a que pertence (a linha precisa usar a mesma)
+    subcategorias = dict(db.execute(
+        select(Subcategory.id, Subcategory.categoria_id)
+        .where((Subcategory.usuario_id == usuario_id) | (Subcategory.usuario_id.is_(None)))
+    ).tuples().all())
+    valid_contas = set(db.execute(select(BankAccount.id).where(BankAccount.usuario_id == usuario_id)).scalars())
+    cards = {
+        c.id: c for c in db.execute(select(CreditCard).where(CreditCard.usuario_id == usuario_id)).scalars()
+    }
+
+    importadas = 0
+    erros: list[dict] = []
+    balance_deltas: dict[int, Decimal] = defaultdict(Decimal)
+    invoice_deltas: dict[tuple[int, int, int], Decimal] = defaultdict(Decimal)
+    chunk: list[dict] = []
+
+    for line_no, raw in rows:
+        try:
+            fields = to_fields(raw)
+        except ValueError as e:
+            erros.append({"linha": line_no, "erro": f"Linha invalida: {e}"})
+            continue
+
+        fields["categoria_id"] = fields["categoria_id"] or categoria_id
+        fields["conta_bancaria_id"] = fields["conta_bancaria_id"] or conta_bancaria_id
+        fields["cartao_credito_id"] = fields["cartao_credito_id"] or cartao_credito_id
+
+        if fields["tipo"] not in (TipoTransacao.RECEITA, TipoTransacao.DESPESA):
+            erros.append({"linha": line_no, "erro": "Tipo deve ser Receita ou Despesa"})
+            continue
+        if fields["valor"] <= 0:
+            erros.append({"linha": line_no, "erro": "Valor deve ser maior que zero"})
+            continue
+        if fields["categoria_id"] not in valid_categorias:
+            erros.append({"linha": line_no, "erro": "Categoria nao encontrada"})
+            continue
+        if fields["subcategoria_id"] and subcategorias.get(fields["subcategoria_id"]) != fields["categoria_id"]:
+            erros.append({"linha": line_no, "erro": "Subcategoria nao encontrada na categoria"})
+            continue
+        if fields["conta_bancaria_id"] and fields["conta_bancaria_id"] not in valid_contas:
+            erros.append({"linha": line_no, "erro": "Conta bancaria nao encontrada"})
+            continue
+        if fields["cartao_credito_id"] and fields["cartao_credito_id"] not in cards:
+            erros.append({"linha": line_no, "erro": "Cartao nao encontrado"})
+            continue
+
+        fields["usuario_id"] = usuario_id
+        chunk.append(fields)
+
+        if fields["conta_bancaria_id"]:
+            delta = fields["valor"] if fields["tipo"] == TipoTransacao.RECEITA else -fields["valor"]
+            balance_deltas[fields["conta_bancaria_id"]] += delta
+        if fields["cartao_credito_id"]:
+            card = cards[fields["cartao_credito_id"]]
+            mes, ano = invoice_reference(card.dia_fechamento_fatura, fields["data_transacao"])
+            invoice_deltas[(card.id, mes, ano)] += fields["valor"]
+
+        if len(chunk) >= CHUNK_SIZE:
+            importadas += bulk_insert_transactions(db, chunk)
+            chunk = []
+
+    importadas += bulk_insert_transactions(db, chunk)
+
+    for conta_id, delta in balance_deltas.items():
+        if delta:
+            apply_balance_delta(db, conta_id, delta, usuario_id=usuario_id)
+    for (card_id, mes, ano), delta in invoice_deltas.items():
+        apply_invoice_delta(db, card_id, mes, ano, delta)
+        apply_limit_delta(db, card_id, delta, mes, ano)
+
+    db.commit()
+    # INSERT em lote nao passa pelo flush do ORM
+    bump_data_version(usuario_id)
+    return {"importadas": importadas, "erros": erros}
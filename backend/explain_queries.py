@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Script para verificar se as consultas das funcoes CRUD usam indices.
+
+Executa as consultas de leitura mais usadas (listagem de transacoes, dashboard,
+faturas) para um usuario existente, captura o SQL gerado e roda EXPLAIN em cada
+uma. Falha (exit code 1) se alguma tabela for lida por varredura completa
+(type=ALL) ou sem indice.
+
+Uso:
+    python explain_queries.py [--usuario-id ID]
+"""
+
+import argparse
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import event, select
+
+from app.db.session import SessionLocal, engine
+from app.models.card import CreditCard
+from app.models.user import User
+
+
+def _collect_queries(db, user: User) -> list[tuple[str, object]]:
+    """Executa as funcoes CRUD e devolve os SELECTs emitidos (sql, parametros)."""
+    from app.crud import dashboard
+    from app.crud.invoice import _billing_period, compute_invoice_total, get_invoice_transactions
+    from app.crud.transaction import count_transactions, list_transactions, list_transactions_with_total
+
+    captured: list[tuple[str, object]] = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        today = date.today()
+        start = today - timedelta(days=90)
+        list_transactions(db, [user.id], start_date=start, end_date=today)
+        list_transactions(db, [user.id], order_by="valor", order_dir="asc")
+        list_transactions_with_total(db, [user.id], start_date=start, end_date=today)
+        count_transactions(db, [user.id], start_date=start, end_date=today)
+
+        month_start, month_end = dashboard.month_window(today)
+        dashboard.aggregate_period(db, user.id, month_start, month_end)
+        dashboard.aggregate_period(db, user.id, month_start, month_end, tipo="Despesa")
+        dashboard.balances_by_account(db, user.id)
+
+        card = db.execute(select(CreditCard).where(CreditCard.usuario_id == user.id)).scalars().first()
+        if card:
+            period_start, period_end = _billing_period(card.dia_fechamento_fatura, today.month, today.year)
+            compute_invoice_total(db, card.id, period_start, period_end)
+            get_invoice_transactions(db, card.id, period_start, period_end)
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+        db.rollback()
+    return captured
+
+
+def _explain(statement: str, parameters) -> list[dict]:
+    with engine.connect() as conn:
+        result = conn.exec_driver_sql("EXPLAIN " + statement, parameters)
+        return [dict(row._mapping) for row in result]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Roda EXPLAIN nas consultas CRUD")
+    parser.add_argument("--usuario-id", type=int, default=None, help="Usuario usado nas consultas (padrao: o primeiro)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.usuario_id:
+            user = db.get(User, args.usuario_id)
+        else:
+            user = db.execute(select(User).order_by(User.id)).scalars().first()
+        if not user:
+            print("❌ Nenhum usuario encontrado para executar as consultas")
+            return 1
+
+        queries = _collect_queries(db, user)
+    finally:
+        db.close()
+
+    failures = 0
+    for statement, parameters in queries:
+        plan = _explain(statement, parameters)
+        problems = [
+            row for row in plan
+            if row.get("table") and not str(row["table"]).startswith("<")
+            and (row.get("type") == "ALL" or row.get("key") is None)
+        ]
+        first_line = " ".join(statement.split())[:110]
+        if problems:
+            failures += 1
+            print(f"❌ {first_line}")
+            for row in problems:
+                print(f"   tabela={row.get('table')} type={row.get('type')} key={row.get('key')} rows={row.get('rows')}")
+        else:
+            keys = ", ".join(sorted({str(row.get("key")) for row in plan if row.get("key")}))
+            print(f"✅ {first_line}")
+            print(f"   indices: {keys}")
+
+    print("=" * 50)
+    print(f"{len(queries)} consultas analisadas, {failures} sem uso de indice")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Script para reconstruir a tabela RESUMO_DIARIO a partir de TRANSACOES.
+
+Use apos importacoes manuais no banco ou se os totais divergirem.
+
+Uso:
+    python rebuild_rollups.py [--usuario-id ID]
+"""
+
+import argparse
+import sys
+
+from app.crud.daily_summary import rebuild_daily_summaries
+from app.db.session import SessionLocal
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Reconstroi o RESUMO_DIARIO")
+    parser.add_argument("--usuario-id", type=int, default=None, help="Reconstroi so este usuario (padrao: todos)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        linhas = rebuild_daily_summaries(db, usuario_id=args.usuario_id)
+    finally:
+        db.close()
+    print(f"✅ RESUMO_DIARIO reconstruido: {linhas} linhas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401
+from app.db.base_class import Base
+from app.models.account import BankAccount
+from app.models.card import CreditCard
+from app.models.category import Category
+from app.models.user import User
+from app.services import cache as cache_module
+from app.services.cache import ResultCache, register_invalidation
+
+
+@pytest.fixture
+def engine():
+    # SQLite em memoria compartilhado entre sessoes (StaticPool)
+    engine = create_engine(
+        "sqlite://", future=True, connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def statements(engine):
+    """Verbo (SELECT, INSERT, ...) de cada comando enviado ao banco."""
+    seen = []
+
+    def record(conn, cursor, statement, *args):
+        seen.append(statement.lstrip().split()[0].upper())
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def session_factory(engine):
+    factory = sessionmaker(bind=engine, autoflush=False, future=True)
+    register_invalidation(factory)
+    return factory
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def user(db):
+    u = User(email="teste@moneyhub.dev", nome="Teste", sobrenome="Usuario")
+    db.add(u)
+    db.commit()
+    return u
+
+
+@pytest.fixture
+def category(db, user):
+    c = Category(usuario_id=user.id, nome="Mercado", tipo="Despesa")
+    db.add(c)
+    db.commit()
+    return c
+
+
+@pytest.fixture
+def account(db, user):
+    a = BankAccount(usuario_id=user.id, nome_banco="Banco", tipo_conta="Corrente", saldo_atual=Decimal("1000.00"))
+    db.add(a)
+    db.commit()
+    return a
+
+
+@pytest.fixture
+def card(db, user):
+    c = CreditCard(
+        usuario_id=user.id,
+        nome_cartao="Cartao",
+        bandeira="Visa",
+        limite=Decimal("5000.00"),
+        dia_fechamento_fatura=10,
+        dia_vencimento_fatura=20,
+    )
+    db.add(c)
+    db.commit()
+    return c
+
+
+@pytest.fixture
+def today():
+    return date(2026, 10, 17)
+
+
+@pytest.fixture
+def make_client(db, user):
+    """TestClient com um unico router, autenticado como `user` e usando a sessao `db`."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.api.deps import get_current_user, get_db
+
+    def factory(router):
+        api = FastAPI()
+        api.include_router(router, prefix="/api")
+        api.dependency_overrides[get_db] = lambda: db
+        api.dependency_overrides[get_current_user] = lambda: user
+        return TestClient(api)
+
+    return factory
+
+
+class SharedBackend:
+    """Backend compartilhado em memoria, com a interface do RedisBackend."""
+
+    def __init__(self):
+        self.values = {}
+        self.versions = {}
+
+    def get(self, key):
+        return self.values.get(key, cache_module._MISSING)
+
+    def set(self, key, value, ttl):
+        self.values[key] = value
+
+    def version(self, usuario_id):
+        return self.versions.get(usuario_id, 0)
+
+    def bump(self, usuario_id):
+        self.versions[usuario_id] = self.versions.get(usuario_id, 0) + 1
+        return self.versions[usuario_id]
+
+
+@pytest.fixture
+def shared(monkeypatch):
+    """Cache com backend compartilhado (como com CACHE_REDIS_URL)."""
+    backend = SharedBackend()
+    monkeypatch.setattr(cache_module, "_cache", ResultCache(16, 60, backend))
+    return backend
+
+
+@pytest.fixture
+def memory_only(monkeypatch):
+    """Cache sem backend compartilhado (CACHE_REDIS_URL vazio)."""
+    monkeypatch.setattr(cache_module, "_cache", ResultCache(16, 60))
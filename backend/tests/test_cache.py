@@ -0,0 +1,139 @@
+import io
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.crud.billing_calendar import close_due_invoices, sync_card_calendar
+from app.crud.transaction import create_transaction
+from app.models.report import ReportJob
+from app.services import cache as cache_module
+from app.services.cache import _MISSING, ResultCache, cached
+from app.services.transaction_import import import_transactions
+
+
+def _counter():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    return calls, compute
+
+
+def test_without_shared_backend_cache_is_bypassed(memory_only):
+    calls, compute = _counter()
+    assert cached(1, "summary", "2026-10", compute) == 1
+    assert cached(1, "summary", "2026-10", compute) == 2
+
+
+def test_shared_backend_serves_hits_until_write(db, user, category, account, shared):
+    calls, compute = _counter()
+    assert cached(user.id, "summary", "2026-10", compute) == 1
+    assert cached(user.id, "summary", "2026-10", compute) == 1
+
+    create_transaction(
+        db, user.id, "Despesa", Decimal("10.00"), datetime(2026, 10, 5),
+        categoria_id=category.id, conta_bancaria_id=account.id,
+    )
+
+    assert shared.version(user.id) == 1
+    assert cached(user.id, "summary", "2026-10", compute) == 2
+
+
+def test_rollback_discards_pending_users(db, user, account, shared):
+    account.saldo_atual = Decimal("1.00")
+    db.flush()
+    db.rollback()
+    db.commit()
+    assert shared.version(user.id) == 0
+    assert "cache_usuarios" not in db.info
+
+
+def test_report_jobs_do_not_invalidate(db, user, shared):
+    db.add(ReportJob(usuario_id=user.id, formato="pdf", chave="x" * 64))
+    db.commit()
+    assert shared.version(user.id) == 0
+
+
+def test_bulk_import_bumps_version(db, user, category, account, shared):
+    stream = io.BytesIO(b"tipo;valor;data\nDespesa;10,00;2026-10-01\nReceita;20,00;2026-10-02\n")
+    import_transactions(db, user.id, stream, "csv", categoria_id=category.id, conta_bancaria_id=account.id)
+    assert shared.version(user.id) >= 1
+
+
+def test_invoice_close_bumps_affected_users(db, user, card, shared):
+    # UPDATE/INSERT em lote nao passam pelo flush do ORM
+    sync_card_calendar(db, card)
+    db.commit()
+    before = shared.version(user.id)
+
+    result = close_due_invoices(db, today=date(2026, 10, 17))
+
+    assert result["criadas"] == 1
+    assert shared.version(user.id) == before + 1
+
+
+class BrokenBackend:
+    """Backend compartilhado fora do ar: toda chamada falha."""
+
+    def __init__(self, fail_on: set[str]):
+        self.fail_on = fail_on
+        self.values = {}
+
+    def _check(self, name):
+        if name in self.fail_on:
+            raise ConnectionError(name)
+
+    def get(self, key):
+        self._check("get")
+        return self.values.get(key, _MISSING)
+
+    def set(self, key, value, ttl):
+        self._check("set")
+        self.values[key] = value
+
+    def version(self, usuario_id):
+        self._check("version")
+        return 0
+
+    def bump(self, usuario_id):
+        self._check("bump")
+        return 1
+
+
+def _broken(monkeypatch, *fail_on):
+    monkeypatch.setattr(cache_module, "_cache", ResultCache(16, 60, BrokenBackend(set(fail_on))))
+
+
+def test_backend_read_errors_fall_back_to_compute(monkeypatch, caplog):
+    _broken(monkeypatch, "version", "get", "set")
+    calls, compute = _counter()
+    assert cached(1, "summary", "2026-10", compute) == 1
+    assert cached(1, "summary", "2026-10", compute) == 2
+    assert "Falha ao ler o cache" in caplog.text
+
+
+def test_backend_write_errors_keep_computed_value(monkeypatch):
+    _broken(monkeypatch, "set")
+    calls, compute = _counter()
+    assert cached(1, "summary", "2026-10", compute) == 1
+    # O LRU local continua servindo a entrada calculada
+    assert cached(1, "summary", "2026-10", compute) == 1
+
+
+def test_compute_errors_are_not_swallowed(monkeypatch):
+    _broken(monkeypatch)
+
+    def compute():
+        raise RuntimeError("consulta falhou")
+
+    with pytest.raises(RuntimeError):
+        cached(1, "summary", "2026-10", compute)
+
+
+def test_bump_errors_do_not_break_commits(db, user, account, monkeypatch):
+    _broken(monkeypatch, "bump")
+    account.saldo_atual = Decimal("1.00")
+    db.commit()
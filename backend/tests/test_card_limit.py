@@ -0,0 +1,52 @@
+from datetime import datetime
+from decimal import Decimal
+
+from app.crud.invoice import get_or_create_invoice, pay_invoice
+from app.crud.transaction import create_transaction, delete_transaction
+
+
+def _buy(db, user, category, card, valor, when):
+    return create_transaction(
+        db, user.id, "Despesa", Decimal(valor), when, categoria_id=category.id, cartao_credito_id=card.id
+    )
+
+
+def _used(db, card):
+    db.refresh(card)
+    return card.limite_utilizado
+
+
+def test_limit_through_create_close_pay_delete(db, user, category, card, account):
+    invoice = get_or_create_invoice(db, card.id, 11, 2026, user.id)
+    first = _buy(db, user, category, card, "100.00", datetime(2026, 10, 14))
+    assert _used(db, card) == Decimal("100.00")
+
+    invoice.status = "fechada"
+    db.commit()
+    # Compra no periodo ja fechado: nem fatura nem limite mudam
+    late = _buy(db, user, category, card, "50.00", datetime(2026, 11, 1))
+    assert _used(db, card) == Decimal("100.00")
+    db.refresh(invoice)
+    assert invoice.valor_total == Decimal("100.00")
+
+    # Compra na proxima fatura (ainda sem registro) ocupa limite
+    next_one = _buy(db, user, category, card, "20.00", datetime(2026, 11, 15))
+    assert _used(db, card) == Decimal("120.00")
+
+    pay_invoice(db, invoice, account.id)
+    assert _used(db, card) == Decimal("20.00")
+
+    delete_transaction(db, first)
+    delete_transaction(db, late)
+    assert _used(db, card) == Decimal("20.00")
+
+    delete_transaction(db, next_one)
+    assert _used(db, card) == Decimal("0.00")
+
+
+def test_limit_is_symmetric_on_open_invoice(db, user, category, card):
+    get_or_create_invoice(db, card.id, 11, 2026, user.id)
+    tx = _buy(db, user, category, card, "42.10", datetime(2026, 10, 30))
+    assert _used(db, card) == Decimal("42.10")
+    delete_transaction(db, tx)
+    assert _used(db, card) == Decimal("0.00")
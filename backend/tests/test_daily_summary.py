@@ -0,0 +1,39 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from app.crud.daily_summary import rebuild_daily_summaries, rollup_period
+from app.crud.transaction import bulk_insert_transactions, create_transaction, delete_transaction
+
+
+def _tx(user, category, account, dia, valor, tipo="Despesa"):
+    return {
+        "usuario_id": user.id,
+        "categoria_id": category.id,
+        "conta_bancaria_id": account.id,
+        "tipo": tipo,
+        "valor": Decimal(valor),
+        "descricao": "lote",
+        "data_transacao": datetime(2026, 10, dia, 12),
+    }
+
+
+def test_incremental_rollup_matches_rebuild(db, user, category, account):
+    first = create_transaction(db, user.id, "Despesa", Decimal("10.00"), datetime(2026, 10, 1, 9), categoria_id=category.id, conta_bancaria_id=account.id)
+    create_transaction(db, user.id, "Despesa", Decimal("5.50"), datetime(2026, 10, 1, 18), categoria_id=category.id, conta_bancaria_id=account.id)
+    create_transaction(db, user.id, "Receita", Decimal("100.00"), datetime(2026, 10, 2), categoria_id=category.id, conta_bancaria_id=account.id)
+    bulk_insert_transactions(db, [_tx(user, category, account, 2, "7.25"), _tx(user, category, account, 3, "1.00")])
+    db.commit()
+    delete_transaction(db, first)
+
+    incremental = rollup_period(db, user.id, date(2026, 10, 1), date(2026, 10, 31))
+    rebuild_daily_summaries(db, user.id)
+    rebuilt = rollup_period(db, user.id, date(2026, 10, 1), date(2026, 10, 31))
+
+    assert sorted(incremental) == sorted(rebuilt)
+    assert (date(2026, 10, 1), "Despesa", category.id, Decimal("5.50")) in incremental
+
+
+def test_rows_zeroed_by_deletes_are_hidden(db, user, category, account):
+    tx = create_transaction(db, user.id, "Despesa", Decimal("3.00"), datetime(2026, 10, 5), categoria_id=category.id, conta_bancaria_id=account.id)
+    delete_transaction(db, tx)
+    assert rollup_period(db, user.id, date(2026, 10, 1), date(2026, 10, 31)) == []
@@ -0,0 +1,90 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from app.api.routes.dashboard import router
+from app.crud.dashboard import MAX_SPAN_DAYS, bucket_range, daily_flow
+from app.crud.transaction import create_transaction
+
+
+def test_week_buckets_start_on_monday():
+    # 2026-10-01 e uma quinta-feira
+    assert bucket_range(date(2026, 10, 1), date(2026, 10, 19), "week") == [
+        date(2026, 9, 28),
+        date(2026, 10, 5),
+        date(2026, 10, 12),
+        date(2026, 10, 19),
+    ]
+
+
+def test_month_buckets_cross_year():
+    assert bucket_range(date(2026, 11, 15), date(2027, 2, 1), "month") == [
+        date(2026, 11, 1),
+        date(2026, 12, 1),
+        date(2027, 1, 1),
+        date(2027, 2, 1),
+    ]
+
+
+def test_buckets_stop_at_max_date():
+    assert bucket_range(date(9999, 11, 1), date(9999, 12, 31), "month") == [date(9999, 11, 1), date(9999, 12, 1)]
+    assert bucket_range(date(9999, 12, 20), date(9999, 12, 31), "week")[-1] == date(9999, 12, 27)
+
+
+def test_flow_sums_rows_into_week_buckets():
+    rows = [
+        (date(2026, 10, 5), "Receita", 1, Decimal("100")),
+        (date(2026, 10, 7), "Despesa", 2, Decimal("30")),
+        (date(2026, 10, 12), "Despesa", 2, Decimal("20")),
+    ]
+    flow = daily_flow(rows, date(2026, 10, 5), date(2026, 10, 18), "week")
+    assert [(f["data"], f["despesas"], f["saldo_acumulado"]) for f in flow] == [
+        ("2026-10-05", "30", "70"),
+        ("2026-10-12", "20", "50"),
+    ]
+
+
+def test_route_month_granularity(db, make_client, user, category, account):
+    create_transaction(
+        db, user.id, "Despesa", Decimal("12.00"), datetime(2026, 9, 3),
+        categoria_id=category.id, conta_bancaria_id=account.id,
+    )
+    response = make_client(router).get(
+        "/api/dashboard/daily-flow",
+        params={"start_date": "2026-08-01", "end_date": "2026-10-31", "granularity": "month"},
+    )
+
+    assert response.status_code == 200
+    assert [(f["data"], f["despesas"]) for f in response.json()] == [
+        ("2026-08-01", "0"),
+        ("2026-09-01", "12.00"),
+        ("2026-10-01", "0"),
+    ]
+
+
+def test_route_rejects_span_above_granularity_cap(make_client):
+    client = make_client(router)
+    start = date(2020, 1, 1)
+    for granularity, max_days in MAX_SPAN_DAYS.items():
+        end = date.fromordinal(start.toordinal() + max_days)
+        params = {"start_date": start.isoformat(), "end_date": end.isoformat(), "granularity": granularity}
+        assert client.get("/api/dashboard/daily-flow", params=params).status_code == 200
+
+        params["end_date"] = date.fromordinal(end.toordinal() + 1).isoformat()
+        assert client.get("/api/dashboard/daily-flow", params=params).status_code == 400
+
+
+def test_route_rejects_far_future_month_range(make_client):
+    response = make_client(router).get(
+        "/api/dashboard/daily-flow",
+        params={"start_date": "2000-01-01", "end_date": "9999-12-31", "granularity": "month"},
+    )
+    assert response.status_code == 400
+
+
+def test_route_accepts_last_representable_month(make_client):
+    response = make_client(router).get(
+        "/api/dashboard/daily-flow",
+        params={"start_date": "9999-01-01", "end_date": "9999-12-31", "granularity": "month"},
+    )
+    assert response.status_code == 200
+    assert response.json()[-1]["data"] == "9999-12-01"
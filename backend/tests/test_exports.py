@@ -0,0 +1,93 @@
+import io
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.api.routes.reports import router
+from app.crud.transaction import create_transaction
+from app.models.subcategory import Subcategory
+from app.services import exports
+from app.services.exports import FIELDS, export_transactions, iter_column_batches
+
+
+@pytest.fixture
+def subcategory(db, user, category):
+    s = Subcategory(categoria_id=category.id, usuario_id=user.id, nome="Hortifruti")
+    db.add(s)
+    db.commit()
+    return s
+
+
+@pytest.fixture
+def transactions(db, user, category, subcategory, account, card):
+    create_transaction(
+        db, user.id, "Despesa", Decimal("12.34"), datetime(2026, 10, 2), descricao="feira",
+        categoria_id=category.id, subcategoria_id=subcategory.id, conta_bancaria_id=account.id,
+    )
+    create_transaction(
+        db, user.id, "Despesa", Decimal("99.90"), datetime(2026, 10, 3), descricao="mercado",
+        categoria_id=category.id, cartao_credito_id=card.id,
+    )
+
+
+@pytest.fixture
+def export_session(monkeypatch, session_factory):
+    monkeypatch.setattr(exports, "SessionLocal", session_factory)
+
+
+def test_batches_resolve_dimension_names(db, user, transactions):
+    batches = list(iter_column_batches(db, [user.id], None, None, batch_size=1))
+
+    assert len(batches) == 2
+    newest, oldest = batches
+    assert set(newest) == set(FIELDS)
+    assert newest["descricao"] == ["mercado"]
+    assert newest["subcategoria"] == [None]
+    assert newest["cartao"] == ["Cartao"]
+    assert oldest["categoria"] == ["Mercado"]
+    assert oldest["subcategoria"] == ["Hortifruti"]
+    assert oldest["conta"] == ["Banco"]
+
+
+@pytest.mark.parametrize("formato", ["parquet", "arrow"])
+def test_arrow_formats_round_trip(user, transactions, export_session, formato):
+    pa = pytest.importorskip("pyarrow")
+
+    data = b"".join(export_transactions(formato, [user.id], None, None))
+
+    if formato == "parquet":
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(io.BytesIO(data))
+    else:
+        table = pa.ipc.open_stream(data).read_all()
+    assert table.column_names == list(FIELDS)
+    rows = table.to_pylist()
+    assert [r["valor"] for r in rows] == [Decimal("99.90"), Decimal("12.34")]
+    assert [r["subcategoria"] for r in rows] == [None, "Hortifruti"]
+
+
+def test_xlsx_has_header_and_rows(user, transactions, export_session):
+    openpyxl = pytest.importorskip("openpyxl")
+
+    data = b"".join(export_transactions("xlsx", [user.id], None, None))
+
+    rows = list(openpyxl.load_workbook(io.BytesIO(data)).active.iter_rows(values_only=True))
+    assert rows[0] == FIELDS
+    assert len(rows) == 3
+    assert rows[2][FIELDS.index("subcategoria")] == "Hortifruti"
+
+
+def test_route_streams_parquet(make_client, user, transactions, export_session):
+    pytest.importorskip("pyarrow")
+
+    response = make_client(router).get("/api/reports/transactions.parquet")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == exports.FORMATS["parquet"]
+    assert response.content[:4] == b"PAR1"
+
+
+def test_route_rejects_unknown_format(make_client, user):
+    assert make_client(router).get("/api/reports/transactions.docx").status_code == 422
@@ -0,0 +1,121 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from app.crud import fixed_expense
+from app.crud.fixed_expense import run_due_fixed_expenses, update_fixed_expense
+from app.models.fixed_expense import FixedExpense
+from app.models.transaction import Transaction
+
+
+def _fixed(db, user, category, account, **fields):
+    values = {
+        "descricao": "aluguel",
+        "valor": Decimal("100.00"),
+        "conta_bancaria_id": account.id,
+        "dia_vencimento": 5,
+        "data_inicio": date(2025, 1, 1),
+        **fields,
+    }
+    fx = FixedExpense(usuario_id=user.id, categoria_id=category.id, **values)
+    db.add(fx)
+    db.commit()
+    return fx
+
+
+def _launched(db, fx):
+    return sorted(
+        t.data_transacao.date() for t in db.query(Transaction).filter(Transaction.gasto_fixo_id == fx.id)
+    )
+
+
+def test_legacy_row_without_marker_only_launches_current_month(db, user, category, account):
+    # Linha antiga: ultimo_lancamento NULL e data_inicio quase dois anos atras
+    fx = _fixed(db, user, category, account)
+
+    assert run_due_fixed_expenses(db, date(2026, 10, 17)) == 1
+    assert _launched(db, fx) == [date(2026, 10, 5)]
+    db.refresh(account)
+    db.refresh(fx)
+    assert account.saldo_atual == Decimal("900.00")
+    assert fx.ultimo_lancamento == date(2026, 10, 5)
+
+
+def test_legacy_row_before_due_day_launches_nothing_yet(db, user, category, account):
+    fx = _fixed(db, user, category, account, dia_vencimento=25)
+    assert run_due_fixed_expenses(db, date(2026, 10, 17)) == 0
+    assert _launched(db, fx) == []
+
+
+def test_marker_catches_up_missed_months_once(db, user, category, account):
+    fx = _fixed(db, user, category, account, ultimo_lancamento=date(2026, 7, 5))
+
+    assert run_due_fixed_expenses(db, date(2026, 10, 17)) == 3
+    assert run_due_fixed_expenses(db, date(2026, 10, 17)) == 0
+    assert _launched(db, fx) == [date(2026, 8, 5), date(2026, 9, 5), date(2026, 10, 5)]
+    db.refresh(account)
+    assert account.saldo_atual == Decimal("700.00")
+
+
+def test_short_months_and_end_date(db, user, category, account):
+    fx = _fixed(
+        db, user, category, account,
+        dia_vencimento=31, ultimo_lancamento=date(2026, 1, 31), data_fim=date(2026, 4, 15),
+    )
+    run_due_fixed_expenses(db, date(2026, 10, 17))
+    assert _launched(db, fx) == [date(2026, 2, 28), date(2026, 3, 31)]
+
+
+def test_existing_occurrence_is_not_duplicated(db, user, category, account):
+    fx = _fixed(db, user, category, account, ultimo_lancamento=date(2026, 8, 5))
+    db.add(Transaction(
+        usuario_id=user.id, categoria_id=category.id, tipo="Despesa", valor=Decimal("100.00"),
+        data_transacao=datetime(2026, 9, 5), eh_gasto_fixo=True, gasto_fixo_id=fx.id,
+    ))
+    db.commit()
+    assert run_due_fixed_expenses(db, date(2026, 10, 17)) == 1
+    assert _launched(db, fx) == [date(2026, 9, 5), date(2026, 10, 5)]
+
+
+def test_run_records_next_due_date(db, user, category, account):
+    fx = _fixed(db, user, category, account, ultimo_lancamento=date(2026, 9, 5))
+    run_due_fixed_expenses(db, date(2026, 10, 17))
+    db.refresh(fx)
+    assert fx.proximo_vencimento == date(2026, 11, 5)
+
+
+def test_due_day_moved_earlier_is_launched_on_time(db, user, category, account):
+    fx = _fixed(db, user, category, account, dia_vencimento=25, ultimo_lancamento=date(2026, 8, 25))
+    run_due_fixed_expenses(db, date(2026, 9, 25))
+    assert _launched(db, fx) == [date(2026, 9, 25)]
+
+    update_fixed_expense(db, fx, dia_vencimento=10)
+    assert run_due_fixed_expenses(db, date(2026, 10, 10)) == 1
+    assert _launched(db, fx) == [date(2026, 9, 25), date(2026, 10, 10)]
+    db.refresh(fx)
+    assert fx.proximo_vencimento == date(2026, 11, 10)
+
+
+def test_conflict_retries_chunk_without_launched_rows(db, user, category, account, monkeypatch):
+    taken = _fixed(db, user, category, account, ultimo_lancamento=date(2026, 9, 5))
+    other = _fixed(db, user, category, account, descricao="internet", ultimo_lancamento=date(2026, 9, 5))
+    # Outro processo lancou a ocorrencia depois da leitura de `existing`
+    db.add(Transaction(
+        usuario_id=user.id, categoria_id=category.id, tipo="Despesa", valor=Decimal("100.00"),
+        data_transacao=datetime(2026, 10, 5), eh_gasto_fixo=True, gasto_fixo_id=taken.id,
+    ))
+    db.commit()
+    reads = []
+    real = fixed_expense._launched_occurrences
+
+    def stale_first_read(session, pending):
+        reads.append(1)
+        return set() if len(reads) == 1 else real(session, pending)
+
+    monkeypatch.setattr(fixed_expense, "_launched_occurrences", stale_first_read)
+
+    assert run_due_fixed_expenses(db, date(2026, 10, 17)) == 1
+    assert len(reads) == 2
+    assert _launched(db, taken) == [date(2026, 10, 5)]
+    assert _launched(db, other) == [date(2026, 10, 5)]
+    db.refresh(account)
+    assert account.saldo_atual == Decimal("900.00")
@@ -0,0 +1,92 @@
+from datetime import date
+from decimal import Decimal
+
+from app.api.routes.fixed_expenses import router
+from app.crud.fixed_expense import UPCOMING_MAX_DAYS, upcoming_fixed_expenses
+from app.models.fixed_expense import FixedExpense
+
+
+def _fixed(db, user, category, descricao, valor, dia, **fields):
+    fx = FixedExpense(
+        usuario_id=user.id,
+        categoria_id=category.id,
+        descricao=descricao,
+        valor=Decimal(valor),
+        dia_vencimento=dia,
+        data_inicio=fields.pop("data_inicio", date(2025, 1, 1)),
+        **fields,
+    )
+    db.add(fx)
+    db.commit()
+    return fx
+
+
+def _dues(items):
+    return [(item["descricao"], item["vencimento"]) for item in items]
+
+
+def test_window_spanning_months_lists_every_occurrence(db, user, category):
+    _fixed(db, user, category, "aluguel", "1000.00", 5)
+    _fixed(db, user, category, "academia", "100.00", 31)
+
+    items = upcoming_fixed_expenses(db, user.id, date(2026, 10, 17), date(2027, 1, 10))
+
+    assert _dues(items) == [
+        ("academia", "2026-10-31"),
+        ("aluguel", "2026-11-05"),
+        ("academia", "2026-11-30"),
+        ("aluguel", "2026-12-05"),
+        ("academia", "2026-12-31"),
+        ("aluguel", "2027-01-05"),
+    ]
+    assert [item["acumulado"] for item in items] == [
+        "100.00", "1100.00", "1200.00", "2200.00", "2300.00", "3300.00",
+    ]
+
+
+def test_occurrences_respect_start_and_end_of_validity(db, user, category):
+    _fixed(db, user, category, "curso", "200.00", 10, data_inicio=date(2026, 11, 15), data_fim=date(2027, 2, 9))
+    _fixed(db, user, category, "inativo", "50.00", 10, status="Inativo")
+    _fixed(db, user, category, "sem lembrete", "50.00", 10, lembrete_ativado=False)
+
+    items = upcoming_fixed_expenses(db, user.id, date(2026, 10, 1), date(2027, 3, 31))
+
+    assert _dues(items) == [("curso", "2026-12-10"), ("curso", "2027-01-10")]
+    assert items[-1]["acumulado"] == "400.00"
+
+
+def test_route_returns_total_and_bounds(db, make_client, user, category):
+    _fixed(db, user, category, "aluguel", "1000.00", 5)
+
+    response = make_client(router).get(
+        "/api/fixed-expenses/upcoming", params={"start_date": "2026-10-01", "end_date": "2026-12-31"}
+    )
+
+    body = response.json()
+    assert response.status_code == 200
+    assert (body["inicio"], body["fim"], body["total"]) == ("2026-10-01", "2026-12-31", "3000.00")
+    assert len(body["items"]) == 3
+
+
+def test_route_rejects_windows_above_cap(make_client):
+    client = make_client(router)
+    start = date(2026, 1, 1)
+    end = date.fromordinal(start.toordinal() + UPCOMING_MAX_DAYS)
+
+    ok = client.get("/api/fixed-expenses/upcoming", params={"start_date": start.isoformat(), "end_date": end.isoformat()})
+    assert ok.status_code == 200
+
+    too_long = client.get(
+        "/api/fixed-expenses/upcoming",
+        params={"start_date": start.isoformat(), "end_date": "9999-12-31"},
+    )
+    assert too_long.status_code == 400
+    assert client.get("/api/fixed-expenses/upcoming", params={"days": UPCOMING_MAX_DAYS + 1}).status_code == 422
+
+
+def test_route_default_window_near_max_date(make_client):
+    response = make_client(router).get(
+        "/api/fixed-expenses/upcoming", params={"start_date": "9999-12-30", "days": 30}
+    )
+    assert response.status_code == 200
+    assert response.json()["fim"] == "9999-12-31"
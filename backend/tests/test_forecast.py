@@ -0,0 +1,114 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.crud.invoice import _due_date
+from app.crud.transaction import create_transaction
+from app.models.fixed_expense import FixedExpense
+from app.models.invoice import CreditCardInvoice
+from app.services.forecast import detect_recurring_income, forecast
+
+
+def _invoice(db, user, card, mes, ano, valor, status):
+    db.add(CreditCardInvoice(
+        usuario_id=user.id,
+        cartao_credito_id=card.id,
+        mes_referencia=mes,
+        ano_referencia=ano,
+        valor_total=Decimal(valor),
+        status=status,
+        data_fechamento=date(ano, mes, card.dia_fechamento_fatura),
+        data_vencimento=_due_date(card.dia_vencimento_fatura, mes, ano),
+    ))
+
+
+def _at(result, day: date, series="nao_alocado"):
+    values = result[series] if isinstance(series, str) else series
+    return Decimal(values[result["datas"].index(day.isoformat())])
+
+
+@pytest.fixture
+def salary(db, user, category, account):
+    # Salario nos ultimos 6 meses fechados e um bonus avulso
+    for mes, valor in zip(range(4, 10), ("3000", "3000", "3100", "3000", "3000", "3100")):
+        create_transaction(
+            db, user.id, "Receita", Decimal(valor), datetime(2026, mes, 5),
+            descricao="Salario", categoria_id=category.id, conta_bancaria_id=account.id,
+        )
+    create_transaction(
+        db, user.id, "Receita", Decimal("500"), datetime(2026, 6, 12),
+        descricao="Bonus", categoria_id=category.id, conta_bancaria_id=account.id,
+    )
+
+
+def test_detects_monthly_income_only(db, user, account, salary, today):
+    [item] = detect_recurring_income(db, user.id, today)
+    assert item["descricao"] == "salario"
+    assert item["conta_bancaria_id"] == account.id
+    assert (item["valor"], item["dia"], item["meses"]) == (Decimal("3000.00"), 5, 6)
+
+
+def test_recurring_income_needs_minimum_months(db, user, category, account, today):
+    for mes in (8, 9):
+        create_transaction(
+            db, user.id, "Receita", Decimal("100"), datetime(2026, mes, 1),
+            descricao="Aluguel", categoria_id=category.id, conta_bancaria_id=account.id,
+        )
+    assert detect_recurring_income(db, user.id, today) == []
+
+
+def test_forecast_projects_income_and_fixed_expenses(db, user, category, account, salary, today):
+    db.add(FixedExpense(
+        usuario_id=user.id, descricao="Aluguel", valor=Decimal("1200.00"), categoria_id=category.id,
+        conta_bancaria_id=account.id, dia_vencimento=25, data_inicio=date(2026, 1, 1), status="Ativo",
+    ))
+    db.commit()
+    db.refresh(account)
+    saldo = account.saldo_atual
+
+    result = forecast(db, user.id, 1, today=today)
+    [conta] = result["contas"]
+
+    assert (result["inicio"], result["fim"]) == ("2026-10-17", "2026-11-17")
+    assert _at(result, date(2026, 10, 24), conta["saldo"]) == saldo
+    assert _at(result, date(2026, 10, 25), conta["saldo"]) == saldo - 1200
+    assert _at(result, date(2026, 11, 5), conta["saldo"]) == saldo - 1200 + 3000
+    assert conta["saldo_minimo"]["data"] == "2026-10-25"
+
+
+def test_invoice_flows_skip_paid_and_stale_invoices(db, user, card, today):
+    _invoice(db, user, card, 5, 2026, "50.00", "fechada")   # venceu em 20/jun: abandonada
+    _invoice(db, user, card, 7, 2026, "70.00", "fechada")   # venceu em 20/ago: atrasada
+    _invoice(db, user, card, 9, 2026, "90.00", "paga")
+    _invoice(db, user, card, 10, 2026, "100.00", "fechada")  # vence em 20/nov
+    db.commit()
+
+    result = forecast(db, user.id, 2, today=today)
+
+    assert _at(result, today) == Decimal("-70.00")
+    assert _at(result, date(2026, 11, 19)) == Decimal("-70.00")
+    assert _at(result, date(2026, 11, 20)) == Decimal("-170.00")
+    assert result["nao_alocado"][-1] == "-170.00"
+
+
+def test_invoice_due_after_window_is_ignored(db, user, card, today):
+    _invoice(db, user, card, 10, 2026, "100.00", "fechada")  # vence em 20/nov
+    db.commit()
+
+    result = forecast(db, user.id, 1, today=today)
+
+    assert result["nao_alocado"][-1] == "0.00"
+
+
+def test_open_period_uses_card_transactions(db, user, category, card, today):
+    create_transaction(
+        db, user.id, "Despesa", Decimal("40.00"), datetime(2026, 10, 14),
+        categoria_id=category.id, cartao_credito_id=card.id,
+    )
+
+    result = forecast(db, user.id, 3, today=today)
+
+    # Fatura de novembro (periodo 11/out a 10/nov) vence em 20/dez
+    assert _at(result, date(2026, 12, 19)) == Decimal("0.00")
+    assert _at(result, date(2026, 12, 20)) == Decimal("-40.00")
@@ -0,0 +1,176 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app.api.routes.invoices import router
+from app.crud.billing_calendar import sync_card_calendar
+from app.crud.daily_summary import rollup_period
+from app.crud.installment import (
+    create_installment_purchase,
+    delete_installment_purchase,
+    installment_schedule,
+)
+from app.crud.invoice import (
+    get_current_invoices_summary,
+    get_or_create_invoice,
+    invoice_reference,
+    verify_invoice_totals,
+)
+from app.models.billing_calendar import BillingCalendar
+from app.models.category import Category
+from app.models.installment import InstallmentAllocation
+from app.models.transaction import Transaction
+from app.models.user import User
+
+
+def _purchase(db, user, category, card, valor="300.00", parcelas=3, when=datetime(2026, 10, 14)):
+    return create_installment_purchase(
+        db, user.id, card, Decimal(valor), parcelas, when, descricao="TV", categoria_id=category.id
+    )
+
+
+def _allocations(db, compra_id):
+    stmt = (
+        select(InstallmentAllocation.mes_referencia, InstallmentAllocation.ano_referencia, InstallmentAllocation.valor)
+        .where(InstallmentAllocation.compra_id == compra_id)
+        .order_by(InstallmentAllocation.numero_parcela)
+    )
+    return [tuple(row) for row in db.execute(stmt).all()]
+
+
+def test_schedule_puts_remainder_on_first_installment():
+    schedule = installment_schedule(Decimal("100.00"), 3, 11, 2026)
+    assert [(m, a, v) for _, m, a, v in schedule] == [
+        (11, 2026, Decimal("33.34")),
+        (12, 2026, Decimal("33.33")),
+        (1, 2027, Decimal("33.33")),
+    ]
+
+
+def test_schedule_rejects_installments_below_one_cent():
+    with pytest.raises(ValueError):
+        installment_schedule(Decimal("0.05"), 6, 11, 2026)
+
+
+def test_create_writes_allocations_transaction_and_rollup(db, user, category, card):
+    purchase = _purchase(db, user, category, card)
+
+    assert _allocations(db, purchase.id) == [
+        (11, 2026, Decimal("100.00")),
+        (12, 2026, Decimal("100.00")),
+        (1, 2027, Decimal("100.00")),
+    ]
+    tx = db.execute(select(Transaction).where(Transaction.compra_parcelada_id == purchase.id)).scalar_one()
+    assert (tx.valor, tx.tipo, tx.cartao_credito_id) == (Decimal("300.00"), "Despesa", card.id)
+    assert rollup_period(db, user.id, date(2026, 10, 14), date(2026, 10, 14)) == [
+        (date(2026, 10, 14), "Despesa", category.id, Decimal("300.00"))
+    ]
+
+
+def test_delete_removes_transaction_and_rollup(db, user, category, card):
+    purchase = _purchase(db, user, category, card)
+
+    delete_installment_purchase(db, purchase)
+
+    assert db.execute(select(Transaction)).scalars().all() == []
+    assert db.execute(select(InstallmentAllocation)).scalars().all() == []
+    assert rollup_period(db, user.id, date(2026, 10, 1), date(2026, 10, 31)) == []
+
+
+def test_invoice_and_limit_deltas(db, user, category, card):
+    november = get_or_create_invoice(db, card.id, 11, 2026, user.id)
+    december = get_or_create_invoice(db, card.id, 12, 2026, user.id)
+    december.status = "fechada"
+    db.commit()
+
+    purchase = _purchase(db, user, category, card)
+    db.refresh(november)
+    db.refresh(december)
+    db.refresh(card)
+    # Fatura aberta recebe so a parcela (nao o total da transacao); a fechada nao muda
+    assert november.valor_total == Decimal("100.00")
+    assert december.valor_total == Decimal("0.00")
+    assert card.limite_utilizado == Decimal("200.00")
+    assert verify_invoice_totals(db, corrigir=False) == []
+
+    delete_installment_purchase(db, purchase)
+    db.refresh(november)
+    db.refresh(card)
+    assert november.valor_total == Decimal("0.00")
+    assert card.limite_utilizado == Decimal("0.00")
+
+
+def test_first_installment_follows_billing_calendar(db, user, category, card):
+    sync_card_calendar(db, card)
+    # Fechamento de novembro antecipado para o dia 9 no calendario
+    db.get(BillingCalendar, (card.id, 2026, 11)).data_fim = date(2026, 11, 9)
+    db.get(BillingCalendar, (card.id, 2026, 12)).data_inicio = date(2026, 11, 10)
+    db.commit()
+
+    purchase = _purchase(db, user, category, card, when=datetime(2026, 11, 10, 12))
+
+    assert invoice_reference(card.dia_fechamento_fatura, date(2026, 11, 10)) == (11, 2026)
+    assert _allocations(db, purchase.id)[0][:2] == (12, 2026)
+
+
+def test_parcelas_futuras_in_summary(db, user, category, card):
+    today = date.today()
+    purchase = _purchase(db, user, category, card, valor="400.00", parcelas=4, when=datetime.combine(today, datetime.min.time()))
+
+    expected = sum(
+        (valor for mes, ano, valor in _allocations(db, purchase.id) if (ano, mes) > (today.year, today.month)),
+        Decimal("0.00"),
+    )
+    [summary] = get_current_invoices_summary(db, user.id)
+    assert summary["parcelas_futuras"] == expected
+    assert expected >= Decimal("300.00")
+
+
+def _payload(categoria_id, valor="300.00"):
+    return {
+        "valor_total": valor,
+        "numero_parcelas": 3,
+        "data_compra": "2026-10-14T10:00:00",
+        "categoria_id": categoria_id,
+    }
+
+
+def test_route_rejects_foreign_category(db, make_client, card):
+    other = User(email="outro@moneyhub.dev", nome="Outro", sobrenome="Usuario")
+    db.add(other)
+    db.flush()
+    foreign = Category(usuario_id=other.id, nome="Viagem", tipo="Despesa")
+    db.add(foreign)
+    db.commit()
+
+    response = make_client(router).post(f"/api/cards/{card.id}/installments", json=_payload(foreign.id))
+
+    assert response.status_code == 400
+    assert db.execute(select(Transaction)).scalars().all() == []
+
+
+def test_route_rejects_zero_installments(make_client, category, card):
+    response = make_client(router).post(
+        f"/api/cards/{card.id}/installments", json=_payload(category.id, valor="0.02")
+    )
+    assert response.status_code == 400
+
+
+def test_route_creates_purchase(make_client, category, card):
+    response = make_client(router).post(f"/api/cards/{card.id}/installments", json=_payload(category.id))
+    assert response.status_code == 201
+    assert response.json()["numero_parcelas"] == 3
+
+
+def test_linked_transaction_cannot_be_deleted_alone(db, make_client, user, category, card):
+    from app.api.routes.transactions import router as transactions_router
+
+    purchase = _purchase(db, user, category, card)
+    tx_id = db.execute(select(Transaction.id).where(Transaction.compra_parcelada_id == purchase.id)).scalar_one()
+
+    response = make_client(transactions_router).delete(f"/api/transactions/{tx_id}")
+
+    assert response.status_code == 400
+    assert db.get(Transaction, tx_id) is not None
@@ -0,0 +1,63 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+
+from app.crud.billing_calendar import (
+    CALENDAR_MONTHS_AHEAD,
+    CALENDAR_MONTHS_BACK,
+    invoice_history,
+    shift_month,
+    sync_missing_calendars,
+)
+from app.crud.card import create_card
+from app.crud.invoice import _billing_period, get_or_create_invoice, invoice_reference
+from app.crud.transaction import create_transaction
+from app.models.billing_calendar import BillingCalendar
+
+
+def _calendar_rows(db, card):
+    return db.execute(
+        select(func.count()).where(BillingCalendar.cartao_credito_id == card.id)
+    ).scalar_one()
+
+
+def test_card_creation_fills_calendar(db, user):
+    card = create_card(db, user.id, "Novo", "Visa", Decimal("1000"), 10, 20)
+    assert _calendar_rows(db, card) == CALENDAR_MONTHS_BACK + CALENDAR_MONTHS_AHEAD + 1
+
+
+def test_sync_missing_calendars_only_touches_incomplete_cards(db, user, card):
+    complete = create_card(db, user.id, "Novo", "Visa", Decimal("1000"), 5, 15)
+    assert _calendar_rows(db, card) == 0
+
+    assert sync_missing_calendars(db) == 1
+    assert _calendar_rows(db, card) == _calendar_rows(db, complete)
+    assert sync_missing_calendars(db) == 0
+
+
+def test_history_is_read_only_and_sums_periods(db, user, category, statements):
+    card = create_card(db, user.id, "Novo", "Visa", Decimal("1000"), 10, 20)
+    cur_mes, cur_ano = invoice_reference(card.dia_fechamento_fatura, date.today())
+    prev_mes, prev_ano = shift_month(cur_mes, cur_ano, -1)
+    cur_start, _ = _billing_period(10, cur_mes, cur_ano)
+    prev_start, prev_end = _billing_period(10, prev_mes, prev_ano)
+
+    for valor, when in (("10.00", prev_start), ("5.00", prev_end), ("7.00", cur_start)):
+        create_transaction(
+            db, user.id, "Despesa", Decimal(valor), datetime.combine(when, datetime.min.time()),
+            categoria_id=category.id, cartao_credito_id=card.id,
+        )
+    stored = get_or_create_invoice(db, card.id, prev_mes, prev_ano, user.id)
+
+    statements.clear()
+    history = invoice_history(db, card, 3)
+
+    assert set(statements) == {"SELECT"}
+    assert [(h["mes_referencia"], h["ano_referencia"]) for h in history][:2] == [(cur_mes, cur_ano), (prev_mes, prev_ano)]
+    assert history[0]["valor_total"] == Decimal("7.00")
+    assert history[0]["fatura_id"] is None
+    assert history[1]["valor_total"] == Decimal("15.00")
+    assert history[1]["fatura_id"] == stored.id
+    assert history[2]["valor_total"] == Decimal("0")
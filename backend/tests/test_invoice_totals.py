@@ -0,0 +1,51 @@
+from datetime import datetime
+from decimal import Decimal
+
+from app.crud.invoice import get_or_create_invoice, recalculate_invoice, verify_invoice_totals
+from app.crud.transaction import create_transaction, delete_transaction
+
+
+def _buy(db, user, category, card, valor, when):
+    return create_transaction(
+        db, user.id, "Despesa", Decimal(valor), when, categoria_id=category.id, cartao_credito_id=card.id
+    )
+
+
+def test_open_invoice_follows_creates_and_deletes(db, user, category, card):
+    # Fechamento dia 10: compras de 11/out a 10/nov caem na fatura de novembro
+    invoice = get_or_create_invoice(db, card.id, 11, 2026, user.id)
+    first = _buy(db, user, category, card, "120.00", datetime(2026, 10, 14))
+    _buy(db, user, category, card, "30.50", datetime(2026, 11, 10, 22))
+    _buy(db, user, category, card, "99.00", datetime(2026, 11, 11))  # fatura de dezembro
+
+    db.refresh(invoice)
+    assert invoice.valor_total == Decimal("150.50")
+
+    delete_transaction(db, first)
+    db.refresh(invoice)
+    assert invoice.valor_total == Decimal("30.50")
+    assert recalculate_invoice(db, invoice).valor_total == Decimal("30.50")
+
+
+def test_closed_invoice_total_is_frozen(db, user, category, card):
+    invoice = get_or_create_invoice(db, card.id, 11, 2026, user.id)
+    _buy(db, user, category, card, "80.00", datetime(2026, 10, 20))
+    invoice.status = "fechada"
+    db.commit()
+
+    _buy(db, user, category, card, "15.00", datetime(2026, 10, 21))
+    db.refresh(invoice)
+    assert invoice.valor_total == Decimal("80.00")
+
+
+def test_verify_reports_and_fixes_drift(db, user, category, card):
+    invoice = get_or_create_invoice(db, card.id, 11, 2026, user.id)
+    _buy(db, user, category, card, "40.00", datetime(2026, 10, 20))
+    assert verify_invoice_totals(db) == []
+
+    invoice.valor_total = Decimal("1.00")
+    db.commit()
+    drifts = verify_invoice_totals(db, corrigir=True)
+    assert [d["fatura_id"] for d in drifts] == [invoice.id]
+    db.refresh(invoice)
+    assert invoice.valor_total == Decimal("40.00")
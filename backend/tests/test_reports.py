@@ -0,0 +1,206 @@
+from concurrent.futures import Future
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.api.routes.reports import router
+from app.core.config import get_settings
+from app.crud.transaction import create_transaction, delete_transaction
+from app.models.report import ReportJob
+from app.services import reports
+from app.services.reports import (
+    REPORT_LEASE_SECONDS,
+    STATUS_CONCLUIDO,
+    STATUS_ERRO,
+    STATUS_PROCESSANDO,
+    _with_lease,
+    purge_old_reports,
+    submit_pdf_report,
+)
+
+
+class InlineExecutor:
+    """Executa o job na hora (run=True) ou o deixa pendente, como um pool ocupado."""
+
+    def __init__(self, run: bool):
+        self.run = run
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append(args)
+        future = Future()
+        if self.run:
+            future.set_result(fn(*args))
+        return future
+
+
+@pytest.fixture
+def report_env(monkeypatch, tmp_path, session_factory):
+    import app.db.session
+
+    monkeypatch.setattr(app.db.session, "SessionLocal", session_factory)
+    monkeypatch.setattr(get_settings(), "reports_dir", str(tmp_path))
+
+    def use(run: bool) -> InlineExecutor:
+        executor = InlineExecutor(run)
+        monkeypatch.setattr(reports, "_get_executor", lambda: executor)
+        return executor
+
+    return use
+
+
+@pytest.fixture
+def transactions(db, user, category, account):
+    for day in range(1, 6):
+        create_transaction(
+            db, user.id, "Despesa", Decimal("10.00"), datetime(2026, 10, day),
+            descricao=f"compra {day}", categoria_id=category.id, conta_bancaria_id=account.id,
+        )
+
+
+def test_render_writes_pdf(db, user, transactions, report_env):
+    pytest.importorskip("reportlab")
+    report_env(run=True)
+
+    job = submit_pdf_report(db, user.id, [user.id], None, None)
+    db.refresh(job)
+
+    assert job.status == STATUS_CONCLUIDO
+    assert job.linhas == 5
+    with open(job.caminho_arquivo, "rb") as f:
+        assert f.read(4) == b"%PDF"
+
+
+def test_identical_request_reuses_job_with_fresh_lease(db, user, report_env):
+    executor = report_env(run=False)
+
+    first = submit_pdf_report(db, user.id, [user.id], None, None)
+    second = submit_pdf_report(db, user.id, [user.id], None, None)
+
+    assert second.id == first.id
+    assert len(executor.submitted) == 1
+
+
+def test_expired_lease_is_not_reused(db, user, report_env):
+    executor = report_env(run=False)
+    first = submit_pdf_report(db, user.id, [user.id], None, None)
+    first.status = STATUS_PROCESSANDO
+    first.atualizado_em = datetime.now(timezone.utc) - timedelta(seconds=REPORT_LEASE_SECONDS + 1)
+    db.commit()
+
+    second = submit_pdf_report(db, user.id, [user.id], None, None)
+
+    db.refresh(first)
+    assert second.id != first.id
+    assert first.status == STATUS_ERRO
+    assert len(executor.submitted) == 2
+
+
+def test_data_change_creates_new_job(db, user, category, report_env):
+    report_env(run=False)
+    first = submit_pdf_report(db, user.id, [user.id], None, None)
+    tx = create_transaction(db, user.id, "Despesa", Decimal("1.00"), datetime(2026, 10, 1), categoria_id=category.id)
+    second = submit_pdf_report(db, user.id, [user.id], None, None)
+    assert second.id != first.id
+
+    # Excluir a transacao volta aos mesmos dados do primeiro pedido
+    delete_transaction(db, tx)
+    assert submit_pdf_report(db, user.id, [user.id], None, None).id == first.id
+
+
+def test_jobs_are_reused_without_shared_cache(db, user, memory_only, report_env):
+    executor = report_env(run=False)
+    first = submit_pdf_report(db, user.id, [user.id], None, None)
+
+    assert submit_pdf_report(db, user.id, [user.id], None, None).id == first.id
+    assert len(executor.submitted) == 1
+
+
+def test_changes_outside_period_keep_job(db, user, category, report_env):
+    report_env(run=False)
+    first = submit_pdf_report(db, user.id, [user.id], date(2026, 10, 1), date(2026, 10, 31))
+    create_transaction(db, user.id, "Despesa", Decimal("1.00"), datetime(2026, 9, 1), categoria_id=category.id)
+
+    assert submit_pdf_report(db, user.id, [user.id], date(2026, 10, 1), date(2026, 10, 31)).id == first.id
+
+
+def test_lease_is_renewed_while_streaming(db, user, report_env):
+    job = ReportJob(usuario_id=user.id, chave="x" * 64, status=STATUS_PROCESSANDO)
+    db.add(job)
+    db.commit()
+
+    rows = list(_with_lease(iter(range(3)), job.id, interval=0))
+
+    db.refresh(job)
+    assert rows == [0, 1, 2]
+    assert job.atualizado_em is not None
+
+
+def test_legacy_pdf_route_returns_job_while_pending(make_client, user, report_env):
+    report_env(run=False)
+    response = make_client(router).get("/api/reports/transactions.pdf")
+
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    assert response.headers["location"].endswith(f"/api/reports/jobs/{job_id}")
+
+
+def test_legacy_pdf_route_serves_finished_file(make_client, user, transactions, report_env):
+    pytest.importorskip("reportlab")
+    report_env(run=True)
+    client = make_client(router)
+    client.get("/api/reports/transactions.pdf")
+
+    response = client.get("/api/reports/transactions.pdf")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.content.startswith(b"%PDF")
+
+
+def test_legacy_pdf_route_queues_once_without_shared_cache(make_client, user, memory_only, report_env):
+    executor = report_env(run=False)
+    client = make_client(router)
+
+    first = client.get("/api/reports/transactions.pdf")
+    second = client.get("/api/reports/transactions.pdf")
+
+    assert first.status_code == second.status_code == 202
+    assert second.json()["id"] == first.json()["id"]
+    assert len(executor.submitted) == 1
+
+
+def _old_job(db, user, tmp_path, status, days, atualizado_em=None):
+    path = tmp_path / f"{status}-{days}.pdf"
+    path.write_bytes(b"%PDF")
+    now = datetime.now(timezone.utc)
+    job = ReportJob(
+        usuario_id=user.id,
+        chave=f"{status}{days}".ljust(64, "x"),
+        status=status,
+        caminho_arquivo=str(path),
+        data_criacao=now - timedelta(days=days),
+        atualizado_em=atualizado_em,
+    )
+    db.add(job)
+    db.commit()
+    return job.id, path
+
+
+def test_purge_removes_old_jobs_and_files(db, user, tmp_path):
+    now = datetime.now(timezone.utc)
+    old_id, old_file = _old_job(db, user, tmp_path, STATUS_CONCLUIDO, 10)
+    failed_id, _ = _old_job(db, user, tmp_path, STATUS_ERRO, 10)
+    dead_id, _ = _old_job(db, user, tmp_path, STATUS_PROCESSANDO, 10, atualizado_em=now - timedelta(days=9))
+    running_id, _ = _old_job(db, user, tmp_path, STATUS_PROCESSANDO, 10, atualizado_em=now)
+    recent_id, recent_file = _old_job(db, user, tmp_path, STATUS_CONCLUIDO, 1)
+
+    assert purge_old_reports(db, 7) == 3
+
+    db.expire_all()
+    remaining = {job.id for job in db.query(ReportJob)}
+    assert remaining == {running_id, recent_id}
+    assert not old_file.exists()
+    assert recent_file.exists()
+    assert {old_id, failed_id, dead_id}.isdisjoint(remaining)
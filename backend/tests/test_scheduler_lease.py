@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import get_settings
+from app.crud.scheduler_lease import acquire_lease, release_lease
+from app.models.scheduler_lease import SchedulerLease
+from app.services import scheduler
+
+
+def _lease(db, nome="scheduler:0"):
+    db.expire_all()
+    return db.get(SchedulerLease, nome)
+
+
+def _expire(db, nome, seconds_ago):
+    lease = _lease(db, nome)
+    lease.expira_em = datetime.utcnow() - timedelta(seconds=seconds_ago)
+    db.commit()
+
+
+def test_first_acquisition_creates_lease(db):
+    assert acquire_lease(db, "scheduler:0", "a", 60)
+    lease = _lease(db)
+    assert lease.dono == "a"
+    assert lease.expira_em > datetime.utcnow()
+
+
+def test_holder_renews(db):
+    acquire_lease(db, "scheduler:0", "a", 60)
+    before = _lease(db).expira_em
+    assert acquire_lease(db, "scheduler:0", "a", 120)
+    assert _lease(db).expira_em > before
+
+
+def test_valid_lease_of_other_holder_is_refused(db):
+    acquire_lease(db, "scheduler:0", "a", 60)
+    assert not acquire_lease(db, "scheduler:0", "b", 60)
+    assert _lease(db).dono == "a"
+
+
+def test_expired_lease_is_taken_over(db):
+    acquire_lease(db, "scheduler:0", "a", 60)
+    _expire(db, "scheduler:0", 1)
+    assert acquire_lease(db, "scheduler:0", "b", 60)
+    assert _lease(db).dono == "b"
+    assert not acquire_lease(db, "scheduler:0", "a", 60)
+
+
+def test_stale_window_delays_takeover(db):
+    acquire_lease(db, "scheduler:0", "a", 60)
+    _expire(db, "scheduler:0", 30)
+    assert not acquire_lease(db, "scheduler:0", "b", 60, stale_after_seconds=60)
+    _expire(db, "scheduler:0", 90)
+    assert acquire_lease(db, "scheduler:0", "b", 60, stale_after_seconds=60)
+
+
+def test_release_frees_lease_only_for_holder(db):
+    acquire_lease(db, "scheduler:0", "a", 60)
+    release_lease(db, "scheduler:0", "b")
+    assert _lease(db).dono == "a"
+    release_lease(db, "scheduler:0", "a")
+    assert _lease(db) is None
+    assert acquire_lease(db, "scheduler:0", "b", 60)
+
+
+@pytest.fixture
+def worker(monkeypatch, session_factory):
+    settings = get_settings()
+    monkeypatch.setattr(scheduler, "SessionLocal", session_factory)
+    monkeypatch.setattr(settings, "scheduler_partitions", 4)
+    monkeypatch.setattr(settings, "scheduler_max_partitions_per_worker", 2)
+    monkeypatch.setattr(settings, "scheduler_lease_ttl_seconds", 60)
+    workers: dict[str, set[int]] = {}
+
+    def as_worker(worker_id: str) -> set[int]:
+        # Cada chamada simula um worker diferente com o seu conjunto de particoes
+        monkeypatch.setattr(scheduler, "WORKER_ID", worker_id)
+        held_by = workers.setdefault(worker_id, set())
+        monkeypatch.setattr(scheduler, "_held_partitions", held_by)
+        scheduler._job_heartbeat()
+        return held_by
+
+    return as_worker
+
+
+def test_release_returns_partitions_to_other_workers(db, worker):
+    worker("a")
+    worker("b")
+    for partition in (0, 1):
+        release_lease(db, scheduler._lease_name(partition), "a")
+    assert worker("c") == {0, 1}
+
+
+def test_heartbeat_respects_partition_cap(db, worker):
+    assert worker("a") == {0, 1}
+    assert worker("b") == {2, 3}
+    assert worker("a") == {0, 1}
+
+
+def test_heartbeat_over_cap_takes_only_abandoned_partitions(db, worker):
+    worker("a")
+    worker("b")
+    # "b" parou de renovar: so depois de mais um ttl "a" (ja no limite) assume
+    _expire(db, "scheduler:2", 30)
+    assert worker("a") == {0, 1}
+    _expire(db, "scheduler:2", 90)
+    _expire(db, "scheduler:3", 90)
+    assert worker("a") == {0, 1, 2, 3}
+
+
+def test_heartbeat_drops_lost_partition(db, worker):
+    worker("a")
+    worker("b")
+    lease = _lease(db, "scheduler:0")
+    lease.dono = "c"
+    db.commit()
+    assert worker("a") == {1}
+
+
+def test_report_purge_runs_only_on_partition_zero_holder(db, worker, monkeypatch):
+    calls = []
+    monkeypatch.setattr(scheduler, "purge_old_reports", lambda session, days: calls.append(days) or 0)
+    worker("a")
+    worker("b")
+
+    scheduler._job_purge_reports()  # "b" (ultimo worker simulado) nao detem a particao 0
+    assert calls == []
+
+    worker("a")
+    scheduler._job_purge_reports()
+    assert calls == [get_settings().report_retention_days]
@@ -0,0 +1,81 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.crud.transaction import create_transaction
+from app.models.account import BankAccount
+from app.models.card import CreditCard
+from app.models.invoice import CreditCardInvoice
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.schemas.transaction import TransactionPublic
+
+
+def test_create_issues_no_select(db, user, category, account, statements):
+    usuario_id, categoria_id, conta_id = user.id, category.id, account.id
+    statements.clear()
+    tx = create_transaction(
+        db, usuario_id, "Despesa", Decimal("25.00"), datetime(2026, 10, 5),
+        categoria_id=categoria_id, conta_bancaria_id=conta_id,
+    )
+    body = TransactionPublic.model_validate(tx)
+
+    assert body.id == tx.id and tx.id is not None
+    assert body.valor == Decimal("25.00")
+    assert "SELECT" not in statements
+    assert statements.count("INSERT") == 2  # transacao + upsert do RESUMO_DIARIO
+    assert statements.count("UPDATE") == 1  # saldo da conta
+    db.refresh(account)
+    assert account.saldo_atual == Decimal("975.00")
+
+
+def test_create_still_expires_other_objects(db, user, category, account):
+    saldo = account.saldo_atual
+    create_transaction(
+        db, user.id, "Receita", Decimal("1.00"), datetime(2026, 10, 5),
+        categoria_id=category.id, conta_bancaria_id=account.id,
+    )
+    assert db.expire_on_commit is True
+    # O UPDATE atomico do saldo nao passa pelo ORM: o objeto precisa recarregar
+    assert account.saldo_atual == saldo + Decimal("1.00")
+
+
+@pytest.fixture
+def stranger(db):
+    other = User(email="outro@moneyhub.dev", nome="Outro", sobrenome="Usuario")
+    db.add(other)
+    db.commit()
+    account = BankAccount(usuario_id=other.id, nome_banco="Alheio", tipo_conta="Corrente", saldo_atual=Decimal("50.00"))
+    card = CreditCard(
+        usuario_id=other.id, nome_cartao="Alheio", bandeira="Visa", limite=Decimal("1000.00"),
+        dia_fechamento_fatura=10, dia_vencimento_fatura=20,
+    )
+    db.add_all([account, card])
+    db.commit()
+    return {"conta": account, "cartao": card}
+
+
+@pytest.mark.parametrize("field,key", [("conta_bancaria_id", "conta"), ("cartao_credito_id", "cartao")])
+def test_route_rejects_other_users_account_or_card(make_client, db, category, stranger, field, key):
+    from app.api.routes.transactions import router
+
+    payload = {
+        "tipo": "Despesa", "valor": "10.00", "data_transacao": "2026-10-05T00:00:00",
+        "categoria_id": category.id, field: stranger[key].id,
+    }
+    response = make_client(router).post("/api/transactions", json=payload)
+
+    assert response.status_code == 400
+    assert db.query(Transaction).count() == 0
+
+
+def test_card_delta_ignores_other_users_card(db, user, category, stranger):
+    card = stranger["cartao"]
+    create_transaction(
+        db, user.id, "Despesa", Decimal("30.00"), datetime(2026, 10, 5),
+        categoria_id=category.id, cartao_credito_id=card.id,
+    )
+    db.refresh(card)
+    assert card.limite_utilizado == Decimal("0.00")
+    assert db.query(CreditCardInvoice).count() == 0
@@ -0,0 +1,81 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.crud.daily_summary import rollup_period
+from app.models.category import Category
+from app.models.subcategory import Subcategory
+from app.models.transaction import Transaction
+from app.services.transaction_import import _parse_decimal, import_transactions
+
+
+def _csv(lines: list[str]) -> io.BytesIO:
+    return io.BytesIO(("\n".join(lines) + "\n").encode("utf-8"))
+
+
+@pytest.mark.parametrize("raw", ["NaN", "nan", "Infinity", "-Infinity", "sNaN", "abc", ""])
+def test_parse_decimal_rejects_non_finite_and_garbage(raw):
+    with pytest.raises(ValueError):
+        _parse_decimal(raw)
+
+
+@pytest.mark.parametrize("raw,expected", [("1.234,56", "1234.56"), ("R$ 10,5", "10.5"), ("-3.20", "-3.20")])
+def test_parse_decimal_accepts_local_formats(raw, expected):
+    assert _parse_decimal(raw) == Decimal(expected)
+
+
+def test_csv_import_applies_rows_and_reports_bad_lines(db, user, category, account):
+    stream = _csv([
+        "tipo;valor;data;descricao",
+        "Despesa;10,00;2026-10-01;mercado",
+        "Receita;NaN;2026-10-02;quebrado",
+        "Despesa;Infinity;2026-10-02;quebrado",
+        "Receita;200,00;02/10/2026;salario",
+        "Despesa;0;2026-10-03;zero",
+    ])
+    result = import_transactions(db, user.id, stream, "csv", categoria_id=category.id, conta_bancaria_id=account.id)
+
+    assert result["importadas"] == 2
+    assert [e["linha"] for e in result["erros"]] == [3, 4, 6]
+    db.refresh(account)
+    assert account.saldo_atual == Decimal("1190.00")
+    assert db.query(Transaction).count() == 2
+    totals = {tipo: total for _, tipo, _, total in rollup_period(db, user.id, date(2026, 10, 1), date(2026, 10, 31))}
+    assert totals == {"Despesa": Decimal("10.00"), "Receita": Decimal("200.00")}
+
+
+def test_ofx_import_signs_amounts(db, user, category, account):
+    stream = io.BytesIO(
+        b"<OFX><BANKTRANLIST>\n"
+        b"<STMTTRN>\n<TRNAMT>-45.90\n<DTPOSTED>20261005\n<MEMO>Padaria\n</STMTTRN>\n"
+        b"<STMTTRN>\n<TRNAMT>NaN\n<DTPOSTED>20261006\n<MEMO>Quebrado\n</STMTTRN>\n"
+        b"<STMTTRN>\n<TRNAMT>1500.00\n<DTPOSTED>20261006\n<MEMO>Pix\n</STMTTRN>\n"
+        b"</BANKTRANLIST></OFX>\n"
+    )
+    result = import_transactions(db, user.id, stream, "ofx", categoria_id=category.id, conta_bancaria_id=account.id)
+
+    assert result["importadas"] == 2
+    assert len(result["erros"]) == 1
+    db.refresh(account)
+    assert account.saldo_atual == Decimal("2454.10")
+
+
+def test_csv_import_checks_subcategory_belongs_to_category(db, user, category):
+    other = Category(usuario_id=user.id, nome="Lazer", tipo="Despesa")
+    db.add(other)
+    db.commit()
+    sub = Subcategory(categoria_id=category.id, usuario_id=user.id, nome="Feira")
+    db.add(sub)
+    db.commit()
+    stream = _csv([
+        "tipo;valor;data;categoria_id;subcategoria_id",
+        f"Despesa;10,00;2026-10-01;{category.id};{sub.id}",
+        f"Despesa;20,00;2026-10-01;{other.id};{sub.id}",
+    ])
+    result = import_transactions(db, user.id, stream, "csv")
+
+    assert result["importadas"] == 1
+    assert [e["linha"] for e in result["erros"]] == [3]
+    assert db.query(Transaction).one().subcategoria_id == sub.id
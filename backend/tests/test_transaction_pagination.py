@@ -0,0 +1,117 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.crud.transaction import decode_cursor, encode_cursor, list_transactions, list_transactions_with_total
+from app.models.transaction import Transaction
+
+
+@pytest.fixture
+def transactions(db, user, category):
+    # Datas repetidas de 3 em 3 para exercitar o desempate por id
+    rows = [
+        Transaction(
+            usuario_id=user.id,
+            categoria_id=category.id,
+            tipo="Despesa",
+            valor=Decimal(i % 4 + 1),
+            descricao=f"t{i}",
+            data_transacao=datetime(2026, 10, 1 + i // 3),
+        )
+        for i in range(25)
+    ]
+    db.add_all(rows)
+    db.commit()
+    return rows
+
+
+def _walk(db, user_ids, order_by, order_dir, page_size=4):
+    seen, after = [], None
+    while True:
+        page = list_transactions(db, user_ids, order_by=order_by, order_dir=order_dir, page_size=page_size, after=after)
+        seen.extend(t.id for t in page)
+        if len(page) < page_size:
+            return seen
+        after = encode_cursor(page[-1], order_by, order_dir)
+
+
+@pytest.mark.parametrize("order_by", ["data_transacao", "valor", "id"])
+@pytest.mark.parametrize("order_dir", ["asc", "desc"])
+def test_keyset_walk_matches_offset_order(db, user, transactions, order_by, order_dir):
+    expected = [t.id for t in list_transactions(db, [user.id], order_by=order_by, order_dir=order_dir, page_size=100)]
+    assert _walk(db, [user.id], order_by, order_dir) == expected
+    assert len(expected) == len(transactions)
+
+
+def test_cursor_direction_matches_listing_for_unknown_direction(db, user, transactions):
+    # Direcao invalida ordena desc; o cursor precisa registrar a mesma direcao
+    page = list_transactions(db, [user.id], order_dir="DESC ", page_size=5)
+    token = encode_cursor(page[-1], "data_transacao", "DESC ")
+    assert decode_cursor(token)["order_dir"] == "desc"
+    following = list_transactions(db, [user.id], order_dir="desc", page_size=5, after=token)
+    assert not {t.id for t in page} & {t.id for t in following}
+
+
+def test_cursor_for_other_ordering_is_rejected(db, user, transactions):
+    page = list_transactions(db, [user.id], order_dir="asc", page_size=5)
+    token = encode_cursor(page[-1], "data_transacao", "asc")
+    with pytest.raises(ValueError):
+        list_transactions(db, [user.id], order_dir="desc", page_size=5, after=token)
+
+
+def test_invalid_cursor_raises_value_error():
+    with pytest.raises(ValueError):
+        decode_cursor("nao-e-um-cursor")
+
+
+def test_route_walks_pages_with_next_cursor(make_client, transactions):
+    from app.api.routes.transactions import router
+
+    client = make_client(router)
+    ids, params = [], {"order_dir": "asc", "page_size": 7, "include_total": "false"}
+    while True:
+        body = client.get("/api/transactions", params=params).json()
+        ids.extend(item["id"] for item in body["items"])
+        if not body["next_cursor"]:
+            break
+        params["after"] = body["next_cursor"]
+    assert len(ids) == len(set(ids)) == len(transactions)
+
+
+def test_route_rejects_unknown_order_dir(make_client, transactions):
+    from app.api.routes.transactions import router
+
+    response = make_client(router).get("/api/transactions", params={"order_dir": "sideways"})
+    assert response.status_code == 422
+
+
+def test_total_comes_with_first_page(db, user, transactions):
+    items, total = list_transactions_with_total(db, [user.id], page=1, page_size=10)
+    assert total == 25
+    assert [t.id for t in items] == [t.id for t in list_transactions(db, [user.id], page=1, page_size=10)]
+
+
+def test_total_on_page_past_the_end_uses_count(db, user, transactions):
+    items, total = list_transactions_with_total(db, [user.id], page=9, page_size=10)
+    assert items == []
+    assert total == 25
+
+
+def test_total_is_none_when_not_requested(db, user, transactions):
+    items, total = list_transactions_with_total(db, [user.id], page_size=10, include_total=False)
+    assert len(items) == 10
+    assert total is None
+
+
+def test_keyset_page_still_reports_full_total(db, user, transactions):
+    first, _ = list_transactions_with_total(db, [user.id], page_size=10)
+    after = encode_cursor(first[-1], "data_transacao", "desc")
+    items, total = list_transactions_with_total(db, [user.id], page_size=10, after=after)
+    assert total == 25
+    assert not {t.id for t in first} & {t.id for t in items}
+
+
+def test_total_respects_filters(db, user, transactions):
+    _, total = list_transactions_with_total(db, [user.id], start_date=datetime(2026, 10, 2), end_date=datetime(2026, 10, 3))
+    assert total == 6
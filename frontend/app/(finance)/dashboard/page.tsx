@@ -195,49 +195,19 @@ export default function DashboardPage() {
 
   useEffect(() => {
     const fetchSummary = async () => {
-      const [s, a, c, d] = await Promise.all([
-        fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/dashboard/summary`, {
-          credentials: "include",
-        }),
-        fetch(
-          `${process.env.NEXT_PUBLIC_API_BASE_URL}/api/dashboard/balances-by-account`,
-          { credentials: "include" }
-        ),
-        fetch(
-          `${process.env.NEXT_PUBLIC_API_BASE_URL}/api/dashboard/expenses-by-category`,
-          { credentials: "include" }
-        ),
-        fetch(
-          `${process.env.NEXT_PUBLIC_API_BASE_URL}/api/dashboard/daily-flow`,
-          { credentials: "include" }
-        ),
-      ]);
-      if (s.ok) setSummary(await s.json());
-      if (a.ok) setByAccount(await a.json());
-      if (c.ok) setByCategory(await c.json());
-      if (d.ok) setDaily(await d.json());
-
-      // Fetch credit cards summary
-      try {
-        const cc = await fetch(
-          `${process.env.NEXT_PUBLIC_API_BASE_URL}/api/dashboard/credit-cards-summary`,
-          { credentials: "include" }
-        );
-        if (cc.ok) setCreditCardsSummary(await cc.json());
-      } catch {
-        // silent - credit cards summary not available
-      }
-
-      // Fetch categories for budget widget
-      try {
-        const catRes = await fetch(
-          `${process.env.NEXT_PUBLIC_API_BASE_URL}/api/categories`,
-          { credentials: "include" }
-        );
-        if (catRes.ok) setAllCategories(await catRes.json());
-      } catch {
-        // silent
-      }
+      // Todos os widgets em uma requisicao (mesma sessao e janela do mes)
+      const res = await fetch(
+        `${process.env.NEXT_PUBLIC_API_BASE_URL}/api/dashboard/overview`,
+        { credentials: "include" }
+      );
+      if (!res.ok) return;
+      const data = await res.json();
+      setSummary(data.summary);
+      setByAccount(data.balances_by_account);
+      setByCategory(data.expenses_by_category);
+      setDaily(data.daily_flow);
+      setCreditCardsSummary(data.credit_cards_summary);
+      setAllCategories(data.categories);
     };
     fetchSummary();
   }, []);
@@ -34,7 +34,7 @@ export default function UpcomingFixedExpensesPage() {
           className="input w-20"
           type="number"
           min={1}
-          max={60}
+          max={366}
           value={days}
           onChange={(e) => setDays(Number(e.target.value) || 7)}
         />
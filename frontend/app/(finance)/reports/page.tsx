@@ -458,9 +458,31 @@ export default function ReportsPage() {
   // Download handler
   // -------------------------------------------------------------------
 
+  // PDF e gerado em segundo plano: cria o job, consulta o status e baixa o arquivo
+  const waitPdfReport = async (): Promise<string> => {
+    const base = `${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reports/jobs`;
+    const res = await fetch(`${base}?start_date=${startDate}&end_date=${endDate}`, {
+      method: "POST",
+      credentials: "include",
+    });
+    if (!res.ok) throw new Error("Falha ao gerar relatório");
+    let job = await res.json();
+    while (job.status === "pendente" || job.status === "processando") {
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      const poll = await fetch(`${base}/${job.id}`, { credentials: "include" });
+      if (!poll.ok) throw new Error("Falha ao gerar relatório");
+      job = await poll.json();
+    }
+    if (job.status !== "concluido") throw new Error(job.erro || "Falha ao gerar relatório");
+    return `${base}/${job.id}/download`;
+  };
+
   const downloadReport = async (type: "csv" | "pdf") => {
     try {
-      const url = `${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reports/transactions.${type}?start_date=${startDate}&end_date=${endDate}`;
+      const url =
+        type === "pdf"
+          ? await waitPdfReport()
+          : `${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reports/transactions.${type}?start_date=${startDate}&end_date=${endDate}`;
       const res = await fetch(url, { credentials: "include" });
       if (!res.ok) throw new Error("Falha ao gerar relatório");
       const blob = await res.blob();